@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the backend.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.bench_candidates
+    python -m benchmarks.load --output results.json
+"""
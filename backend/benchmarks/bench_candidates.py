@@ -0,0 +1,73 @@
+"""
+Benchmark: per-element Python ranking vs. the NumPy CandidateTable pipeline.
+
+Run from the backend directory:
+    python -m benchmarks.bench_candidates
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_elements
+from services.candidates import CandidateTable
+from services.geo import element_coordinates, haversine_m
+from services.restaurant_service import RestaurantService
+
+LATITUDE, LONGITUDE, RADIUS = 40.7580, -73.9855, 3000
+PREFERENCES = ["italian", "pizza", "vegetarian"]
+
+
+def rank_python(service: RestaurantService, elements: list[dict]) -> list[dict]:
+    """Per-element reference: build every restaurant dict, then filter and sort."""
+    ranked = []
+    for element in elements:
+        restaurant = service._to_restaurant(element, PREFERENCES)
+        if restaurant is None:
+            continue
+        coordinates = element_coordinates(element)
+        distance = haversine_m(LATITUDE, LONGITUDE, *coordinates)
+        if distance <= RADIUS:
+            ranked.append((distance, element))
+    ranked.sort(key=lambda pair: pair[0])
+    return [element for _, element in ranked]
+
+
+def rank_numpy(elements: list[dict]) -> list[dict]:
+    """Columnar pipeline: one table build, then batched masks and argsort."""
+    table = CandidateTable(elements)
+    rows, _ = table.rank(LATITUDE, LONGITUDE, RADIUS, PREFERENCES)
+    return [table.elements[row] for row in rows.tolist()]
+
+
+def best_of(repeat: int, fn, *args) -> tuple[float, object]:
+    """Return the fastest wall time in seconds over repeat runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    service = RestaurantService()
+    print(f"{'elements':>9} {'python ms':>10} {'numpy ms':>9} {'build ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        elements = synthetic_elements(size)
+        python_time, expected = best_of(args.repeat, rank_python, service, elements)
+        numpy_time, actual = best_of(args.repeat, rank_numpy, elements)
+        build_time, _ = best_of(args.repeat, CandidateTable, elements)
+        assert [e["id"] for e in actual] == [e["id"] for e in expected]
+        print(
+            f"{size:>9} {python_time * 1000:>10.1f} {numpy_time * 1000:>9.1f} "
+            f"{build_time * 1000:>9.1f} {python_time / numpy_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Microbenchmark: per-element cost of preference matching.
+
+Compares the previous nested substring loops with PreferenceMatcher.
+
+Run from the backend directory:
+    python -m benchmarks.bench_preference_matcher
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import synthetic_elements
+from services.preference_matcher import PreferenceMatcher
+
+PREFERENCE_SETS = [
+    ["italian"],
+    ["italian", "pizza", "vegetarian"],
+    ["thai", "sushi", "vegan", "burger", "kebab", "seafood"],
+]
+
+
+def nested_loops(restaurant: dict, preferences: list[str]) -> bool:
+    """The previous implementation of RestaurantService._matches_preferences."""
+    normalized_prefs = [p.lower() for p in preferences]
+
+    cuisines = [c.lower() for c in restaurant.get("_cuisine", [])]
+    for pref in normalized_prefs:
+        if any(pref in cuisine for cuisine in cuisines):
+            return True
+
+    types = [t.lower() for t in restaurant.get("types", [])]
+    for pref in normalized_prefs:
+        if any(pref in type_ for type_ in types):
+            return True
+
+    name = restaurant.get("name", "").lower()
+    for pref in normalized_prefs:
+        if pref in name:
+            return True
+
+    return False
+
+
+def to_restaurant(element: dict) -> dict:
+    """Build the fields matching looks at, as _to_restaurant does."""
+    tags = element["tags"]
+    cuisine = tags["cuisine"].split(";") if tags.get("cuisine") else []
+    return {"name": tags["name"], "types": [tags["amenity"], *cuisine], "_cuisine": cuisine}
+
+
+def per_element_ns(fn, restaurants: list[dict], repeat: int) -> float:
+    """Return the best per-element time in nanoseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for restaurant in restaurants:
+            fn(restaurant)
+        best = min(best, time.perf_counter_ns() - started)
+    return best / len(restaurants)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    restaurants = [to_restaurant(e) for e in synthetic_elements(args.elements)]
+
+    print(f"{'preferences':>11} {'nested ns':>10} {'matcher ns':>11} {'speedup':>8}")
+    for preferences in PREFERENCE_SETS:
+        # Synonyms disabled so both sides match exactly the same terms
+        matcher = PreferenceMatcher(preferences, synonyms={})
+
+        def compiled(restaurant: dict) -> bool:
+            return matcher.matches(restaurant["_cuisine"], restaurant["types"], restaurant["name"])
+
+        def nested(restaurant: dict) -> bool:
+            return nested_loops(restaurant, preferences)
+
+        assert [compiled(r) for r in restaurants] == [nested(r) for r in restaurants]
+        nested_ns = per_element_ns(nested, restaurants, args.repeat)
+        compiled_ns = per_element_ns(compiled, restaurants, args.repeat)
+        print(
+            f"{len(preferences):>11} {nested_ns:>10.0f} {compiled_ns:>11.0f} "
+            f"{nested_ns / compiled_ns:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: dict results + Pydantic responses vs. slotted records + orjson.
+
+Measures memory per cached element (raw vs. compact_element), memory per
+restaurant result (dict vs. RestaurantRecord) and the time to serialize a
+search response.
+
+Run from the backend directory:
+    python -m benchmarks.bench_records
+"""
+import argparse
+import time
+import tracemalloc
+
+import orjson
+
+from benchmarks.synthetic import synthetic_elements
+from main import search_response_payload
+from models import Restaurant, RestaurantSearchResponse
+from services.records import RestaurantRecord, compact_element
+from services.restaurant_service import RestaurantService
+
+# Tags commonly found on OSM restaurants that searches never read
+TYPICAL_EXTRA_TAGS = {
+    "phone": "+1 212 555 0100",
+    "website": "https://example.com/",
+    "wheelchair": "yes",
+    "outdoor_seating": "no",
+    "addr:postcode": "10036",
+    "addr:state": "NY",
+    "check_date": "2024-03-01",
+    "brand:wikidata": "Q123456",
+}
+
+
+def with_extra_tags(elements: list[dict]) -> list[dict]:
+    """Return elements carrying the extra tags real Overpass responses have."""
+    return [dict(e, tags={**e["tags"], **TYPICAL_EXTRA_TAGS}) for e in elements]
+
+
+def measure_bytes(build) -> int:
+    """Return the bytes still allocated by the object build() returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def as_dict(record) -> dict:
+    """The per-result dictionary the service used to build."""
+    return {
+        "name": record.name,
+        "place_id": record.place_id,
+        "vicinity": record.vicinity,
+        "rating": None,
+        "types": list(record.types),
+        "user_ratings_total": None,
+        "price_level": None,
+        "opening_hours": record.opening_hours,
+        "distance_m": record.distance_m,
+    }
+
+
+def as_record(record: RestaurantRecord) -> RestaurantRecord:
+    """A fresh record with the same field values as record."""
+    return RestaurantRecord(
+        name=record.name,
+        place_id=record.place_id,
+        vicinity=record.vicinity,
+        types=list(record.types),
+        opening_hours=record.opening_hours,
+        cuisine=record.cuisine,
+        distance_m=record.distance_m
+    )
+
+
+def serialize_pydantic(results: list[dict]) -> bytes:
+    """Previous response path: re-read each dict into a model, then dump JSON."""
+    restaurants = [
+        Restaurant(
+            name=r.get("name", "Unknown"),
+            place_id=r.get("place_id", ""),
+            vicinity=r.get("vicinity", ""),
+            rating=r.get("rating"),
+            types=r.get("types", []),
+            user_ratings_total=r.get("user_ratings_total"),
+            price_level=r.get("price_level"),
+            opening_hours=r.get("opening_hours"),
+            distance_m=r.get("distance_m")
+        )
+        for r in results
+    ]
+    response = RestaurantSearchResponse(
+        restaurants=restaurants, status="OK", total_results=len(restaurants)
+    )
+    return response.model_dump_json().encode()
+
+
+def serialize_records(results: list) -> bytes:
+    """Current response path: records straight to orjson."""
+    return orjson.dumps(search_response_payload({"results": results, "status": "OK"}))
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    """Return the fastest wall time in seconds over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=20_000)
+    parser.add_argument("--page", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    service = RestaurantService()
+    raw = with_extra_tags(synthetic_elements(args.elements))
+
+    raw_bytes = measure_bytes(lambda: [dict(e, tags=dict(e["tags"])) for e in raw])
+    compact_bytes = measure_bytes(lambda: [compact_element(e) for e in raw])
+    print(f"cached element: raw {raw_bytes / len(raw):.0f} B, "
+          f"compact {compact_bytes / len(raw):.0f} B "
+          f"({raw_bytes / compact_bytes:.1f}x smaller)")
+
+    records = service._parse_restaurants(raw, max_results=len(raw))
+    for i, record in enumerate(records):
+        record.distance_m = float(i)
+    # Both shapes share the field strings, so this compares the containers
+    dict_bytes = measure_bytes(lambda: [as_dict(r) for r in records])
+    record_bytes = measure_bytes(lambda: [as_record(r) for r in records])
+    print(f"result: dict {dict_bytes / len(records):.0f} B, "
+          f"record {record_bytes / len(records):.0f} B "
+          f"({dict_bytes / record_bytes:.1f}x smaller)")
+
+    print(f"{'page':>5} {'pydantic us':>12} {'orjson us':>10} {'speedup':>8}")
+    for size in args.page:
+        page = records[:size]
+        dicts = [as_dict(r) for r in page]
+        assert orjson.loads(serialize_pydantic(dicts)) == orjson.loads(serialize_records(page))
+        old = best_of(args.repeat, serialize_pydantic, dicts)
+        new = best_of(args.repeat, serialize_records, page)
+        print(f"{size:>5} {old * 1e6:>12.1f} {new * 1e6:>10.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Local stand-in for the Overpass API used by the load benchmarks.
+
+Serves synthetic (or recorded) restaurant payloads for the area a query
+asks for and injects latency, 429 responses and gateway timeouts, so load
+scenarios are repeatable and never touch the public servers.
+
+Every mirror is served under its own path prefix (e.g. /a/api/interpreter,
+/b/api/interpreter) so fallback and hedging can be exercised; faults can be
+limited to some mirrors.
+
+Run standalone from the backend directory:
+    python -m benchmarks.fake_overpass --port 8900 --latency-ms 200
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+from benchmarks.synthetic import synthetic_elements
+from services.geo import METERS_PER_DEGREE, haversine_m
+
+AROUND = re.compile(r"\(around:([\d.]+),(-?[\d.]+),(-?[\d.]+)\)")
+BBOX = re.compile(r"\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)")
+OUT_LIMIT = re.compile(r"out tags center qt (\d+);")
+
+
+@dataclass
+class FakeOverpassConfig:
+    """Behaviour of the fake server."""
+
+    # Synthetic restaurants per square kilometre (Manhattan is roughly 100)
+    density_per_km2: float = 100.0
+    # Upper bound on elements in one response (like a huge real area)
+    max_elements: int = 20_000
+    # Response latency: a fixed base plus exponentially distributed jitter,
+    # plus time growing with the queried area (Overpass scans the whole area
+    # even when the output is capped)
+    latency_ms: float = 100.0
+    jitter_ms: float = 50.0
+    latency_ms_per_km2: float = 0.0
+    # Probability of answering 429 Too Many Requests
+    rate_limit_ratio: float = 0.0
+    # Probability of hanging for timeout_seconds and answering 504
+    timeout_ratio: float = 0.0
+    timeout_seconds: float = 5.0
+    # Mirrors (path prefixes) the faults apply to; empty means all
+    faulty_mirrors: tuple[str, ...] = ()
+    # Elements to serve instead of synthetic ones (filtered to the query area)
+    recorded_elements: Optional[list[dict]] = None
+    # Bytes per streamed chunk
+    chunk_size: int = 16 * 1024
+    seed: int = 0
+
+
+@dataclass
+class FakeOverpassStats:
+    """Requests served, by mirror and outcome."""
+
+    requests: Counter = field(default_factory=Counter)
+    # Response body bytes served
+    bytes_sent: int = 0
+
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+    def as_dict(self) -> dict:
+        return {f"{mirror}:{outcome}": count for (mirror, outcome), count in self.requests.items()}
+
+
+def query_area(query: str) -> Optional[tuple[float, float, float]]:
+    """Return (latitude, longitude, radius in meters) covered by an Overpass query."""
+    match = AROUND.search(query)
+    if match:
+        radius, lat, lon = map(float, match.groups())
+        return lat, lon, radius
+    match = BBOX.search(query)
+    if match:
+        south, west, north, east = map(float, match.groups())
+        lat, lon = (south + north) / 2, (west + east) / 2
+        return lat, lon, haversine_m(lat, lon, north, east)
+    return None
+
+
+def ring_inner_radius(query: str) -> float:
+    """Return the radius subtracted by a ring query (0 for any other query)."""
+    radii = {float(match.group(1)) for match in AROUND.finditer(query)}
+    return min(radii) if len(radii) > 1 else 0.0
+
+
+def query_area_km2(query: str) -> float:
+    """Return the area in square kilometres covered by an Overpass query."""
+    match = AROUND.search(query)
+    if match:
+        return math.pi * (float(match.group(1)) / 1000) ** 2
+    match = BBOX.search(query)
+    if match:
+        south, west, north, east = map(float, match.groups())
+        height = (north - south) * METERS_PER_DEGREE / 1000
+        width = (east - west) * METERS_PER_DEGREE / 1000 * math.cos(math.radians((south + north) / 2))
+        return height * width
+    return 0.0
+
+
+def create_app(config: FakeOverpassConfig, stats: FakeOverpassStats) -> FastAPI:
+    """Create the fake Overpass ASGI app."""
+    app = FastAPI()
+    rng = random.Random(config.seed)
+
+    # Keep payload generation out of the measurements for repeated areas
+    @lru_cache(maxsize=256)
+    def response_body(query: str) -> bytes:
+        return json.dumps({"version": 0.6, "elements": elements_for(query)}).encode()
+
+    def elements_for(query: str) -> list[dict]:
+        area = query_area(query)
+        if area is None:
+            return []
+        lat, lon, radius = area
+        match = OUT_LIMIT.search(query)
+        limit = int(match.group(1)) if match else None
+        if config.recorded_elements is not None:
+            elements = [
+                e for e in config.recorded_elements
+                if haversine_m(lat, lon, *_coordinates(e)) <= radius
+            ]
+            return elements[:limit]
+
+        inner = ring_inner_radius(query)
+        count = min(int(config.density_per_km2 * query_area_km2(query)), config.max_elements)
+        if limit is not None and not inner:
+            # Only generate what the response would be cut down to
+            count = min(count, limit)
+        # The same area always gets the same restaurants
+        seed = zlib.crc32(f"{lat:.5f},{lon:.5f},{radius:.0f}".encode())
+        spread = radius / METERS_PER_DEGREE / math.sqrt(2)
+        elements = synthetic_elements(count, lat, lon, spread=spread, seed=seed)
+        # Distinct areas get distinct ids (tiled searches deduplicate by id)
+        for element in elements:
+            element["id"] += seed << 20
+        if inner:
+            elements = [e for e in elements if haversine_m(lat, lon, *_coordinates(e)) > inner]
+        return elements[:limit]
+
+    @app.post("/{mirror}/api/interpreter")
+    async def interpreter(mirror: str, request: Request):
+        form = await request.form()
+        query = form.get("data", "")
+        faulty = not config.faulty_mirrors or mirror in config.faulty_mirrors
+
+        jitter = rng.expovariate(1 / config.jitter_ms) if config.jitter_ms else 0.0
+        scan = config.latency_ms_per_km2 * query_area_km2(query)
+        await asyncio.sleep((config.latency_ms + jitter + scan) / 1000)
+
+        roll = rng.random()
+        if faulty and roll < config.rate_limit_ratio:
+            stats.requests[(mirror, "429")] += 1
+            return Response(status_code=429)
+        if faulty and roll < config.rate_limit_ratio + config.timeout_ratio:
+            await asyncio.sleep(config.timeout_seconds)
+            stats.requests[(mirror, "504")] += 1
+            return Response(status_code=504)
+
+        body = response_body(query)
+        stats.requests[(mirror, "200")] += 1
+        stats.bytes_sent += len(body)
+
+        async def chunks():
+            for start in range(0, len(body), config.chunk_size):
+                yield body[start:start + config.chunk_size]
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return app
+
+
+def _coordinates(element: dict) -> tuple[float, float]:
+    if "lat" in element:
+        return element["lat"], element["lon"]
+    return element["center"]["lat"], element["center"]["lon"]
+
+
+class FakeOverpassServer:
+    """Run the fake Overpass app with uvicorn on a background thread."""
+
+    def __init__(self, config: FakeOverpassConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.stats = FakeOverpassStats()
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_app(config, self.stats), host=host, port=port,
+            log_level="warning", lifespan="off"
+        ))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.servers[0].sockets[0].getsockname()[1]
+
+    def url(self, mirror: str) -> str:
+        """Return the interpreter URL of one mirror."""
+        return f"http://127.0.0.1:{self.port}/{mirror}/api/interpreter"
+
+    def __enter__(self) -> "FakeOverpassServer":
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("Fake Overpass server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--timeout-ratio", type=float, default=0.0)
+    parser.add_argument("--payload", help="Recorded Overpass JSON to serve instead of synthetic data")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.payload:
+        with open(args.payload, encoding="utf-8") as f:
+            data = json.load(f)
+        recorded = data.get("elements", []) if isinstance(data, dict) else data
+    config = FakeOverpassConfig(
+        latency_ms=args.latency_ms,
+        rate_limit_ratio=args.rate_limit_ratio,
+        timeout_ratio=args.timeout_ratio,
+        recorded_elements=recorded
+    )
+    uvicorn.run(create_app(config, FakeOverpassStats()), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
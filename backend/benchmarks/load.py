@@ -0,0 +1,281 @@
+"""
+Load scenarios for the restaurant search API against a local fake Overpass.
+
+Each scenario starts a fake Overpass server (see benchmarks.fake_overpass),
+runs the FastAPI app in-process with its normal lifespan, and drives
+/api/restaurants/search with concurrent simulated users. It reports
+throughput, p50/p95/p99 latency, status codes, upstream requests and
+memory, and can write the results as JSON to compare across commits.
+
+Run from the backend directory:
+    python -m benchmarks.load
+    python -m benchmarks.load --scenarios hot_area rate_limited --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_overpass import FakeOverpassConfig, FakeOverpassServer
+
+# Times Square, NYC
+CENTER = (40.7580, -73.9855)
+
+
+@dataclass
+class Scenario:
+    """One load pattern and the upstream behaviour it runs against."""
+
+    description: str
+    users: int = 20
+    requests_per_user: int = 20
+    # Number of distinct search locations; None gives every request its own
+    hot_locations: Optional[int] = 5
+    # Degrees around CENTER the locations are drawn from
+    spread: float = 0.05
+    radius: int = 1500
+    preferences: list[str] = field(default_factory=list)
+    upstream: FakeOverpassConfig = field(default_factory=FakeOverpassConfig)
+    # Settings overrides, as environment variables
+    env: dict[str, str] = field(default_factory=dict)
+
+
+SCENARIOS = {
+    "hot_area": Scenario(
+        "Many users searching a few popular spots (cache and coalescing friendly)",
+        users=50, requests_per_user=20, hot_locations=5,
+    ),
+    "cold_area": Scenario(
+        "Every search in a different place (all cache misses)",
+        users=20, requests_per_user=10, hot_locations=None, spread=0.5,
+    ),
+    "adaptive_radius": Scenario(
+        "Every search in a different place, widening from a small radius",
+        users=20, requests_per_user=10, hot_locations=None, spread=0.5,
+        env={"SEARCH_RADIUS_MODE": "adaptive"},
+    ),
+    "wide_radius": Scenario(
+        "Large search radius with dense upstream payloads (tiled fetching)",
+        users=10, requests_per_user=5, hot_locations=None, spread=0.5, radius=20000,
+        upstream=FakeOverpassConfig(latency_ms_per_km2=10.0),
+        env={"RATE_LIMIT_ENABLED": "false"},
+    ),
+    "wide_radius_untiled": Scenario(
+        "Large search radius as one upstream query (tiling disabled)",
+        users=10, requests_per_user=5, hot_locations=None, spread=0.5, radius=20000,
+        upstream=FakeOverpassConfig(latency_ms_per_km2=10.0),
+        env={"RATE_LIMIT_ENABLED": "false", "OVERPASS_TILE_RADIUS_THRESHOLD_METERS": "100000"},
+    ),
+    "preferences": Scenario(
+        "Hot spots with cuisine preferences",
+        users=30, requests_per_user=20, hot_locations=5,
+        preferences=["italian", "pizza", "vegetarian"],
+    ),
+    "rate_limited": Scenario(
+        "Primary mirror answers 429 to 30% of requests",
+        users=20, requests_per_user=10, hot_locations=None, spread=0.5,
+        upstream=FakeOverpassConfig(rate_limit_ratio=0.3, faulty_mirrors=("a",)),
+    ),
+    "slow_upstream": Scenario(
+        "Slow upstream with occasional gateway timeouts, hedged fetching",
+        users=20, requests_per_user=5, hot_locations=None, spread=0.5,
+        upstream=FakeOverpassConfig(latency_ms=400, jitter_ms=400, timeout_ratio=0.05,
+                                    timeout_seconds=3.0),
+        env={"OVERPASS_FETCH_MODE": "hedged", "OVERPASS_HEDGE_DELAY_SECONDS": "1.0"},
+    ),
+    "no_cache": Scenario(
+        "Hot spots with the cache disabled",
+        users=20, requests_per_user=10, hot_locations=5,
+        env={"CACHE_ENABLED": "false"},
+    ),
+}
+
+
+def current_rss_mb() -> Optional[float]:
+    """Return the resident set size of this process in MB (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def max_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kibibytes elsewhere
+    return peak / 1e6 if platform.system() == "Darwin" else peak * 1024 / 1e6
+
+
+def git_commit() -> Optional[str]:
+    """Return the current commit hash, if run inside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def search_locations(scenario: Scenario, total: int, seed: int) -> list[tuple[float, float]]:
+    """Return the location of every request in the scenario."""
+    rng = random.Random(seed)
+
+    def point():
+        return (CENTER[0] + rng.uniform(-scenario.spread, scenario.spread),
+                CENTER[1] + rng.uniform(-scenario.spread, scenario.spread))
+
+    if scenario.hot_locations is None:
+        return [point() for _ in range(total)]
+    hot = [point() for _ in range(scenario.hot_locations)]
+    return [rng.choice(hot) for _ in range(total)]
+
+
+async def drive(app, scenario: Scenario, seed: int) -> dict:
+    """Run the scenario's users against the app and return the raw measurements."""
+    total = scenario.users * scenario.requests_per_user
+    locations = search_locations(scenario, total, seed)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    # Every simulated user is a separate client for rate limiting
+    async def user(client: httpx.AsyncClient, index: int) -> None:
+        for i in range(scenario.requests_per_user):
+            lat, lon = locations[index * scenario.requests_per_user + i]
+            started = time.perf_counter()
+            response = await client.post("/api/restaurants/search", json={
+                "latitude": lat,
+                "longitude": lon,
+                "radius": scenario.radius,
+                "preferences": scenario.preferences,
+            }, headers={"X-API-Key": f"user-{index}"})
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=None) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(user(client, u) for u in range(scenario.users)))
+            elapsed = time.perf_counter() - started
+
+    return {"latencies": latencies, "statuses": statuses, "elapsed": elapsed}
+
+
+def run_scenario(name: str, scenario: Scenario, seed: int) -> dict:
+    """Run one scenario with its own fake Overpass server and settings."""
+    # Imported here so each scenario's environment is in place first
+    import main
+    from config import get_settings
+    from services.restaurant_service import RestaurantService
+
+    with FakeOverpassServer(scenario.upstream) as upstream:
+        env = {
+            "OVERPASS_API_URL": upstream.url("a"),
+            "CACHE_BACKEND": "memory",
+            "RESTAURANT_DATA_SOURCE": "overpass",
+            "INGEST_AREAS": "[]",
+            **scenario.env,
+        }
+        saved_env = {key: os.environ.get(key) for key in env}
+        saved_servers = RestaurantService.OVERPASS_SERVERS
+        os.environ.update(env)
+        # Never fall back to the public mirrors
+        RestaurantService.OVERPASS_SERVERS = [upstream.url("a"), upstream.url("b")]
+        get_settings.cache_clear()
+        rss_before = current_rss_mb()
+        try:
+            measured = asyncio.run(drive(main.app, scenario, seed))
+        finally:
+            RestaurantService.OVERPASS_SERVERS = saved_servers
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            get_settings.cache_clear()
+        rss_after = current_rss_mb()
+        upstream_requests = upstream.stats.as_dict()
+        upstream_bytes = upstream.stats.bytes_sent
+
+    latencies_ms = np.array(measured["latencies"]) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]).tolist()
+    return {
+        "description": scenario.description,
+        "users": scenario.users,
+        "requests": len(latencies_ms),
+        "elapsed_s": round(measured["elapsed"], 3),
+        "throughput_rps": round(len(latencies_ms) / measured["elapsed"], 1),
+        "latency_ms": {
+            "p50": round(p50, 2),
+            "p95": round(p95, 2),
+            "p99": round(p99, 2),
+            "max": round(float(latencies_ms.max()), 2),
+            "mean": round(float(latencies_ms.mean()), 2),
+        },
+        "status_codes": {str(code): count for code, count in sorted(measured["statuses"].items())},
+        "upstream_requests": upstream_requests,
+        "upstream_mb": round(upstream_bytes / 1e6, 2),
+        "memory_mb": {
+            "rss_before": round(rss_before, 1) if rss_before is not None else None,
+            "rss_after": round(rss_after, 1) if rss_after is not None else None,
+            "max_rss": round(max_rss_mb(), 1),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply requests per user (e.g. 0.2 for a quick run)")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scenario':<20} {'req':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'upstream':>9} {'up MB':>8} {'non-200':>8}")
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        scenario.requests_per_user = max(1, round(scenario.requests_per_user * args.scale))
+        result = run_scenario(name, scenario, args.seed)
+        results[name] = result
+        non_ok = sum(count for code, count in result["status_codes"].items() if code != "200")
+        latency = result["latency_ms"]
+        print(f"{name:<20} {result['requests']:>5} {result['throughput_rps']:>8} "
+              f"{latency['p50']:>8} {latency['p95']:>8} {latency['p99']:>8} "
+              f"{sum(result['upstream_requests'].values()):>9} {result['upstream_mb']:>8} "
+              f"{non_ok:>8}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scale": args.scale,
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
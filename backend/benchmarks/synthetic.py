@@ -0,0 +1,54 @@
+"""
+Synthetic Overpass payloads for benchmarks.
+"""
+import random
+
+CUISINES = [
+    "italian", "pizza", "chinese", "mexican", "indian", "thai", "japanese",
+    "sushi", "burger", "vegetarian", "vegan", "french", "greek", "korean",
+    "vietnamese", "coffee_shop", "sandwich", "kebab", "seafood", "steak_house",
+]
+AMENITIES = ["restaurant", "cafe", "fast_food"]
+WORDS = ["Golden", "Corner", "Little", "House", "Garden", "Express", "Kitchen",
+         "Palace", "Bistro", "Grill", "Dragon", "Mama's", "Royal", "Street"]
+
+
+def synthetic_elements(
+    count: int,
+    latitude: float = 40.7580,
+    longitude: float = -73.9855,
+    spread: float = 0.05,
+    seed: int = 0
+) -> list[dict]:
+    """
+    Generate Overpass-shaped restaurant elements around a point.
+
+    Args:
+        count: Number of elements
+        latitude: Center latitude
+        longitude: Center longitude
+        spread: Maximum offset from the center in degrees
+        seed: Random seed (payloads are reproducible)
+
+    Returns:
+        List of node/way elements with "out center"-style coordinates
+    """
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        lat = latitude + rng.uniform(-spread, spread)
+        lon = longitude + rng.uniform(-spread, spread)
+        tags = {
+            "amenity": rng.choice(AMENITIES),
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+            "addr:street": f"{rng.randint(1, 200)}th Street",
+            "addr:housenumber": str(rng.randint(1, 999)),
+        }
+        if rng.random() < 0.7:
+            tags["cuisine"] = ";".join(rng.sample(CUISINES, rng.randint(1, 3)))
+        if rng.random() < 0.2:
+            elements.append({"type": "way", "id": i,
+                             "center": {"lat": lat, "lon": lon}, "tags": tags})
+        else:
+            elements.append({"type": "node", "id": i, "lat": lat, "lon": lon, "tags": tags})
+    return elements
@@ -2,6 +2,7 @@
 Configuration settings for the application.
 """
 from functools import lru_cache
+from typing import Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,6 +14,125 @@ class Settings(BaseSettings):
     # Using faster alternative server by default
     overpass_api_url: str = "https://overpass.kumi.systems/api/interpreter"
 
+    # Shared HTTP client settings (connection pool with keep-alive). The
+    # timeout also bounds each Overpass attempt and is sent as its [timeout:]
+    http_timeout_seconds: float = 60.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+
+    # Overpass response cache (keyed on a lat/lon grid cell + radius bucket)
+    cache_enabled: bool = True
+    cache_backend: str = "memory"  # "memory" (per worker) or "sqlite" (shared, persistent)
+    cache_ttl_seconds: float = 600.0
+    cache_max_entries: int = 1024
+    cache_sqlite_path: str = "overpass_cache.sqlite3"
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_cell_size_degrees: float = 0.005  # ~550 m of latitude
+    cache_radius_bucket_meters: int = 500
+    # Stale-while-revalidate: expired entries are served (and refreshed in
+    # the background) for this long after their TTL
+    cache_stale_seconds: float = 300.0
+    cache_refresh_max_concurrency: int = 4
+    # Hot-area prefetch: every interval, refresh the cells searched at least
+    # min_hits times since the last run whose entries would expire before the
+    # next run (interval 0 disables; keep it below the TTL)
+    cache_prefetch_interval_seconds: float = 0.0
+    cache_prefetch_min_hits: int = 5
+    cache_prefetch_max_keys: int = 50
+
+    # Server-side cap on elements fetched for a cached (unfiltered) search
+    overpass_result_cap: Optional[int] = 1000
+
+    # Share one upstream call among concurrent identical Overpass queries
+    overpass_coalesce_requests: bool = True
+
+    # Server fallback strategy: "sequential" tries mirrors one after another,
+    # "hedged" also queries the next mirror when the current one is slow
+    overpass_fetch_mode: str = "sequential"
+    overpass_hedge_delay_seconds: float = 2.0
+    # Derive the hedge delay from this latency percentile (e.g. 95) once enough
+    # samples exist; leave unset to always use the fixed delay
+    overpass_hedge_percentile: Optional[float] = None
+
+    # Circuit breaker for failing Overpass mirrors
+    overpass_circuit_failure_threshold: int = 3
+    overpass_circuit_open_seconds: float = 30.0
+    overpass_health_ewma_alpha: float = 0.2
+
+    # Wide searches (radius above the threshold; unset disables) are split into
+    # grid tiles fetched concurrently across the mirrors and cached per tile.
+    # Tiles double in size from overpass_tile_size_degrees until at most
+    # overpass_max_tiles cover the search
+    overpass_tile_radius_threshold_meters: Optional[int] = 5000
+    overpass_tile_size_degrees: float = 0.05
+    overpass_max_tiles: int = 24
+    overpass_tile_max_concurrency: int = 6
+
+    # Search radius mode: "full" fetches the whole radius at once, "adaptive"
+    # starts at adaptive_initial_radius_meters and widens by
+    # adaptive_growth_factor (fetching only the new ring) until the page of
+    # results is filled or the requested radius is reached
+    search_radius_mode: str = "full"
+    adaptive_initial_radius_meters: int = 400
+    adaptive_growth_factor: float = 2.0
+
+    # Overpass responses larger than this are parsed in a worker pool, in
+    # batches of this size, so one huge payload does not stall the event
+    # loop (unset disables). "process"
+    # uses worker processes; "thread" only helps with a GIL-free parser
+    parse_offload_threshold_bytes: Optional[int] = 1_000_000
+    parse_executor: str = "process"
+    parse_workers: int = 2
+
+    # Global budget of concurrent Overpass queries; further queries wait in a
+    # bounded queue and searches get a fast 503 once it is full
+    overpass_max_concurrent_requests: int = 8
+    overpass_max_queued_requests: int = 32
+    overpass_queue_timeout_seconds: float = 10.0
+
+    # Per-client rate limiting (token bucket per API key header, else client
+    # address). Only keys listed in rate_limit_api_keys get their own bucket;
+    # requests with any other key are limited by client address. Searches up to rate_limit_cost_radius_meters cost one token;
+    # wider ones cost (radius / rate_limit_cost_radius_meters)^2. A batch pays
+    # for each cluster it queries, at the cost of the cluster's widest search
+    rate_limit_enabled: bool = True
+    rate_limit_capacity: float = 60.0
+    rate_limit_refill_per_second: float = 1.0
+    rate_limit_cost_radius_meters: float = 2500.0
+    rate_limit_client_header: str = "X-API-Key"
+    rate_limit_api_keys: list[str] = []
+    rate_limit_max_clients: int = 10000
+
+    # Per-request deadline in seconds. Clients can ask for less with the
+    # request_timeout_header; every Overpass attempt (and its [timeout:]) only
+    # gets the time left, and searches past their deadline get a 504
+    request_timeout_seconds: float = 60.0
+    request_timeout_header: str = "X-Request-Timeout"
+
+    # Batch search: nearby locations in the same cell share one Overpass query
+    batch_cluster_cell_size_degrees: float = 0.02
+    batch_max_concurrency: int = 4
+
+    # Restaurant data source: "overpass" (remote API) or "local" (OSM extract)
+    restaurant_data_source: str = "overpass"
+    # Overpass-format JSON extract of amenity=restaurant|cafe|fast_food
+    local_osm_path: Optional[str] = None
+    local_osm_cell_size_degrees: float = 0.01
+
+    # Background ingestion of service areas into a local grid index. Areas are
+    # (south, west, north, east) boxes, e.g. INGEST_AREAS='[[40.70,-74.02,40.80,-73.93]]';
+    # searches inside a synced area skip Overpass, all others fall back to it
+    ingest_areas: list[tuple[float, float, float, float]] = []
+    ingest_tile_size_degrees: float = 0.05
+    ingest_cell_size_degrees: float = 0.01
+    ingest_interval_seconds: float = 600.0
+    # Incremental updates re-read this much history to cover mirror lag
+    ingest_update_overlap_seconds: float = 300.0
+    # Full refetch interval (incremental updates cannot see restaurants that
+    # were deleted or lost their name, which linger in the index until then)
+    ingest_full_refresh_seconds: float = 21600.0
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,17 +1,298 @@
 """
 Main FastAPI application module.
 """
-from fastapi import FastAPI, HTTPException, status
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Awaitable, Optional, TypeVar, Union
+
+import httpx
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import State
 
-from config import get_settings
-from models import Restaurant, RestaurantSearchRequest, RestaurantSearchResponse
+from config import Settings, get_settings
+from models import (
+    Restaurant,
+    RestaurantBatchSearchRequest,
+    RestaurantSearchRequest,
+    RestaurantSearchResponse,
+    RestaurantStreamSummary,
+)
+from services.admission import (
+    ClientRateLimiter,
+    UpstreamBudget,
+    UpstreamBusyError,
+    search_cost,
+)
+from services.batch import cluster_searches
+from services.cache import CacheBackend, InMemoryCache, SQLiteCache
+from services.deadline import Deadline, DeadlineExceededError, deadline_scope
+from services.expansion import ExpansionPolicy
+from services.latency import LatencyWindow
+from services.ingest import AreaIngester, ServiceArea
+from services.local_osm import LocalOSMIndex
+from services.metrics import SearchMetrics
+from services.records import RestaurantRecord
+from services.refresh import BackgroundRefresher
 from services.restaurant_service import RestaurantService
+from services.server_health import ServerHealthTracker
+from services.single_flight import SingleFlight
+
+
+T = TypeVar("T")
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when a client disconnects before its search has finished."""
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Create the process-wide HTTP client with a keep-alive connection pool."""
+    return httpx.AsyncClient(
+        timeout=settings.http_timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds
+        )
+    )
+
+
+def create_cache(settings: Settings) -> Optional[CacheBackend]:
+    """Create the Overpass result cache configured in settings (None if disabled)."""
+    if not settings.cache_enabled:
+        return None
+    if settings.cache_backend == "memory":
+        return InMemoryCache(
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_entries=settings.cache_max_entries,
+            stale_seconds=settings.cache_stale_seconds
+        )
+    if settings.cache_backend == "sqlite":
+        return SQLiteCache(
+            settings.cache_sqlite_path,
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_bytes=settings.cache_max_bytes,
+            stale_seconds=settings.cache_stale_seconds
+        )
+    raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+
+
+def create_refresher(settings: Settings) -> Optional[BackgroundRefresher]:
+    """Create the background cache refresher (None if the cache is disabled)."""
+    if not settings.cache_enabled:
+        return None
+    prefetch = settings.cache_prefetch_interval_seconds > 0
+    return BackgroundRefresher(
+        max_concurrency=settings.cache_refresh_max_concurrency,
+        hot_min_hits=settings.cache_prefetch_min_hits if prefetch else None,
+        hot_max_keys=settings.cache_prefetch_max_keys
+    )
+
+
+def create_rate_limiter(settings: Settings) -> Optional[ClientRateLimiter]:
+    """Create the per-client search rate limiter (None if disabled)."""
+    if not settings.rate_limit_enabled:
+        return None
+    return ClientRateLimiter(
+        capacity=settings.rate_limit_capacity,
+        refill_per_second=settings.rate_limit_refill_per_second,
+        max_clients=settings.rate_limit_max_clients
+    )
+
+
+def create_expansion_policy(settings: Settings) -> Optional[ExpansionPolicy]:
+    """Create the adaptive search expansion policy (None for full-radius searches)."""
+    if settings.search_radius_mode == "full":
+        return None
+    if settings.search_radius_mode != "adaptive":
+        raise ValueError(f"Unknown search radius mode: {settings.search_radius_mode}")
+    return ExpansionPolicy(
+        initial_radius=settings.adaptive_initial_radius_meters,
+        growth_factor=settings.adaptive_growth_factor
+    )
+
+
+def create_parse_executor(settings: Settings) -> Optional[Executor]:
+    """Create the pool large Overpass responses are parsed in (None if disabled)."""
+    if settings.parse_offload_threshold_bytes is None:
+        return None
+    if settings.parse_executor == "process":
+        # Spawned rather than forked: the server process has an event loop,
+        # threads and open sockets that a forked child should not inherit
+        return ProcessPoolExecutor(
+            max_workers=settings.parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    if settings.parse_executor == "thread":
+        return ThreadPoolExecutor(
+            max_workers=settings.parse_workers, thread_name_prefix="overpass-parse"
+        )
+    raise ValueError(f"Unknown parse executor: {settings.parse_executor}")
+
+
+def create_local_index(settings: Settings) -> Optional[LocalOSMIndex]:
+    """Load the local OSM extract when it is the configured data source."""
+    if settings.restaurant_data_source == "overpass":
+        return None
+    if settings.restaurant_data_source != "local":
+        raise ValueError(f"Unknown restaurant data source: {settings.restaurant_data_source}")
+    if not settings.local_osm_path:
+        raise ValueError("local_osm_path must be set when restaurant_data_source is 'local'")
+    return LocalOSMIndex.from_file(
+        settings.local_osm_path, cell_size=settings.local_osm_cell_size_degrees
+    )
+
+
+async def read_cache_stats(cache: CacheBackend) -> dict:
+    """Return cache statistics, read in a worker thread if the backend blocks on I/O."""
+    if cache.blocking:
+        return await asyncio.to_thread(cache.stats)
+    return cache.stats()
+
+
+def create_metrics(state: State) -> SearchMetrics:
+    """
+    Create the search metrics, plus gauges read from the shared components at scrape time.
+
+    Cache statistics may need database queries, so rendering does not read
+    them itself: the /metrics endpoint stores them in state.cache_stats first.
+    """
+    metrics = SearchMetrics()
+    state.cache_stats = None
+
+    def collect_components():
+        if state.cache is not None and state.cache_stats is not None:
+            stats = state.cache_stats
+            yield ("overpass_cache_lookups_total", "counter", "Overpass cache lookups by result", [
+                ({"result": "hit"}, stats["hits"]),
+                ({"result": "stale"}, stats.get("stale_hits", 0)),
+                ({"result": "miss"}, stats["misses"]),
+            ])
+            yield ("overpass_cache_hit_ratio", "gauge",
+                   "Fraction of Overpass cache lookups served fresh", [({}, stats["hit_ratio"])])
+            yield ("overpass_cache_containment_lookups_total", "counter",
+                   "Lookups after an exact-key miss for a cached area containing the search", [
+                       ({"result": "hit"}, stats.get("containment_hits", 0)),
+                       ({"result": "miss"}, stats.get("containment_misses", 0)),
+                   ])
+            yield ("overpass_cache_entries", "gauge",
+                   "Entries in the Overpass cache", [({}, stats["size"])])
+        if state.single_flight is not None:
+            yield ("overpass_coalesced_calls_in_flight", "gauge",
+                   "Distinct coalesced Overpass calls running", [({}, state.single_flight.in_flight())])
+            yield ("overpass_coalesced_requests_total", "counter",
+                   "Overpass calls that joined an identical call already in flight",
+                   [({}, state.single_flight.coalesced)])
+        if state.rate_limiter is not None:
+            stats = state.rate_limiter.stats()
+            yield ("rate_limit_decisions_total", "counter",
+                   "Search requests admitted or rejected by the per-client rate limiter", [
+                       ({"result": "admitted"}, stats["admitted"]),
+                       ({"result": "rejected"}, stats["rejected"]),
+                   ])
+        budget = state.upstream_budget.stats()
+        yield ("overpass_budget_slots_in_use", "gauge",
+               "Overpass queries holding an upstream budget slot", [({}, budget["active"])])
+        yield ("overpass_budget_waiting", "gauge",
+               "Overpass queries waiting for an upstream budget slot", [({}, budget["waiting"])])
+        yield ("overpass_budget_rejected_total", "counter",
+               "Overpass queries turned away by the upstream budget", [
+                   ({"reason": "queue_full"}, budget["rejected"]),
+                   ({"reason": "timeout"}, budget["timed_out"]),
+               ])
+        if state.refresher is not None:
+            yield ("cache_refreshes_in_flight", "gauge",
+                   "Background cache refreshes running", [({}, state.refresher.in_flight())])
+        yield ("overpass_server_available", "gauge",
+               "1 if the server's circuit breaker lets requests through", [
+                   ({"server": server["url"], "state": server["state"]},
+                    1 if server["available"] else 0)
+                   for server in state.health_tracker.snapshot()
+               ])
+
+    metrics.registry.add_collector(collect_components)
+    return metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown."""
+    settings = get_settings()
+    app.state.http_client = create_http_client(settings)
+    app.state.cache = create_cache(settings)
+    app.state.refresher = create_refresher(settings)
+    prefetch_task = None
+    if app.state.refresher is not None and settings.cache_prefetch_interval_seconds > 0:
+        prefetch_task = asyncio.create_task(
+            app.state.refresher.run_prefetch(settings.cache_prefetch_interval_seconds)
+        )
+    app.state.single_flight = (
+        SingleFlight() if settings.overpass_coalesce_requests else None
+    )
+    app.state.local_index = create_local_index(settings)
+    app.state.expansion_policy = create_expansion_policy(settings)
+    app.state.parse_executor = create_parse_executor(settings)
+    app.state.latency_window = LatencyWindow()
+    app.state.health_tracker = ServerHealthTracker(
+        servers=list(dict.fromkeys(
+            [settings.overpass_api_url] + RestaurantService.OVERPASS_SERVERS
+        )),
+        failure_threshold=settings.overpass_circuit_failure_threshold,
+        open_seconds=settings.overpass_circuit_open_seconds,
+        alpha=settings.overpass_health_ewma_alpha
+    )
+    app.state.rate_limiter = create_rate_limiter(settings)
+    app.state.upstream_budget = UpstreamBudget(
+        max_concurrent=settings.overpass_max_concurrent_requests,
+        max_queued=settings.overpass_max_queued_requests,
+        queue_timeout=settings.overpass_queue_timeout_seconds
+    )
+    app.state.ingester = None
+    app.state.metrics = create_metrics(app.state)
+    ingest_task = None
+    if settings.ingest_areas:
+        # The ingester fetches through a service sharing the pool, mirrors
+        # and health tracking of request handling
+        app.state.ingester = AreaIngester(
+            [ServiceArea(*area) for area in settings.ingest_areas],
+            create_restaurant_service(app.state, settings).fetch_area,
+            cell_size=settings.ingest_cell_size_degrees,
+            tile_size=settings.ingest_tile_size_degrees,
+            update_overlap_seconds=settings.ingest_update_overlap_seconds,
+            full_refresh_seconds=settings.ingest_full_refresh_seconds
+        )
+        ingest_task = asyncio.create_task(
+            app.state.ingester.run(settings.ingest_interval_seconds)
+        )
+    try:
+        yield
+    finally:
+        if ingest_task is not None:
+            ingest_task.cancel()
+            await asyncio.gather(ingest_task, return_exceptions=True)
+        if prefetch_task is not None:
+            prefetch_task.cancel()
+            await asyncio.gather(prefetch_task, return_exceptions=True)
+        if app.state.refresher is not None:
+            await app.state.refresher.close()
+        await app.state.http_client.aclose()
+        if app.state.parse_executor is not None:
+            app.state.parse_executor.shutdown(wait=False, cancel_futures=True)
+        if app.state.cache is not None:
+            app.state.cache.close()
+
 
 app = FastAPI(
     title="What's for Dinner API",
     description="API for meal planning and recipe suggestions",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS to allow requests from Angular frontend
@@ -24,6 +305,193 @@ app.add_middleware(
 )
 
 
+def create_restaurant_service(state: State, settings: Settings) -> RestaurantService:
+    """Create a RestaurantService wired to the shared resources in app state."""
+    return RestaurantService(
+        overpass_url=settings.overpass_api_url,
+        client=state.http_client,
+        cache=state.cache,
+        cache_cell_size=settings.cache_cell_size_degrees,
+        cache_radius_bucket=settings.cache_radius_bucket_meters,
+        single_flight=state.single_flight,
+        fetch_mode=settings.overpass_fetch_mode,
+        hedge_delay=settings.overpass_hedge_delay_seconds,
+        hedge_percentile=settings.overpass_hedge_percentile,
+        latency_window=state.latency_window,
+        health_tracker=state.health_tracker,
+        local_index=state.local_index,
+        result_cap=settings.overpass_result_cap,
+        refresher=state.refresher,
+        ingester=state.ingester,
+        metrics=state.metrics,
+        upstream_budget=state.upstream_budget,
+        tile_radius_threshold=settings.overpass_tile_radius_threshold_meters,
+        tile_size=settings.overpass_tile_size_degrees,
+        max_tiles=settings.overpass_max_tiles,
+        tile_concurrency=settings.overpass_tile_max_concurrency,
+        expansion_policy=state.expansion_policy,
+        parse_executor=state.parse_executor,
+        parse_offload_bytes=settings.parse_offload_threshold_bytes,
+        timeout=settings.http_timeout_seconds
+    )
+
+
+def client_key(http_request: Request, settings: Settings) -> str:
+    """Return the key a request is rate limited under (known API key, else client address)."""
+    # Unknown keys are ignored: a client could otherwise send a new key with
+    # every request to get a fresh bucket each time
+    api_key = http_request.headers.get(settings.rate_limit_client_header)
+    if api_key and api_key in settings.rate_limit_api_keys:
+        return f"key:{api_key}"
+    if http_request.client is not None:
+        return f"addr:{http_request.client.host}"
+    return "addr:unknown"
+
+
+def enforce_rate_limit(
+    http_request: Request,
+    settings: Settings,
+    searches: list[dict],
+    endpoint: str
+) -> None:
+    """
+    Charge a request's searches to its client's rate limit.
+
+    Searches are charged per upstream query rather than one by one: nearby
+    searches that a batch clusters into one Overpass query cost as much as
+    the widest of them.
+
+    Args:
+        http_request: Incoming HTTP request (gives access to shared app state)
+        settings: Application settings
+        searches: Search dictionaries with "latitude", "longitude" and
+            "radius" keys (wider searches cost more)
+        endpoint: Endpoint name for the request metrics
+
+    Raises:
+        HTTPException: 429 with a Retry-After header if the client is over its limit
+    """
+    limiter = http_request.app.state.rate_limiter
+    if limiter is None:
+        return
+    # The limiter charges anything above a full bucket as a full bucket, so
+    # a batch of many clusters drains the bucket rather than being refused
+    cost = sum(
+        max(
+            search_cost(searches[index]["radius"], settings.rate_limit_cost_radius_meters)
+            for index in cluster
+        )
+        for cluster in cluster_searches(searches, settings.batch_cluster_cell_size_degrees)
+    )
+    wait = limiter.acquire(client_key(http_request, settings), cost)
+    if wait > 0:
+        http_request.app.state.metrics.requests.inc(endpoint, "RATE_LIMITED")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(min(wait, 3600)))}
+        )
+
+
+def request_deadline(http_request: Request, settings: Settings) -> Deadline:
+    """
+    Return the deadline a request must be answered by.
+
+    Clients can shorten the default request_timeout_seconds (never extend
+    it) with the request_timeout_header, in seconds.
+
+    Raises:
+        HTTPException: 400 if the header is not a positive number
+    """
+    seconds = settings.request_timeout_seconds
+    header = http_request.headers.get(settings.request_timeout_header)
+    if header is not None:
+        try:
+            requested = float(header)
+        except ValueError:
+            requested = math.nan
+        if not requested > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{settings.request_timeout_header} must be a positive number of seconds"
+            )
+        seconds = min(seconds, requested)
+    return Deadline(seconds)
+
+
+async def wait_for_disconnect(http_request: Request) -> None:
+    """Return once the client of a request (whose body has been read) disconnects."""
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_for_request(http_request: Request, deadline: Deadline, work: Awaitable[T]) -> T:
+    """
+    Run a search for a request, giving up when the deadline passes or the client leaves.
+
+    The search runs as a task with deadline as its current deadline (see
+    services.deadline), and is cancelled when it is no longer wanted so it
+    stops holding upstream slots and connections.
+
+    Raises:
+        DeadlineExceededError: If the deadline passed first
+        ClientDisconnectedError: If the client disconnected first
+    """
+    with deadline_scope(deadline):
+        search = asyncio.ensure_future(work)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(http_request))
+    try:
+        done, _ = await asyncio.wait(
+            {search, disconnect},
+            timeout=deadline.remaining(),
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        for task in (search, disconnect):
+            task.cancel()
+        await asyncio.gather(search, disconnect, return_exceptions=True)
+
+    if search in done:
+        return search.result()
+    if disconnect in done:
+        raise ClientDisconnectedError("Client disconnected")
+    raise DeadlineExceededError("Request deadline exceeded")
+
+
+def restaurant_payload(restaurant: Union[RestaurantRecord, dict]) -> dict:
+    """Return the Restaurant response fields for one service result."""
+    if isinstance(restaurant, RestaurantRecord):
+        # Built by the service from checked data, so skip model validation
+        return restaurant.as_response()
+    return Restaurant(
+        name=restaurant.get("name", "Unknown"),
+        place_id=restaurant.get("place_id", ""),
+        vicinity=restaurant.get("vicinity", ""),
+        rating=restaurant.get("rating"),
+        types=restaurant.get("types", []),
+        user_ratings_total=restaurant.get("user_ratings_total"),
+        price_level=restaurant.get("price_level"),
+        opening_hours=restaurant.get("opening_hours"),
+        distance_m=restaurant.get("distance_m")
+    ).model_dump()
+
+
+def search_response_payload(result: dict) -> dict:
+    """Convert a RestaurantService result dictionary into RestaurantSearchResponse fields."""
+    restaurants = [restaurant_payload(r) for r in result.get("results", [])]
+
+    return {
+        "restaurants": restaurants,
+        "status": result.get("status", "OK"),
+        "total_results": len(restaurants),
+        "next_cursor": (
+            str(result["next_offset"]) if result.get("next_offset") is not None else None
+        ),
+        "stale": result.get("stale", False),
+        "partial": result.get("partial", False),
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint returning a welcome message."""
@@ -36,69 +504,256 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(http_request: Request):
+    """Return search, upstream and cache metrics in the Prometheus text format."""
+    state = http_request.app.state
+    if state.cache is not None:
+        state.cache_stats = await read_cache_stats(state.cache)
+    return PlainTextResponse(
+        http_request.app.state.metrics.registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/api/restaurants/cache/stats")
+async def cache_stats(http_request: Request):
+    """Return hit/miss statistics for the Overpass result cache."""
+    cache = http_request.app.state.cache
+    if cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        **(await read_cache_stats(cache)),
+        "refresh": http_request.app.state.refresher.stats()
+    }
+
+
+@app.get("/api/restaurants/ingest/stats")
+async def ingest_stats(http_request: Request):
+    """Return the state of background service-area ingestion."""
+    ingester = http_request.app.state.ingester
+    if ingester is None:
+        return {"enabled": False}
+    return {"enabled": True, **ingester.stats()}
+
+
+@app.get("/api/overpass/health")
+async def overpass_health(http_request: Request):
+    """Return the health and circuit breaker state of each Overpass server."""
+    return {
+        "servers": http_request.app.state.health_tracker.snapshot(),
+        "budget": http_request.app.state.upstream_budget.stats(),
+    }
+
+
 @app.post("/api/restaurants/search", response_model=RestaurantSearchResponse)
-async def search_restaurants(request: RestaurantSearchRequest):
+async def search_restaurants(request: RestaurantSearchRequest, http_request: Request):
     """
     Search for nearby restaurants based on location and preferences.
 
     Args:
         request: Restaurant search request with latitude, longitude, preferences, and radius
+        http_request: Incoming HTTP request (gives access to shared app state)
 
     Returns:
-        RestaurantSearchResponse with list of restaurants and status
+        RestaurantSearchResponse with list of restaurants and status (serialized
+        directly with orjson; the model documents the shape)
 
     Raises:
-        HTTPException: 500 if service error occurs
+        HTTPException: 400 for an invalid deadline header, 429 if the client
+            is over its rate limit, 503 if the upstream request budget is
+            exhausted, 504 if the request deadline passes, 499 if the client
+            disconnects, 500 if service error occurs
     """
-    try:
-        # Get settings
-        settings = get_settings()
-
-        # Create restaurant service
-        service = RestaurantService(overpass_url=settings.overpass_api_url)
-
-        # Search for restaurants
-        result = await service.search_nearby_restaurants(
-            latitude=request.latitude,
-            longitude=request.longitude,
-            radius=request.radius,
-            preferences=request.preferences
-        )
+    metrics = http_request.app.state.metrics
+    with metrics.track_request("search"):
+        try:
+            # Get settings
+            settings = get_settings()
+            deadline = request_deadline(http_request, settings)
+            enforce_rate_limit(http_request, settings, [request.model_dump()], "search")
+
+            # Create restaurant service backed by the shared connection pool
+            service = create_restaurant_service(http_request.app.state, settings)
+
+            # Search for restaurants (abandoned at the deadline or on disconnect)
+            search = service.search_nearby_restaurants(
+                latitude=request.latitude,
+                longitude=request.longitude,
+                radius=request.radius,
+                preferences=request.preferences,
+                limit=request.limit,
+                offset=int(request.cursor) if request.cursor else 0
+            )
+            result = await run_for_request(http_request, deadline, search)
+            metrics.requests.inc("search", result.get("status", "OK"))
+
+            # Check for errors
+            if result.get("status") == "ERROR":
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Restaurant search failed: {result.get('error', 'Unknown error')}"
+                )
 
-        # Check for errors
-        if result.get("status") == "ERROR":
+            with metrics.stage_seconds.time("serialize"):
+                return ORJSONResponse(search_response_payload(result))
+
+        except HTTPException:
+            # Re-raise HTTP exceptions
+            raise
+        except UpstreamBusyError as e:
+            # Fail fast rather than queueing more load onto Overpass
+            metrics.requests.inc("search", "BUSY")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            ) from e
+        except DeadlineExceededError as e:
+            metrics.requests.inc("search", "TIMEOUT")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Search did not finish before the request deadline"
+            ) from e
+        except ClientDisconnectedError as e:
+            # Nobody will read the response; nginx's code for this case
+            metrics.requests.inc("search", "CANCELLED")
+            raise HTTPException(status_code=499, detail="Client closed request") from e
+        except Exception as e:
+            # Handle unexpected errors
+            metrics.requests.inc("search", "EXCEPTION")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Restaurant search failed: {result.get('error', 'Unknown error')}"
-            )
+                detail=f"An unexpected error occurred: {str(e)}"
+            ) from e
 
-        # Parse results into Restaurant models
-        restaurants = [
-            Restaurant(
-                name=r.get("name", "Unknown"),
-                place_id=r.get("place_id", ""),
-                vicinity=r.get("vicinity", ""),
-                rating=r.get("rating"),
-                types=r.get("types", []),
-                user_ratings_total=r.get("user_ratings_total"),
-                price_level=r.get("price_level"),
-                opening_hours=r.get("opening_hours")
-            )
-            for r in result.get("results", [])
-        ]
 
-        return RestaurantSearchResponse(
-            restaurants=restaurants,
-            status=result.get("status", "OK"),
-            total_results=len(restaurants)
-        )
+@app.post("/api/restaurants/search/batch")
+async def search_restaurants_batch(
+    request: RestaurantBatchSearchRequest,
+    http_request: Request
+) -> StreamingResponse:
+    """
+    Search for restaurants around many locations in one call.
 
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        # Handle unexpected errors
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}"
-        ) from e
+    Nearby locations share one Overpass query. Results are streamed as
+    newline-delimited JSON (one RestaurantBatchSearchResult per line) in
+    the order they complete; use 'index' to match them to the request.
+
+    Args:
+        request: Batch of restaurant search requests
+        http_request: Incoming HTTP request (gives access to shared app state)
+
+    Returns:
+        StreamingResponse of application/x-ndjson lines
+
+    Raises:
+        HTTPException: 400 for an invalid deadline header, 429 if the client
+            is over its rate limit
+    """
+    settings = get_settings()
+    deadline = request_deadline(http_request, settings)
+    searches = [
+        {
+            "latitude": search.latitude,
+            "longitude": search.longitude,
+            "radius": search.radius,
+            "preferences": search.preferences,
+            "limit": search.limit,
+            "offset": int(search.cursor) if search.cursor else 0,
+        }
+        for search in request.searches
+    ]
+    enforce_rate_limit(http_request, settings, searches, "batch")
+    service = create_restaurant_service(http_request.app.state, settings)
+
+    metrics = http_request.app.state.metrics
+
+    async def stream_results():
+        # Clusters still waiting on Overpass at the deadline get an error result
+        with metrics.track_request("batch"), deadline_scope(deadline):
+            async for index, result in service.search_batch(
+                searches,
+                cluster_cell_size=settings.batch_cluster_cell_size_degrees,
+                max_concurrency=settings.batch_max_concurrency
+            ):
+                metrics.requests.inc("batch", result.get("status", "OK"))
+                line = {
+                    **search_response_payload(result),
+                    "index": index,
+                    "error": result.get("error"),
+                }
+                yield orjson.dumps(line) + b"\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/api/restaurants/search/stream")
+async def search_restaurants_stream(
+    request: RestaurantSearchRequest,
+    http_request: Request,
+    stream_format: str = Query(
+        "ndjson",
+        alias="format",
+        pattern="^(ndjson|sse)$",
+        description="Stream encoding: newline-delimited JSON or Server-Sent Events"
+    )
+) -> StreamingResponse:
+    """
+    Search for nearby restaurants, streaming each restaurant as soon as it is found.
+
+    Emits one "restaurant" event per Restaurant, then a "summary" event
+    (RestaurantStreamSummary) carrying status and total_results. Cached
+    results arrive nearest-first immediately; upstream results arrive in the
+    order Overpass returns them.
+
+    Args:
+        request: Restaurant search request with latitude, longitude, preferences, and radius
+        http_request: Incoming HTTP request (gives access to shared app state)
+        stream_format: "ndjson" (one {"event", "data"} object per line) or "sse"
+
+    Returns:
+        StreamingResponse of application/x-ndjson lines or text/event-stream events
+
+    Raises:
+        HTTPException: 400 for an invalid deadline header, 429 if the client
+            is over its rate limit
+    """
+    settings = get_settings()
+    deadline = request_deadline(http_request, settings)
+    enforce_rate_limit(http_request, settings, [request.model_dump()], "stream")
+    service = create_restaurant_service(http_request.app.state, settings)
+
+    metrics = http_request.app.state.metrics
+
+    async def stream_events():
+        # The response is cancelled if the client disconnects; at the deadline
+        # the upstream fetch gives up and an error summary is sent
+        with metrics.track_request("stream"), deadline_scope(deadline):
+            async for event in service.stream_nearby_restaurants(
+                latitude=request.latitude,
+                longitude=request.longitude,
+                radius=request.radius,
+                preferences=request.preferences,
+                limit=request.limit
+            ):
+                if event["event"] == "restaurant":
+                    data = orjson.dumps(restaurant_payload(event["restaurant"])).decode()
+                else:
+                    metrics.requests.inc("stream", event["status"])
+                    fields = {k: v for k, v in event.items() if k != "event"}
+                    data = RestaurantStreamSummary(**fields).model_dump_json()
+
+                if stream_format == "sse":
+                    yield f"event: {event['event']}\ndata: {data}\n\n"
+                else:
+                    yield f'{{"event": "{event["event"]}", "data": {data}}}\n'
+
+    if stream_format == "sse":
+        return StreamingResponse(
+            stream_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
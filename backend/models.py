@@ -35,6 +35,19 @@ class RestaurantSearchRequest(BaseModel):
         description="Search radius in meters (Google Places API limit: 50000)",
         examples=[1500]
     )
+    limit: int = Field(
+        default=10,
+        ge=1,
+        le=50,
+        description="Maximum number of restaurants to return (nearest first)",
+        examples=[10]
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        pattern=r"^\d+$",
+        description="Opaque cursor from a previous response's 'next_cursor' to fetch the next page",
+        examples=[None]
+    )
 
 
 class Restaurant(BaseModel):
@@ -51,6 +64,10 @@ class Restaurant(BaseModel):
         None,
         description="Opening hours (e.g., 'Mo-Fr 09:00-18:00')"
     )
+    distance_m: Optional[float] = Field(
+        None,
+        description="Distance from the search location in meters"
+    )
 
 
 class RestaurantSearchResponse(BaseModel):
@@ -68,3 +85,70 @@ class RestaurantSearchResponse(BaseModel):
         default=0,
         description="Total number of results found"
     )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Cursor for the next page of results (None on the last page)"
+    )
+    stale: bool = Field(
+        default=False,
+        description="True if served from an expired cache entry that is being refreshed"
+    )
+    partial: bool = Field(
+        default=False,
+        description="True if some restaurants may be missing (part of a wide search area "
+        "could not be fetched, or Overpass cut the response off at the result cap)"
+    )
+
+
+class RestaurantBatchSearchRequest(BaseModel):
+    """Request model for searching restaurants around many locations."""
+
+    searches: list[RestaurantSearchRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Individual restaurant searches (e.g., one per delivery point)"
+    )
+
+
+class RestaurantBatchSearchResult(RestaurantSearchResponse):
+    """One streamed result of a batch search."""
+
+    index: int = Field(
+        ...,
+        description="Position of the search in the batch request"
+    )
+    error: Optional[str] = Field(
+        default=None,
+        description="Error message when status is ERROR"
+    )
+
+
+class RestaurantStreamSummary(BaseModel):
+    """Final event of a streamed restaurant search."""
+
+    status: str = Field(
+        ...,
+        description="Status of the search (OK, ZERO_RESULTS, ERROR)"
+    )
+    total_results: int = Field(
+        default=0,
+        description="Number of restaurants streamed"
+    )
+    source: str = Field(
+        ...,
+        description="Where the results came from (cache, local, index, tiles, overpass)"
+    )
+    stale: bool = Field(
+        default=False,
+        description="True if served from an expired cache entry that is being refreshed"
+    )
+    partial: bool = Field(
+        default=False,
+        description="True if some restaurants may be missing (part of a wide search area "
+        "could not be fetched, or Overpass cut the response off at the result cap)"
+    )
+    error: Optional[str] = Field(
+        default=None,
+        description="Error message when status is ERROR"
+    )
@@ -0,0 +1,195 @@
+"""
+Admission control: per-client rate limiting and a global upstream request budget.
+
+Both live in process memory, so with several workers each one enforces
+the limits separately (divide the configured limits by the worker count).
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from services.deadline import DeadlineExceededError
+
+
+class UpstreamBusyError(Exception):
+    """Raised when the upstream request budget is exhausted and the wait queue is full."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        # Suggested delay before retrying, in seconds
+        self.retry_after = retry_after
+
+
+def search_cost(radius: float, unit_radius: float) -> float:
+    """
+    Estimate the upstream cost of a search in rate limit tokens.
+
+    Overpass work grows with the searched area, so searches up to
+    unit_radius cost one token and wider ones cost (radius / unit_radius)^2.
+    """
+    return max(1.0, (radius / unit_radius) ** 2)
+
+
+class ClientRateLimiter:
+    """
+    Token bucket per client key.
+
+    Every client starts with a full bucket of `capacity` tokens that refills
+    at `refill_per_second`. A request is admitted when its cost can be
+    taken from the bucket. Costs above capacity are charged as capacity, so
+    a client with a full bucket can always make the most expensive request.
+    Only the max_clients most recently seen clients are remembered; a
+    forgotten client starts over with a full bucket.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_clients = max_clients
+        self._clock = clock
+        # client -> (tokens, time of last update), least recently seen first
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self, client: str, cost: float = 1.0) -> float:
+        """
+        Take cost tokens from a client's bucket if it holds enough.
+
+        Args:
+            client: Client key (API key or address)
+            cost: Tokens the request costs (see search_cost)
+
+        Returns:
+            0.0 if the request is admitted, otherwise the seconds until the
+            bucket will hold enough tokens
+        """
+        cost = min(cost, self.capacity)
+        now = self._clock()
+        bucket = self._buckets.pop(client, None)
+        if bucket is None:
+            tokens = self.capacity
+        else:
+            tokens, updated = bucket
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.0
+            self.admitted += 1
+        else:
+            wait = (
+                (cost - tokens) / self.refill_per_second
+                if self.refill_per_second > 0 else math.inf
+            )
+            self.rejected += 1
+
+        # Re-inserting keeps the dict ordered by last use
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            del self._buckets[next(iter(self._buckets))]
+        return wait
+
+    def stats(self) -> dict:
+        """Return admission counters."""
+        return {
+            "clients": len(self._buckets),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamBudget:
+    """
+    Global limit on concurrent upstream (Overpass) queries.
+
+    Up to max_concurrent queries run at once. Further callers wait in a
+    queue of at most max_queued; a caller finding the queue full, or
+    waiting longer than queue_timeout seconds, gets UpstreamBusyError
+    straight away instead of piling more load onto the shared quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queued: int = 0,
+        queue_timeout: Optional[float] = None
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold one upstream slot for the duration of a block.
+
+        Args:
+            timeout: Optional limit on the wait, below the queue timeout
+                (e.g. the time left before a request deadline)
+
+        Raises:
+            UpstreamBusyError: If the queue is full or the wait times out
+            DeadlineExceededError: If timeout, rather than the queue
+                timeout, ran out first
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queued:
+                self.rejected += 1
+                raise UpstreamBusyError("Too many upstream requests in progress")
+            self.waiting += 1
+            self.queued += 1
+            caller_bound = timeout is not None and (
+                self.queue_timeout is None or timeout < self.queue_timeout
+            )
+            try:
+                wait = timeout if caller_bound else self.queue_timeout
+                await asyncio.wait_for(self._semaphore.acquire(), wait)
+            except asyncio.TimeoutError:
+                if caller_bound:
+                    # The request ran out of time; the budget itself is not
+                    # the problem, so this is not counted as a queue timeout
+                    raise DeadlineExceededError("Request deadline exceeded") from None
+                self.timed_out += 1
+                raise UpstreamBusyError(
+                    "Timed out waiting for an upstream request slot"
+                ) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Return current usage and admission counters."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
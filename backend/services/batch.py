@@ -0,0 +1,43 @@
+"""
+Helpers for batched restaurant searches over many locations.
+"""
+from collections import defaultdict
+
+from services.geo import bounding_box, grid_cell
+
+
+def cluster_searches(searches: list[dict], cell_size: float) -> list[list[int]]:
+    """
+    Group searches whose locations fall in the same grid cell.
+
+    Args:
+        searches: Search dictionaries with "latitude" and "longitude" keys
+        cell_size: Cluster cell size in degrees
+
+    Returns:
+        Lists of indices into searches, one list per cluster
+    """
+    clusters: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for index, search in enumerate(searches):
+        cell = grid_cell(search["latitude"], search["longitude"], cell_size)
+        clusters[cell].append(index)
+    return list(clusters.values())
+
+
+def cluster_bbox(searches: list[dict]) -> tuple[float, float, float, float]:
+    """
+    Return the (south, west, north, east) box covering every search circle.
+
+    Args:
+        searches: Search dictionaries with "latitude", "longitude" and "radius" keys
+    """
+    boxes = [
+        bounding_box(search["latitude"], search["longitude"], search["radius"])
+        for search in searches
+    ]
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
@@ -0,0 +1,516 @@
+"""
+Response cache for Overpass results.
+
+Results are keyed on a quantized location cell plus a radius bucket, so
+near-identical searches (same neighbourhood, similar radius) share a
+single upstream query. Entries can also record the circle their elements
+completely cover, so a search inside a cached circle (e.g. a narrower
+radius at the same spot) is answered from it after an exact-key miss.
+"""
+import json
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from services.geo import METERS_PER_DEGREE, bucket_radius, circle_contains, grid_cell
+
+
+def make_cache_key(
+    latitude: float,
+    longitude: float,
+    radius: int,
+    cell_size: float,
+    radius_bucket: int
+) -> str:
+    """
+    Build a cache key for a search.
+
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+        radius: Search radius in meters
+        cell_size: Grid cell size in degrees
+        radius_bucket: Radius bucket size in meters
+
+    Returns:
+        Key of the form "<row>:<col>:<radius bucket>"
+    """
+    row, col = grid_cell(latitude, longitude, cell_size)
+    return f"{row}:{col}:{bucket_radius(radius, radius_bucket)}"
+
+
+class CacheLookup(NamedTuple):
+    """Result of a cache lookup that may return expired (stale) entries."""
+
+    elements: list[dict]
+    stale: bool
+    # Seconds until the entry expires (negative once it is stale)
+    expires_in: float
+
+
+class CachedArea(NamedTuple):
+    """Circle for which a cache entry holds every restaurant."""
+
+    latitude: float
+    longitude: float
+    radius: float
+
+
+class CacheBackend(ABC):
+    """Interface for Overpass result caches (in-memory, persistent, ...)."""
+
+    # True if calls do blocking I/O, so async callers run them in a thread
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[list[dict]]:
+        """Return the cached elements for key, or None on a miss."""
+
+    def lookup(self, key: str) -> Optional[CacheLookup]:
+        """
+        Return the entry for key, including expired entries still in the stale window.
+
+        Backends without stale-while-revalidate support only return fresh entries.
+        """
+        elements = self.get(key)
+        if elements is None:
+            return None
+        return CacheLookup(elements, stale=False, expires_in=float("inf"))
+
+    @abstractmethod
+    def set(self, key: str, elements: list[dict], area: Optional[CachedArea] = None) -> None:
+        """Store the elements for key, with the area they completely cover if known."""
+
+    def find_containing(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float
+    ) -> Optional[list[dict]]:
+        """
+        Return the elements of a fresh entry whose area contains a search circle.
+
+        The smallest containing area is used. Elements outside the search
+        circle are included; callers filter by distance. Backends without
+        an area index always return None.
+        """
+        return None
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Return cache statistics (hits, misses, size, ...)."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+def containment_stats(hits: int, misses: int) -> dict:
+    """Return the containment lookup counters reported by cache stats()."""
+    lookups = hits + misses
+    return {
+        "containment_hits": hits,
+        "containment_misses": misses,
+        "containment_hit_ratio": hits / lookups if lookups else 0.0,
+    }
+
+
+class InMemoryCache(CacheBackend):
+    """
+    Process-local cache with per-entry TTL and LRU eviction.
+
+    Expired entries are kept for another stale_seconds, during which
+    lookup() still returns them marked as stale.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 1024,
+        stale_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        # key -> (expires_at, elements, area), ordered from least to most recently used
+        self._entries: OrderedDict[
+            str, tuple[float, list[dict], Optional[CachedArea]]
+        ] = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.containment_hits = 0
+        self.containment_misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        result = self._lookup(key)
+        if result is None or result.stale:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result.elements
+
+    def lookup(self, key: str) -> Optional[CacheLookup]:
+        result = self._lookup(key)
+        if result is None:
+            self.misses += 1
+        elif result.stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _lookup(self, key: str) -> Optional[CacheLookup]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, elements, _ = entry
+        expires_in = expires_at - self._clock()
+        if expires_in <= -self.stale_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return CacheLookup(elements, stale=expires_in <= 0, expires_in=expires_in)
+
+    def set(self, key: str, elements: list[dict], area: Optional[CachedArea] = None) -> None:
+        self._entries[key] = (self._clock() + self.ttl_seconds, elements, area)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def find_containing(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float
+    ) -> Optional[list[dict]]:
+        # A linear scan: it only runs after an exact-key miss, which
+        # otherwise costs an upstream query, and the cache is bounded
+        now = self._clock()
+        best_key, best_radius = None, math.inf
+        for key, (expires_at, _, area) in self._entries.items():
+            if (
+                area is None
+                or expires_at <= now
+                or not radius <= area.radius < best_radius
+            ):
+                continue
+            if circle_contains(*area, latitude, longitude, radius):
+                best_key, best_radius = key, area.radius
+
+        if best_key is None:
+            self.containment_misses += 1
+            return None
+        self.containment_hits += 1
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            **containment_stats(self.containment_hits, self.containment_misses),
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Persistent cache in an SQLite database, shared by all worker processes.
+
+    The database runs in WAL mode so readers in one worker never block on a
+    writer in another, and entries survive restarts and deploys. Entries
+    expire after the TTL (then remain available to lookup() as stale for
+    stale_seconds) and the least recently used ones are evicted once the
+    stored payloads exceed max_bytes. Timestamps use wall-clock time so
+    every process agrees on expiry.
+
+    Calls block on disk I/O, so async callers run them in a thread; the
+    connection is shared, so a lock serializes them. A hit only records
+    its access time (for LRU eviction) if the recorded one is older than
+    touch_interval_seconds, so hot entries are not rewritten on every
+    read. When another process holds the write lock for longer than
+    busy_timeout_seconds, writes (and access time updates) are skipped and
+    lookups that cannot read count as misses, rather than stalling the
+    search.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 600.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        stale_seconds: float = 0.0,
+        busy_timeout_seconds: float = 0.25,
+        touch_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.touch_interval_seconds = touch_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.containment_hits = 0
+        self.containment_misses = 0
+        self.evictions = 0
+        self.lock_errors = 0
+
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout_seconds, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS overpass_cache (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                center_lat REAL,
+                center_lon REAL,
+                radius REAL
+            )
+            """
+        )
+        # Databases created before entries recorded their area
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(overpass_cache)")}
+        for column in ("center_lat", "center_lon", "radius"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE overpass_cache ADD COLUMN {column} REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS overpass_cache_lru ON overpass_cache (last_access)"
+        )
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        with self._lock:
+            result = self._locked_lookup(key, stale_seconds=0.0)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return result.elements
+
+    def lookup(self, key: str) -> Optional[CacheLookup]:
+        with self._lock:
+            result = self._locked_lookup(key, stale_seconds=self.stale_seconds)
+            if result is None:
+                self.misses += 1
+            elif result.stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return result
+
+    def _locked_lookup(self, key: str, stale_seconds: float) -> Optional[CacheLookup]:
+        """_lookup, with a database locked by another process counting as a miss."""
+        try:
+            return self._lookup(key, stale_seconds)
+        except sqlite3.OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            self.lock_errors += 1
+            return None
+
+    def _lookup(self, key: str, stale_seconds: float) -> Optional[CacheLookup]:
+        now = self._clock()
+        row = self._conn.execute(
+            """
+            SELECT expires_at, last_access, payload FROM overpass_cache
+            WHERE key = ? AND expires_at > ?
+            """,
+            (key, now - stale_seconds)
+        ).fetchone()
+        if row is None:
+            return None
+
+        expires_at, last_access, payload = row
+        if last_access < now - self.touch_interval_seconds:
+            try:
+                self._conn.execute(
+                    "UPDATE overpass_cache SET last_access = ? WHERE key = ?", (now, key)
+                )
+            except sqlite3.OperationalError as e:
+                # Only the LRU order suffers; the hit is still good
+                if not _is_lock_error(e):
+                    raise
+                self.lock_errors += 1
+        return CacheLookup(
+            json.loads(zlib.decompress(payload)),
+            stale=expires_at <= now,
+            expires_in=expires_at - now
+        )
+
+    def set(self, key: str, elements: list[dict], area: Optional[CachedArea] = None) -> None:
+        payload = zlib.compress(json.dumps(elements, separators=(",", ":")).encode("utf-8"))
+        now = self._clock()
+        center_lat, center_lon, radius = area if area is not None else (None, None, None)
+
+        with self._lock:
+            try:
+                self._store(key, payload, now, center_lat, center_lon, radius)
+            except sqlite3.OperationalError as e:
+                # Caching is best effort; another process holding the lock
+                # must not hold up the search that fetched the elements
+                if not _is_lock_error(e):
+                    raise
+                self.lock_errors += 1
+
+    def _store(
+        self,
+        key: str,
+        payload: bytes,
+        now: float,
+        center_lat: Optional[float],
+        center_lon: Optional[float],
+        radius: Optional[float]
+    ) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO overpass_cache
+                    (key, expires_at, last_access, size, payload, center_lat, center_lon, radius)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, now + self.ttl_seconds, now, len(payload), payload,
+                 center_lat, center_lon, radius)
+            )
+            self._conn.execute(
+                "DELETE FROM overpass_cache WHERE expires_at <= ?", (now - self.stale_seconds,)
+            )
+            self._evict_over_budget()
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def find_containing(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float
+    ) -> Optional[list[dict]]:
+        with self._lock:
+            try:
+                elements = self._find_containing(latitude, longitude, radius)
+            except sqlite3.OperationalError as e:
+                if not _is_lock_error(e):
+                    raise
+                self.lock_errors += 1
+                elements = None
+            if elements is None:
+                self.containment_misses += 1
+                return None
+            self.containment_hits += 1
+            return elements
+
+    def _find_containing(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float
+    ) -> Optional[list[dict]]:
+        # Only entries within (their radius - radius) of the search in latitude
+        # can contain it; the exact test runs here
+        rows = self._conn.execute(
+            """
+            SELECT key, center_lat, center_lon, radius FROM overpass_cache
+            WHERE center_lat BETWEEN ? - (radius - ?) / ? AND ? + (radius - ?) / ?
+                AND radius >= ? AND expires_at > ?
+            ORDER BY radius
+            """,
+            (latitude, radius, METERS_PER_DEGREE, latitude, radius, METERS_PER_DEGREE,
+             radius, self._clock())
+        ).fetchall()
+        for key, *area in rows:
+            if not circle_contains(*area, latitude, longitude, radius):
+                continue
+            result = self._lookup(key, stale_seconds=0.0)
+            if result is not None:
+                return result.elements
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM overpass_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM overpass_cache"
+            ).fetchone()
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": "sqlite",
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            **containment_stats(self.containment_hits, self.containment_misses),
+            "evictions": self.evictions,
+            "lock_errors": self.lock_errors,
+            "size": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict_over_budget(self) -> None:
+        """Delete least recently used entries until the payloads fit max_bytes."""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM overpass_cache"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM overpass_cache ORDER BY last_access"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM overpass_cache WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+
+def _is_lock_error(error: sqlite3.OperationalError) -> bool:
+    """Return True if an SQLite error means another connection holds the lock."""
+    # Extended result codes (e.g. SQLITE_BUSY_SNAPSHOT) keep the primary code in the low byte
+    return (error.sqlite_errorcode & 0xFF) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
@@ -0,0 +1,142 @@
+"""
+Columnar candidate pipeline for restaurant ranking and filtering.
+
+Overpass elements are converted once into NumPy arrays (coordinates,
+lowercased names and interned cuisine/amenity term codes) so that
+distance, radius and preference checks run as batched array operations
+instead of per-element dictionary work.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+from services.geo import element_coordinates, haversine_m_array
+from services.preference_matcher import PreferenceMatcher
+
+
+class CandidateElements(list):
+    """
+    Element list that keeps the CandidateTable built from it.
+
+    Lists of this type are what the service stores in the cache, so with an
+    in-memory backend every hit gets the same list back and the table is
+    built once per fetched entry instead of on every search. The list must
+    not be modified once its table is built.
+    """
+
+    __slots__ = ("table",)
+
+    def __init__(self, elements: Iterable[dict] = ()):
+        super().__init__(elements)
+        self.table: Optional[CandidateTable] = None
+
+
+def candidate_table(elements: list[dict]) -> "CandidateTable":
+    """Return the CandidateTable of elements, reusing the one already built for them."""
+    if not isinstance(elements, CandidateElements):
+        return CandidateTable(elements)
+    if elements.table is None:
+        elements.table = CandidateTable(elements)
+    return elements.table
+
+
+class CandidateTable:
+    """
+    Struct-of-arrays view over the named nodes/ways of an Overpass result.
+
+    Attributes:
+        elements: Candidate elements, row-aligned with the arrays
+        lat, lon: Coordinates (NaN when an element has no location)
+        names: Lowercased names
+        vocabulary: Interned lowercased type terms (amenity and cuisines)
+        term_codes: Flattened vocabulary codes of every element's terms
+        term_owner: Row index owning each entry of term_codes
+    """
+
+    def __init__(self, elements: Iterable[dict]):
+        self.elements = [
+            e for e in elements
+            if e.get("type") in ("node", "way") and "name" in e.get("tags", {})
+        ]
+        size = len(self.elements)
+        self.lat = np.full(size, np.nan)
+        self.lon = np.full(size, np.nan)
+
+        names = []
+        vocabulary: dict[str, int] = {}
+        codes = []
+        owners = []
+        for row, element in enumerate(self.elements):
+            tags = element["tags"]
+            coordinates = element_coordinates(element)
+            if coordinates is not None:
+                self.lat[row], self.lon[row] = coordinates
+            names.append(tags["name"].lower())
+
+            terms = [tags["amenity"]] if tags.get("amenity") else []
+            if tags.get("cuisine"):
+                terms.extend(tags["cuisine"].split(";"))
+            for term in terms:
+                codes.append(vocabulary.setdefault(term.lower(), len(vocabulary)))
+                owners.append(row)
+
+        self.names = np.array(names, dtype=str)
+        self.vocabulary = list(vocabulary)
+        self.term_codes = np.array(codes, dtype=np.intp)
+        self.term_owner = np.array(owners, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def preference_mask(self, preferences: Optional[list[str]]) -> np.ndarray:
+        """
+        Return a boolean mask of rows matching any preference.
+
+        Uses the same PreferenceMatcher as
+        RestaurantService._matches_preferences: a preference (or synonym)
+        matches when it is a substring of a cuisine, a type or the name (all
+        case-insensitive). Terms are checked once per distinct vocabulary
+        entry rather than once per element.
+        """
+        size = len(self)
+        if not preferences:
+            return np.ones(size, dtype=bool)
+
+        matcher = PreferenceMatcher.for_preferences(tuple(preferences))
+
+        term_matches = np.array(
+            [matcher.matches_text(term) for term in self.vocabulary], dtype=bool
+        )
+        mask = np.zeros(size, dtype=bool)
+        if self.term_codes.size:
+            mask[self.term_owner[term_matches[self.term_codes]]] = True
+
+        if size:
+            for pattern in matcher.patterns:
+                mask |= np.char.find(self.names, pattern) >= 0
+        return mask
+
+    def rank(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        preferences: Optional[list[str]] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Select rows within the radius that match the preferences, nearest first.
+
+        Rows without coordinates cannot be placed, so they are kept after all
+        located rows in their original order.
+
+        Returns:
+            (row indices, distances in meters with NaN for unlocated rows)
+        """
+        distances = haversine_m_array(latitude, longitude, self.lat, self.lon)
+        # NaN > radius is False, so unlocated rows survive this mask
+        mask = ~(distances > radius) & self.preference_mask(preferences)
+        rows = np.flatnonzero(mask)
+
+        sort_key = np.where(np.isnan(distances[rows]), np.inf, distances[rows])
+        rows = rows[np.argsort(sort_key, kind="stable")]
+        return rows, distances[rows]
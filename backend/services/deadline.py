@@ -0,0 +1,86 @@
+"""
+Per-request deadlines.
+
+A request's deadline is set for the code handling it with
+deadline_scope(); anything it awaits (including tasks it starts) can read
+it with current_deadline() and limit its own timeouts to the time left,
+so a slow first attempt eats into the budget of the retries after it.
+"""
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's deadline passes before its work is done."""
+
+
+class Deadline:
+    """A point in time by which a request must be answered."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline (0 once it has passed)."""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def extend(self, other: Optional["Deadline"]) -> None:
+        """Move the deadline out to other's if that is later (None: no deadline)."""
+        self.expires_at = max(self.expires_at, math.inf if other is None else other.expires_at)
+
+    def timeout(self, limit: float) -> float:
+        """
+        Return the time an operation may take: limit, cut down to the time left.
+
+        Raises:
+            DeadlineExceededError: If the deadline has already passed
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError("Request deadline exceeded")
+        return min(limit, remaining)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the request being handled, if any."""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make deadline the current deadline for the duration of a block."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Exited from another context (e.g. an abandoned async generator
+            # closed by the event loop), so there is nothing to restore
+            pass
+
+
+def remaining_timeout(limit: float) -> float:
+    """
+    Return limit, cut down to the time left before the current deadline.
+
+    Raises:
+        DeadlineExceededError: If the current deadline has already passed
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return limit
+    return deadline.timeout(limit)
+
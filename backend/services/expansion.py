@@ -0,0 +1,46 @@
+"""
+Expanding-radius search policy.
+
+Only the nearest few restaurants are returned per search, so in dense
+areas most of a full-radius fetch is thrown away. An adaptive search
+fetches a small disc first and widens it geometrically (one outer ring
+per step) until enough results have been collected or the requested
+radius is reached.
+"""
+import math
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ExpansionPolicy:
+    """
+    Radii an adaptive search steps through.
+
+    The first step searches initial_radius; each later step multiplies the
+    radius by growth_factor, and the last step is always the requested
+    radius.
+    """
+
+    initial_radius: int = 400
+    growth_factor: float = 2.0
+
+    def __post_init__(self):
+        if self.initial_radius <= 0:
+            raise ValueError("initial_radius must be positive")
+        if self.growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+
+    def radii(self, radius: int) -> list[int]:
+        """
+        Return the increasing radii searched on the way to radius.
+
+        Example:
+            ExpansionPolicy(400, 2.0).radii(1500) == [400, 800, 1500]
+        """
+        steps = []
+        step = self.initial_radius
+        while step < radius:
+            steps.append(step)
+            step = math.ceil(step * self.growth_factor)
+        steps.append(radius)
+        return steps
@@ -0,0 +1,183 @@
+"""
+Geographic helpers for quantizing search locations.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+
+# Mean Earth radius in meters
+EARTH_RADIUS_M = 6371008.8
+
+# Approximate length of one degree of latitude in meters
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def grid_cell(latitude: float, longitude: float, cell_size: float) -> tuple[int, int]:
+    """
+    Map a coordinate onto a lat/lon grid.
+
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+        cell_size: Grid cell size in degrees
+
+    Returns:
+        (row, column) index of the cell containing the coordinate
+    """
+    return math.floor(latitude / cell_size), math.floor(longitude / cell_size)
+
+
+def cell_center(cell: tuple[int, int], cell_size: float) -> tuple[float, float]:
+    """Return the (latitude, longitude) at the center of a grid cell."""
+    row, col = cell
+    return (row + 0.5) * cell_size, (col + 0.5) * cell_size
+
+
+def cell_half_diagonal(cell: tuple[int, int], cell_size: float) -> float:
+    """
+    Return the distance in meters from a cell center to its farthest corner.
+
+    Uses the cell edge closest to the equator, where longitude degrees are
+    widest, so the value is an upper bound for the whole cell.
+    """
+    row, _ = cell
+    edge_lat = min(abs(row * cell_size), abs((row + 1) * cell_size))
+    half_height = cell_size * METERS_PER_DEGREE / 2
+    half_width = half_height * math.cos(math.radians(edge_lat))
+    return math.hypot(half_height, half_width)
+
+
+def bucket_radius(radius: int, bucket_size: int) -> int:
+    """Round a radius in meters up to the next multiple of bucket_size."""
+    return max(1, math.ceil(radius / bucket_size)) * bucket_size
+
+
+def bounding_box(
+    latitude: float,
+    longitude: float,
+    radius: float
+) -> tuple[float, float, float, float]:
+    """
+    Return the (south, west, north, east) box enclosing a circle.
+
+    Args:
+        latitude: Circle center latitude
+        longitude: Circle center longitude
+        radius: Circle radius in meters
+    """
+    lat_span = radius / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_span = min(lat_span / cos_lat, 180.0)
+    return (
+        max(latitude - lat_span, -90.0),
+        max(longitude - lon_span, -180.0),
+        min(latitude + lat_span, 90.0),
+        min(longitude + lon_span, 180.0),
+    )
+
+
+def box_intersects_circle(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    latitude: float,
+    longitude: float,
+    radius: float
+) -> bool:
+    """
+    Return True if a (south, west, north, east) box overlaps a circle.
+
+    Measures to the point of the box nearest the center in latitude and
+    longitude, which is exact for boxes of a few kilometres and a close
+    approximation for larger ones.
+    """
+    nearest_lat = min(max(latitude, south), north)
+    nearest_lon = min(max(longitude, west), east)
+    return haversine_m(latitude, longitude, nearest_lat, nearest_lon) <= radius
+
+
+def split_bbox(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    tile_size: float
+) -> list[tuple[float, float, float, float]]:
+    """
+    Split a (south, west, north, east) box into tiles at most tile_size degrees on a side.
+
+    Tiles are returned row by row from the south-west corner; edge tiles
+    are clipped to the box.
+    """
+    # The epsilon keeps float noise (0.6000000000000001 / 0.01 == 60.00000000000001)
+    # from adding a sliver of an extra tile
+    rows = max(math.ceil((north - south) / tile_size - 1e-9), 1)
+    cols = max(math.ceil((east - west) / tile_size - 1e-9), 1)
+    return [
+        (
+            south + row * tile_size,
+            west + col * tile_size,
+            min(south + (row + 1) * tile_size, north),
+            min(west + (col + 1) * tile_size, east),
+        )
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two coordinates in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def circle_contains(
+    outer_latitude: float,
+    outer_longitude: float,
+    outer_radius: float,
+    latitude: float,
+    longitude: float,
+    radius: float
+) -> bool:
+    """Return True if the circle (latitude, longitude, radius) lies within the outer circle."""
+    distance = haversine_m(outer_latitude, outer_longitude, latitude, longitude)
+    return distance + radius <= outer_radius
+
+
+def haversine_m_array(
+    latitude: float,
+    longitude: float,
+    lats: np.ndarray,
+    lons: np.ndarray
+) -> np.ndarray:
+    """
+    Return haversine distances in meters from one origin to arrays of points.
+
+    NaN coordinates yield NaN distances.
+    """
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons) - math.radians(longitude)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def element_coordinates(element: dict) -> Optional[tuple[float, float]]:
+    """
+    Return the (latitude, longitude) of an OSM element.
+
+    Nodes carry "lat"/"lon" directly; ways only have coordinates when the
+    query asked for them with "out center".
+    """
+    if "lat" in element and "lon" in element:
+        return element["lat"], element["lon"]
+    center = element.get("center")
+    if center and "lat" in center and "lon" in center:
+        return center["lat"], center["lon"]
+    return None
@@ -0,0 +1,153 @@
+"""
+Background ingestion of restaurants for configured service areas.
+
+Service areas are pulled from Overpass tile by tile into a LocalOSMIndex
+and then kept current with incremental (newer:"...") queries, so searches
+inside them are answered without an Overpass round-trip.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable
+
+from services.geo import bounding_box, split_bbox
+from services.local_osm import LocalOSMIndex
+
+# fetch_area(south, west, north, east, newer=None) -> elements
+FetchArea = Callable[..., Awaitable[list[dict]]]
+
+
+@dataclass(frozen=True)
+class ServiceArea:
+    """A bounding box (in degrees) whose restaurants are kept in the local index."""
+
+    south: float
+    west: float
+    north: float
+    east: float
+
+    def contains(self, latitude: float, longitude: float, radius: float) -> bool:
+        """Return True if the whole search circle lies inside the area."""
+        south, west, north, east = bounding_box(latitude, longitude, radius)
+        return (
+            self.south <= south and north <= self.north
+            and self.west <= west and east <= self.east
+        )
+
+
+def format_osm_timestamp(timestamp: float) -> str:
+    """Format a Unix timestamp the way Overpass date filters expect it."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+class AreaIngester:
+    """
+    Keep a grid index of the restaurants in a set of service areas.
+
+    The first sync of an area fetches all of it, split into tiles of
+    tile_size degrees so each Overpass query stays small. Later syncs only
+    fetch elements edited since the previous sync (minus
+    update_overlap_seconds, since Overpass mirrors lag behind OSM) and
+    upsert them. Those queries only filter on the name tag, so a restaurant
+    re-tagged as something else comes back and is dropped by the upsert.
+    Elements that were deleted or lost their name are never reported by
+    them, so every full_refresh_seconds an area is fetched in full again
+    and its old contents are replaced.
+
+    An area is only reported as covered after its first sync succeeded.
+    """
+
+    def __init__(
+        self,
+        areas: Iterable[ServiceArea],
+        fetch_area: FetchArea,
+        cell_size: float = 0.01,
+        tile_size: float = 0.05,
+        update_overlap_seconds: float = 300.0,
+        full_refresh_seconds: float = 21600.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.areas = list(areas)
+        self.index = LocalOSMIndex(cell_size=cell_size)
+        self.tile_size = tile_size
+        self.update_overlap_seconds = update_overlap_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._fetch_area = fetch_area
+        self._clock = clock
+        # Start times of the last successful sync and full sync per area
+        self._synced_at: dict[ServiceArea, float] = {}
+        self._full_synced_at: dict[ServiceArea, float] = {}
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.failures = 0
+        self.elements_updated = 0
+
+    def covers(self, latitude: float, longitude: float, radius: float) -> bool:
+        """Return True if a search circle lies inside an area that has been synced."""
+        return any(
+            area in self._synced_at and area.contains(latitude, longitude, radius)
+            for area in self.areas
+        )
+
+    def query(self, latitude: float, longitude: float, radius: int) -> list[dict]:
+        """Return the indexed elements within radius meters of a point."""
+        return self.index.query(latitude, longitude, radius)
+
+    async def sync(self, area: ServiceArea) -> None:
+        """
+        Bring one area up to date (full fetch if due, incremental otherwise).
+
+        Raises:
+            Whatever fetch_area raises; the index is left unchanged in that case
+        """
+        started = self._clock()
+        last_full = self._full_synced_at.get(area)
+        full = last_full is None or started - last_full >= self.full_refresh_seconds
+        newer = (
+            None if full
+            else format_osm_timestamp(self._synced_at[area] - self.update_overlap_seconds)
+        )
+
+        # Fetch every tile before touching the index, so a failed tile does
+        # not leave the area half updated
+        elements = []
+        for tile in split_bbox(area.south, area.west, area.north, area.east, self.tile_size):
+            elements.extend(await self._fetch_area(*tile, newer=newer))
+
+        if full:
+            self.index.remove_within(area.south, area.west, area.north, area.east)
+            self._full_synced_at[area] = started
+            self.full_syncs += 1
+        else:
+            self.incremental_syncs += 1
+        for element in elements:
+            self.index.upsert(element)
+        self.elements_updated += len(elements)
+        self._synced_at[area] = started
+
+    async def sync_all(self) -> None:
+        """Sync every area, counting (and otherwise ignoring) failures."""
+        for area in self.areas:
+            try:
+                await self.sync(area)
+            except Exception:
+                # Keep serving the previous data; the next run retries
+                self.failures += 1
+
+    async def run(self, interval: float) -> None:
+        """Sync all areas now and then every interval seconds until cancelled."""
+        while True:
+            await self.sync_all()
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        """Return ingestion counters."""
+        return {
+            "areas": len(self.areas),
+            "areas_synced": len(self._synced_at),
+            "elements": self.index.size,
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "elements_updated": self.elements_updated,
+            "failures": self.failures,
+        }
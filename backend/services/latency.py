@@ -0,0 +1,36 @@
+"""
+Rolling latency statistics for upstream requests.
+"""
+import math
+from collections import deque
+from typing import Optional
+
+
+class LatencyWindow:
+    """Keep the most recent latency samples and report percentiles."""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample in seconds."""
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Return the given percentile (nearest-rank) of the recorded samples.
+
+        Args:
+            percent: Percentile between 0 and 100 (e.g. 95 for p95)
+
+        Returns:
+            Latency in seconds, or None when no samples have been recorded
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(percent / 100 * len(ordered)))
+        return ordered[rank - 1]
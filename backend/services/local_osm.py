@@ -0,0 +1,147 @@
+"""
+Local OpenStreetMap extract backend.
+
+Loads a pre-filtered extract of amenity=restaurant|cafe|fast_food elements
+into an in-memory grid index and answers radius searches without an
+Overpass round-trip.
+"""
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable
+
+from services.geo import bounding_box, element_coordinates, grid_cell, haversine_m
+from services.records import compact_element
+
+# Amenity types served by the restaurant search
+RESTAURANT_AMENITIES = frozenset({"restaurant", "cafe", "fast_food"})
+
+# OSM elements are identified by type and id (ids are only unique per type)
+ElementKey = tuple[str, int]
+
+
+class LocalOSMIndex:
+    """
+    Grid-bucketed spatial index over OSM restaurant elements.
+
+    Elements are stored in the same shape Overpass returns them (trimmed
+    by compact_element), so the results can be fed straight into
+    RestaurantService._parse_restaurants.
+    Elements are keyed on their OSM type and id, so the index can be
+    updated in place as edits come in (see services.ingest).
+    """
+
+    def __init__(self, elements: Iterable[dict] = (), cell_size: float = 0.01):
+        self.cell_size = cell_size
+        # cell -> {(type, id): (lat, lon, element)}
+        self._cells: dict[tuple[int, int], dict[ElementKey, tuple[float, float, dict]]] = (
+            defaultdict(dict)
+        )
+        # (type, id) -> cell, to find an element again when it moves or is removed
+        self._element_cells: dict[ElementKey, tuple[int, int]] = {}
+
+        for element in elements:
+            self.upsert(element)
+
+    @property
+    def size(self) -> int:
+        """Number of indexed elements."""
+        return len(self._element_cells)
+
+    def upsert(self, element: dict) -> bool:
+        """
+        Add an element, or replace the indexed version of the same OSM element.
+
+        An element that is no longer a located restaurant (e.g. its amenity
+        tag changed) is removed instead.
+
+        Returns:
+            True if the element is indexed afterwards
+        """
+        key = (element.get("type"), element.get("id"))
+        self.remove(*key)
+
+        if key[0] not in ("node", "way"):
+            return False
+        if element.get("tags", {}).get("amenity") not in RESTAURANT_AMENITIES:
+            return False
+        coordinates = element_coordinates(element)
+        if coordinates is None:
+            return False
+
+        lat, lon = coordinates
+        cell = grid_cell(lat, lon, self.cell_size)
+        self._cells[cell][key] = (lat, lon, compact_element(element))
+        self._element_cells[key] = cell
+        return True
+
+    def remove(self, element_type: str, element_id: int) -> bool:
+        """Remove an element by OSM type and id; return True if it was indexed."""
+        key = (element_type, element_id)
+        cell = self._element_cells.pop(key, None)
+        if cell is None:
+            return False
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        return True
+
+    def remove_within(self, south: float, west: float, north: float, east: float) -> int:
+        """
+        Remove every element inside a bounding box.
+
+        Returns:
+            Number of elements removed
+        """
+        min_row, min_col = grid_cell(south, west, self.cell_size)
+        max_row, max_col = grid_cell(north, east, self.cell_size)
+
+        doomed = [
+            key
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            for key, (lat, lon, _) in self._cells.get((row, col), {}).items()
+            if south <= lat <= north and west <= lon <= east
+        ]
+        for key in doomed:
+            self.remove(*key)
+        return len(doomed)
+
+    @classmethod
+    def from_file(cls, path: str, cell_size: float = 0.01) -> "LocalOSMIndex":
+        """
+        Load an extract saved as Overpass JSON.
+
+        The file may be a full Overpass response ({"elements": [...]}) or a
+        bare list of elements. Ways need coordinates, so export them with
+        "out center".
+        """
+        with Path(path).open(encoding="utf-8") as f:
+            data = json.load(f)
+        elements = data.get("elements", []) if isinstance(data, dict) else data
+        return cls(elements, cell_size=cell_size)
+
+    def query(self, latitude: float, longitude: float, radius: int) -> list[dict]:
+        """
+        Return all indexed elements within radius meters of a point.
+
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            radius: Search radius in meters
+
+        Returns:
+            List of OSM elements, in no particular order
+        """
+        south, west, north, east = bounding_box(latitude, longitude, radius)
+        min_row, min_col = grid_cell(south, west, self.cell_size)
+        max_row, max_col = grid_cell(north, east, self.cell_size)
+
+        results = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for lat, lon, element in self._cells.get((row, col), {}).values():
+                    if haversine_m(latitude, longitude, lat, lon) <= radius:
+                        results.append(element)
+        return results
@@ -0,0 +1,300 @@
+"""
+Lightweight Prometheus-style metrics.
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format. Updates are a dictionary lookup and
+an addition (no locks: everything runs on the event loop thread), so the
+instrumentation can stay on in production. Each worker process keeps its
+own registry; scrape every worker or aggregate in Prometheus.
+"""
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+import httpx
+
+from services.deadline import DeadlineExceededError
+
+# Latency buckets in seconds, from sub-millisecond CPU stages to slow upstream calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families at scrape time
+Family = tuple[str, str, str, list[tuple[dict, float]]]
+Collector = Callable[[], Iterable[Family]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonically increasing value per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        """Add amount to the series for the given label values."""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        """Return the current value of a series (0 if never updated)."""
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label combination."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        """Subtract amount from the series for the given label values."""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        """Set the series for the given label values."""
+        self._values[labels] = value
+
+    @contextmanager
+    def track_inprogress(self, *labels) -> Iterator[None]:
+        """Increment the gauge for the duration of a block."""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram:
+    """Bucketed distribution of observed values (e.g. latencies in seconds)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        """Record one observation for the given label values."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        """Observe the wall time of a block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels) -> int:
+        """Return the number of observations of a series."""
+        series = self._series.get(labels)
+        return sum(series[0]) if series is not None else 0
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that read other components at scrape time."""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._collectors: list[Collector] = []
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """Create and register a gauge."""
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable returning metric families computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(
+                        f"{name}{_format_labels(names, tuple(labels.values()))} "
+                        f"{_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def upstream_outcome(error: Optional[BaseException], element_count: int = 0) -> str:
+    """
+    Classify the result of one Overpass request for the outcome label.
+
+    Returns:
+        "ok", "zero_results", "rate_limited" (429), "timeout", "http_error"
+        (other HTTP status), "deadline" (the request deadline passed),
+        "cancelled" (e.g. a hedged request that lost) or "error"
+    """
+    if error is None:
+        return "ok" if element_count else "zero_results"
+    if isinstance(error, httpx.HTTPStatusError):
+        return "rate_limited" if error.response.status_code == 429 else "http_error"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, DeadlineExceededError):
+        return "deadline"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+class SearchMetrics:
+    """The metrics recorded by restaurant searches."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.stage_seconds = self.registry.histogram(
+            "restaurant_search_stage_seconds",
+            "Time spent in each stage of a restaurant search "
+            "(fetch, decode, rank, serialize)",
+            ("stage",)
+        )
+        self.request_seconds = self.registry.histogram(
+            "restaurant_search_request_seconds",
+            "End-to-end handling time of restaurant search endpoints",
+            ("endpoint",)
+        )
+        self.requests = self.registry.counter(
+            "restaurant_search_requests_total",
+            "Restaurant search requests by endpoint and result status",
+            ("endpoint", "status")
+        )
+        self.in_flight = self.registry.gauge(
+            "restaurant_search_in_flight",
+            "Restaurant search requests currently being handled",
+            ("endpoint",)
+        )
+        self.tiles = self.registry.counter(
+            "restaurant_search_tiles_total",
+            "Tiles of wide searches by outcome (cached, fetched, truncated, failed)",
+            ("outcome",)
+        )
+        self.expansion_steps = self.registry.counter(
+            "restaurant_search_expansion_steps_total",
+            "Radius steps of adaptive searches by source (cached, fetched)",
+            ("source",)
+        )
+        self.upstream_requests = self.registry.counter(
+            "overpass_requests_total",
+            "Overpass requests by server and outcome",
+            ("server", "outcome")
+        )
+        self.upstream_seconds = self.registry.histogram(
+            "overpass_request_seconds",
+            "Overpass request duration by server",
+            ("server",)
+        )
+        self.upstream_in_flight = self.registry.gauge(
+            "overpass_requests_in_flight",
+            "Overpass requests currently running"
+        )
+
+    def record_upstream(
+        self,
+        server: str,
+        seconds: float,
+        error: Optional[BaseException] = None,
+        element_count: int = 0
+    ) -> None:
+        """Count one Overpass request and observe its duration."""
+        self.upstream_requests.inc(server, upstream_outcome(error, element_count))
+        self.upstream_seconds.observe(seconds, server)
+
+    @contextmanager
+    def track_request(self, endpoint: str) -> Iterator[None]:
+        """Track an endpoint call as in flight and observe its duration."""
+        self.in_flight.inc(endpoint)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight.dec(endpoint)
+            self.request_seconds.observe(time.perf_counter() - started, endpoint)
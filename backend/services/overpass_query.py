@@ -0,0 +1,190 @@
+"""
+Overpass QL query builder for restaurant searches.
+"""
+import re
+from typing import Optional
+
+from services.preference_matcher import expand_preferences
+
+# Amenity types served by the restaurant search
+AMENITIES = ("restaurant", "cafe", "fast_food")
+
+_TIMEOUT_SETTING = re.compile(r"\[timeout:\d+\]")
+
+# Characters with a special meaning in Overpass (POSIX extended) regexes
+_REGEX_SPECIAL = set(".^$*+?()[]{}|\\")
+
+
+def escape_regex(value: str) -> str:
+    """
+    Escape a literal for use inside an Overpass QL regex string.
+
+    Regex metacharacters are backslash-escaped, then backslashes and double
+    quotes are escaped again for the surrounding QL string literal.
+    """
+    escaped = "".join(f"\\{c}" if c in _REGEX_SPECIAL else c for c in value)
+    return escaped.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def with_timeout(query: str, timeout: int) -> str:
+    """Return a query with its server-side [timeout:] setting replaced by timeout seconds."""
+    return _TIMEOUT_SETTING.sub(f"[timeout:{timeout}]", query, count=1)
+
+
+def build_restaurant_query(
+    latitude: float,
+    longitude: float,
+    radius: int,
+    preferences: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    timeout: int = 60
+) -> str:
+    """
+    Build an Overpass QL query for named restaurants/cafes/fast_food in a radius.
+
+    Preferences (expanded with their synonyms) are compiled into
+    case-insensitive tag filters that mirror PreferenceMatcher: a preference
+    matches when it is a substring of the cuisine, the name, or the amenity
+    type. Ways are returned with their center point ("out center") instead
+    of recursing into their nodes.
+
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+        radius: Search radius in meters
+        preferences: Optional list of preference keywords to filter by
+        limit: Optional maximum number of elements the server returns
+        timeout: Server-side query timeout in seconds
+
+    Returns:
+        Overpass QL query string
+    """
+    around = f"(around:{radius},{latitude},{longitude})"
+    return _build_query(around, preferences, limit, timeout)
+
+
+def build_restaurant_bbox_query(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    preferences: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    timeout: int = 60,
+    newer: Optional[str] = None
+) -> str:
+    """
+    Build an Overpass QL query for named restaurants/cafes/fast_food in a bounding box.
+
+    Same filters and output as build_restaurant_query, for an area given as
+    south/west/north/east edges in degrees. With newer (an ISO 8601 UTC
+    timestamp such as "2024-05-01T12:00:00Z"), only elements edited after
+    that time are returned, for incremental updates. Those keep only the
+    name filter (and ignore preferences), so an element edited to no
+    longer be a restaurant is returned too and can be dropped from an index.
+    """
+    area = f"({south},{west},{north},{east})"
+    if newer is None:
+        return _build_query(area, preferences, limit, timeout)
+
+    area += f'(newer:"{newer}")'
+    statements = "\n".join(f'  {element_type}["name"]{area};' for element_type in ("node", "way"))
+    return _assemble_query(statements, limit, timeout)
+
+
+def build_restaurant_ring_query(
+    latitude: float,
+    longitude: float,
+    inner_radius: int,
+    outer_radius: int,
+    preferences: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    timeout: int = 60
+) -> str:
+    """
+    Build an Overpass QL query for named restaurants/cafes/fast_food in a ring.
+
+    Selects what build_restaurant_query would find within outer_radius
+    minus what it would find within inner_radius (an Overpass set
+    difference), so a search that widens step by step only downloads the
+    new ring each time. Without an inner radius this is the plain radius
+    query.
+
+    Args:
+        latitude: Latitude coordinate
+        longitude: Longitude coordinate
+        inner_radius: Radius in meters already searched
+        outer_radius: Radius in meters searched up to
+        preferences: Optional list of preference keywords to filter by
+        limit: Optional maximum number of elements the server returns
+        timeout: Server-side query timeout in seconds
+    """
+    if inner_radius <= 0:
+        return build_restaurant_query(
+            latitude, longitude, outer_radius,
+            preferences=preferences, limit=limit, timeout=timeout
+        )
+    outer = _statements(
+        f"(around:{outer_radius},{latitude},{longitude})", preferences, "    "
+    )
+    inner = _statements(
+        f"(around:{inner_radius},{latitude},{longitude})", preferences, "    "
+    )
+    count = f" {limit}" if limit is not None else ""
+
+    return f"""[out:json][timeout:{timeout}];
+(
+  (
+{outer}
+  );
+  -
+  (
+{inner}
+  );
+);
+out tags center qt{count};
+"""
+
+
+def _build_query(
+    area: str,
+    preferences: Optional[list[str]],
+    limit: Optional[int],
+    timeout: int
+) -> str:
+    """Assemble the restaurant query for an Overpass area filter."""
+    return _assemble_query(_statements(area, preferences), limit, timeout)
+
+
+def _assemble_query(statements: str, limit: Optional[int], timeout: int) -> str:
+    """Wrap node/way statements in the query header and output statement."""
+    count = f" {limit}" if limit is not None else ""
+
+    return f"""[out:json][timeout:{timeout}];
+(
+{statements}
+);
+out tags center qt{count};
+"""
+
+
+def _statements(area: str, preferences: Optional[list[str]], indent: str = "  ") -> str:
+    """Return the node/way statements selecting restaurants in an area."""
+    amenity = f'["amenity"~"^({"|".join(AMENITIES)})$"]["name"]'
+
+    filters = [""]
+    prefs = [p for p in expand_preferences(preferences) if p]
+    if prefs:
+        pattern = "|".join(escape_regex(p) for p in prefs)
+        filters = [f'["cuisine"~"{pattern}",i]', f'["name"~"{pattern}",i]']
+        # A preference such as "cafe" or "food" matches every element of
+        # that amenity type, just like it matches the "types" list locally
+        matched_amenities = [a for a in AMENITIES if any(p in a for p in prefs)]
+        if matched_amenities:
+            filters.append(f'["amenity"~"^({"|".join(matched_amenities)})$"]')
+
+    return "\n".join(
+        f"{indent}{element_type}{amenity}{tag_filter}{area};"
+        for tag_filter in filters
+        for element_type in ("node", "way")
+    )
@@ -0,0 +1,150 @@
+"""
+Incremental parser for Overpass JSON responses.
+
+Yields the entries of the top-level "elements" array as soon as each one
+has fully arrived, so large responses never have to be held in memory
+as a single body or document.
+"""
+import json
+from typing import Iterator
+
+_WHITESPACE = " \t\n\r"
+
+# Parser phases
+_START = "start"
+_KEY = "key"
+_ELEMENTS = "elements"
+_DONE = "done"
+
+
+class ElementStreamParser:
+    """
+    Push parser for the "elements" array of an Overpass JSON response.
+
+    Feed decoded text chunks with feed(); each call yields the elements
+    completed by that chunk. Other top-level keys are parsed and skipped.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._phase = _START
+        self.elements_seen = 0
+
+    def __getstate__(self) -> dict:
+        # The decoder is rebuilt on unpickling, so a partly fed parser can
+        # be handed to a worker process
+        state = self.__dict__.copy()
+        del state["_decoder"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> Iterator[dict]:
+        """
+        Add a chunk of response text and yield newly completed elements.
+
+        Raises:
+            ValueError: If the text is not a JSON object
+        """
+        self._buffer += chunk
+        pos = 0
+        try:
+            while True:
+                pos = self._skip(pos)
+                if pos >= len(self._buffer) or self._phase == _DONE:
+                    return
+
+                char = self._buffer[pos]
+
+                if self._phase == _START:
+                    if char != "{":
+                        raise ValueError("Overpass response is not a JSON object")
+                    pos += 1
+                    self._phase = _KEY
+
+                elif self._phase == _KEY:
+                    if char == "}":
+                        pos += 1
+                        self._phase = _DONE
+                        return
+                    parsed = self._parse_member(pos)
+                    if parsed is None:
+                        return  # Wait for more data
+                    pos, is_elements = parsed
+                    if is_elements:
+                        self._phase = _ELEMENTS
+
+                elif self._phase == _ELEMENTS:
+                    if char == "]":
+                        pos += 1
+                        self._phase = _KEY
+                        continue
+                    try:
+                        element, end = self._decoder.raw_decode(self._buffer, pos)
+                    except json.JSONDecodeError:
+                        return  # Element not complete yet
+                    pos = end
+                    self.elements_seen += 1
+                    yield element
+        finally:
+            # Drop consumed text so the buffer only holds the partial tail
+            self._buffer = self._buffer[pos:]
+
+    def close(self) -> None:
+        """
+        Signal the end of the response.
+
+        Raises:
+            ValueError: If the response ended in the middle of the document
+        """
+        if self._phase != _DONE or self._buffer.strip():
+            raise ValueError("Overpass response ended unexpectedly")
+
+    def _skip(self, pos: int) -> int:
+        """Skip whitespace and member/element separators."""
+        buffer = self._buffer
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ","):
+            pos += 1
+        return pos
+
+    def _parse_member(self, pos: int):
+        """
+        Parse one top-level "key": value member starting at pos.
+
+        Returns:
+            (new position, True if the member is the start of "elements"),
+            or None if the member has not fully arrived yet
+        """
+        try:
+            key, pos = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        pos = self._skip_whitespace(pos)
+        if pos >= len(self._buffer):
+            return None
+        if self._buffer[pos] != ":":
+            raise ValueError("Malformed Overpass response")
+        pos = self._skip_whitespace(pos + 1)
+        if pos >= len(self._buffer):
+            return None
+
+        if key == "elements" and self._buffer[pos] == "[":
+            return pos + 1, True
+
+        try:
+            _, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        if end >= len(self._buffer) or self._buffer[end] not in _WHITESPACE + ",}":
+            # A number cut off by the chunk boundary may still be growing
+            return None
+        return end, False
+
+    def _skip_whitespace(self, pos: int) -> int:
+        buffer = self._buffer
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        return pos
@@ -0,0 +1,91 @@
+"""
+Precompiled matcher for user food preferences.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+# Extra search terms implied by a preference (e.g. craving pizza means an
+# Italian place is a good match even if its cuisine tag doesn't say pizza)
+DEFAULT_SYNONYMS: dict[str, tuple[str, ...]] = {
+    "pizza": ("italian",),
+    "pasta": ("italian",),
+    "sushi": ("japanese",),
+    "ramen": ("japanese",),
+    "taco": ("mexican",),
+    "burrito": ("mexican",),
+    "pho": ("vietnamese",),
+    "dumpling": ("chinese",),
+    "curry": ("indian", "thai"),
+    "burger": ("american",),
+    "coffee": ("cafe", "coffee_shop"),
+    "vegetarian": ("vegan",),
+}
+
+# Joins the fields of one element; never part of a pattern, so a match
+# cannot span two fields
+_FIELD_SEPARATOR = "\x1f"
+
+
+def expand_preferences(
+    preferences: Optional[Iterable[str]],
+    synonyms: Optional[dict[str, tuple[str, ...]]] = None
+) -> tuple[str, ...]:
+    """
+    Normalize preferences and add their synonyms.
+
+    Returns:
+        Lowercased, de-duplicated search terms in first-seen order
+    """
+    synonyms = DEFAULT_SYNONYMS if synonyms is None else synonyms
+    terms: dict[str, None] = {}
+    for preference in preferences or ():
+        term = preference.lower().replace(_FIELD_SEPARATOR, "")
+        terms[term] = None
+        for synonym in synonyms.get(term, ()):
+            terms[synonym] = None
+    return tuple(terms)
+
+
+class PreferenceMatcher:
+    """
+    Match restaurants against a set of preferences in a single pass.
+
+    A restaurant matches when any preference (or synonym) is a
+    case-insensitive substring of one of its cuisines, types or its name.
+    All terms are compiled into one regex alternation, and an element's
+    fields are scanned together with one search call.
+    """
+
+    def __init__(
+        self,
+        preferences: Optional[Iterable[str]],
+        synonyms: Optional[dict[str, tuple[str, ...]]] = None
+    ):
+        self.patterns = expand_preferences(preferences, synonyms)
+        self._regex = (
+            re.compile("|".join(re.escape(p) for p in self.patterns))
+            if self.patterns else None
+        )
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def for_preferences(cls, preferences: tuple[str, ...]) -> "PreferenceMatcher":
+        """Return a shared matcher for a preference tuple (compiled once)."""
+        return cls(preferences)
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def matches_text(self, text: str) -> bool:
+        """Return True if any term occurs in text (case-insensitive)."""
+        if self._regex is None:
+            return True
+        return self._regex.search(text.lower()) is not None
+
+    def matches(self, cuisines: Iterable[str], types: Iterable[str], name: str) -> bool:
+        """Return True if any term occurs in a cuisine, a type or the name."""
+        if self._regex is None:
+            return True
+        text = _FIELD_SEPARATOR.join([*cuisines, *types, name]).lower()
+        return self._regex.search(text) is not None
@@ -0,0 +1,91 @@
+"""
+Compact internal representations of restaurants.
+
+RestaurantRecord replaces the per-result dictionaries built while parsing,
+and compact_element trims raw Overpass elements down to what searches read
+before they are cached or indexed.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# OSM tags read when ranking, filtering and building restaurants
+USED_TAGS = (
+    "name",
+    "amenity",
+    "cuisine",
+    "opening_hours",
+    "addr:housenumber",
+    "addr:street",
+    "addr:city",
+)
+
+
+@dataclass(slots=True)
+class RestaurantRecord:
+    """
+    One restaurant result, from parsing through to the response.
+
+    Supports read-only mapping access (record["name"], record.get(...)) for
+    callers written against the dictionaries the service used to return.
+    """
+
+    name: str
+    place_id: str
+    vicinity: str
+    types: list[str] = field(default_factory=list)
+    opening_hours: Optional[str] = None
+    # OSM cuisine values (used for preference matching, not part of the response)
+    cuisine: list[str] = field(default_factory=list)
+    distance_m: Optional[float] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__dataclass_fields__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field by name, or default for unknown names."""
+        if key not in self.__dataclass_fields__:
+            return default
+        return getattr(self, key)
+
+    def as_response(self) -> dict:
+        """
+        Return the fields of the Restaurant response model.
+
+        Records are only built from Overpass data the service has already
+        checked, so this skips model validation on the hot path.
+        """
+        return {
+            "name": self.name,
+            "place_id": self.place_id,
+            "vicinity": self.vicinity,
+            "rating": None,  # OSM doesn't have ratings
+            "types": self.types,
+            "user_ratings_total": None,
+            "price_level": None,
+            "opening_hours": self.opening_hours,
+            "distance_m": self.distance_m,
+        }
+
+
+def compact_element(element: dict) -> dict:
+    """
+    Return a copy of an Overpass element with only the fields searches use.
+
+    Ways keep their "center"; every other key (version, timestamps, unused
+    tags such as website or wheelchair) is dropped, which typically shrinks
+    cached and indexed elements severalfold.
+    """
+    tags = element.get("tags", {})
+    compact = {
+        "type": element.get("type"),
+        "id": element.get("id"),
+        "tags": {key: tags[key] for key in USED_TAGS if key in tags},
+    }
+    if "lat" in element:
+        compact["lat"] = element["lat"]
+        compact["lon"] = element["lon"]
+    elif "center" in element:
+        compact["center"] = element["center"]
+    return compact
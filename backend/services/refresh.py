@@ -0,0 +1,171 @@
+"""
+Background refresh of cached areas (stale-while-revalidate and hot-area prefetch).
+"""
+import asyncio
+import contextvars
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional
+
+Refresh = Callable[[], Awaitable[Any]]
+
+
+class BackgroundRefresher:
+    """
+    Run cache refreshes as background tasks, one per key at a time.
+
+    Searches that hit a stale cache entry schedule a refresh here and
+    return the stale data straight away. A key that is already being
+    refreshed is not refreshed twice, and at most max_concurrency refreshes
+    run at once; refreshes beyond that are dropped (the entry is still
+    stale next time, so a later search schedules it again).
+
+    When hot_min_hits is set, cache accesses are also counted per key and
+    prefetch() refreshes the keys accessed at least that often since the
+    previous prefetch, so popular areas are renewed before they expire.
+    Accesses report when the entry expires, so a prefetch can skip hot
+    keys that are still far from expiry.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        hot_min_hits: Optional[int] = None,
+        hot_max_keys: int = 50,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_concurrency = max_concurrency
+        self.hot_min_hits = hot_min_hits
+        self.hot_max_keys = hot_max_keys
+        self._clock = clock
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Access counts (and how to refresh each key, and when its entry
+        # expires if known) since the last prefetch
+        self._hits: Counter[str] = Counter()
+        self._refreshes: dict[str, Refresh] = {}
+        self._expires_at: dict[str, float] = {}
+        self.scheduled = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failures = 0
+        self.prefetched = 0
+
+    def schedule(self, key: str, refresh: Refresh) -> bool:
+        """
+        Start refreshing key in the background unless it already is.
+
+        Args:
+            key: Cache key being refreshed
+            refresh: Zero-argument coroutine function that refetches and stores the entry
+
+        Returns:
+            True if a refresh task was started
+        """
+        if key in self._tasks:
+            self.deduplicated += 1
+            return False
+        if len(self._tasks) >= self.max_concurrency:
+            self.dropped += 1
+            return False
+
+        self.scheduled += 1
+        # Run detached from the scheduling request's context, so its
+        # deadline (see services.deadline) does not cut the refresh short
+        task = asyncio.get_running_loop().create_task(refresh(), context=contextvars.Context())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+        return True
+
+    def record_access(
+        self,
+        key: str,
+        refresh: Refresh,
+        expires_in: Optional[float] = None
+    ) -> None:
+        """
+        Count an access to key for hot-area prefetching (no-op when disabled).
+
+        Args:
+            key: Cache key accessed
+            refresh: Zero-argument coroutine function that refetches and stores the entry
+            expires_in: Seconds until the cached entry expires (None on a miss)
+        """
+        if self.hot_min_hits is None:
+            return
+        self._hits[key] += 1
+        self._refreshes[key] = refresh
+        if expires_in is not None:
+            self._expires_at[key] = self._clock() + expires_in
+
+    def hot_keys(self) -> list[str]:
+        """Return the keys accessed at least hot_min_hits times, most accessed first."""
+        if self.hot_min_hits is None:
+            return []
+        return [
+            key for key, hits in self._hits.most_common(self.hot_max_keys)
+            if hits >= self.hot_min_hits
+        ]
+
+    def prefetch(self, within: Optional[float] = None) -> int:
+        """
+        Refresh the current hot keys and start a new counting period.
+
+        Args:
+            within: Only refresh keys whose entry expires within this many
+                seconds (keys with no known expiry are skipped; a miss is
+                refetched by the search itself). None refreshes every hot key.
+
+        Returns:
+            Number of refreshes started
+        """
+        started = 0
+        horizon = None if within is None else self._clock() + within
+        for key in self.hot_keys():
+            if horizon is not None and self._expires_at.get(key, float("inf")) > horizon:
+                continue
+            if self.schedule(key, self._refreshes[key]):
+                started += 1
+        self.prefetched += started
+        self._hits.clear()
+        self._refreshes.clear()
+        self._expires_at.clear()
+        return started
+
+    async def run_prefetch(self, interval: float) -> None:
+        """
+        Prefetch every interval seconds until cancelled.
+
+        Each run refreshes the hot keys that would expire before the next one.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.prefetch(within=interval)
+
+    def in_flight(self) -> int:
+        """Return the number of refreshes currently running."""
+        return len(self._tasks)
+
+    async def close(self) -> None:
+        """Cancel running refreshes and wait for them to finish."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Return refresh counters."""
+        return {
+            "in_flight": self.in_flight(),
+            "scheduled": self.scheduled,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "prefetched": self.prefetched,
+        }
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Nobody awaits a background refresh, so retrieve its exception here
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
@@ -2,9 +2,53 @@
 Restaurant search service using Overpass API (OpenStreetMap).
 """
 import asyncio
+import math
+import time
+from concurrent.futures import BrokenExecutor, Executor
+from contextlib import AsyncExitStack, aclosing, asynccontextmanager, nullcontext
+from itertools import islice
 
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, TypeVar
+
+from services.admission import UpstreamBudget, UpstreamBusyError
+from services.batch import cluster_bbox, cluster_searches
+from services.cache import CacheBackend, CachedArea, make_cache_key
+from services.candidates import CandidateElements, CandidateTable, candidate_table
+from services.deadline import DeadlineExceededError, current_deadline, remaining_timeout
+from services.expansion import ExpansionPolicy
+from services.geo import (
+    bounding_box,
+    box_intersects_circle,
+    bucket_radius,
+    cell_center,
+    cell_half_diagonal,
+    element_coordinates,
+    grid_cell,
+    haversine_m,
+)
+from services.ingest import AreaIngester
+from services.latency import LatencyWindow
+from services.local_osm import LocalOSMIndex
+from services.metrics import SearchMetrics
+from services.overpass_query import (
+    build_restaurant_bbox_query,
+    build_restaurant_query,
+    build_restaurant_ring_query,
+    with_timeout,
+)
+from services.overpass_stream import ElementStreamParser
+from services.preference_matcher import PreferenceMatcher
+from services.records import RestaurantRecord, compact_element
+from services.refresh import BackgroundRefresher
+from services.server_health import ServerHealthTracker
+from services.single_flight import SingleFlight
+
+T = TypeVar("T")
+
+
+class OverpassError(Exception):
+    """Raised when restaurant data could not be fetched from Overpass."""
 
 
 class RestaurantService:
@@ -16,160 +60,1467 @@ class RestaurantService:
         "https://overpass-api.de/api/interpreter",  # Original official server 
     ]
 
-    def __init__(self, overpass_url: str = None):
+    # Minimum latency samples before a percentile-based hedge delay is used
+    MIN_HEDGE_SAMPLES = 20
+
+    # Number of restaurants returned per search
+    MAX_RESULTS = 10
+
+    def __init__(
+        self,
+        overpass_url: str = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[CacheBackend] = None,
+        cache_cell_size: float = 0.005,
+        cache_radius_bucket: int = 500,
+        single_flight: Optional[SingleFlight] = None,
+        fetch_mode: str = "sequential",
+        hedge_delay: float = 2.0,
+        hedge_percentile: Optional[float] = None,
+        latency_window: Optional[LatencyWindow] = None,
+        health_tracker: Optional[ServerHealthTracker] = None,
+        local_index: Optional[LocalOSMIndex] = None,
+        result_cap: Optional[int] = None,
+        refresher: Optional[BackgroundRefresher] = None,
+        ingester: Optional[AreaIngester] = None,
+        metrics: Optional[SearchMetrics] = None,
+        upstream_budget: Optional[UpstreamBudget] = None,
+        tile_radius_threshold: Optional[int] = None,
+        tile_size: float = 0.05,
+        max_tiles: int = 24,
+        tile_concurrency: int = 6,
+        expansion_policy: Optional[ExpansionPolicy] = None,
+        parse_executor: Optional[Executor] = None,
+        parse_offload_bytes: Optional[int] = None,
+        timeout: float = 60.0
+    ):
         # Use provided URL or default to the first server
         self.overpass_url = overpass_url or self.OVERPASS_SERVERS[0]
-        self.timeout = 60.0  # Increased timeout for slower servers
+        # Per-attempt HTTP timeout, also sent as the query's server-side [timeout:]
+        self.timeout = timeout
+        # Shared, pooled client owned by the application (see main.lifespan).
+        # When not provided, a short-lived client is created per request.
+        self.client = client
+        # Optional cache of raw Overpass elements keyed on location cell + radius
+        self.cache = cache
+        self.cache_cell_size = cache_cell_size
+        self.cache_radius_bucket = cache_radius_bucket
+        # Optional shared coalescing layer for identical concurrent queries
+        self.single_flight = single_flight
+        # Server fallback strategy: "sequential" or "hedged"
+        self.fetch_mode = fetch_mode
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        # Shared record of recent upstream latencies (for percentile hedging)
+        self.latency_window = latency_window
+        # Shared per-server health record used to order and skip servers
+        self.health_tracker = health_tracker
+        # Local OSM extract; when set, searches never go to Overpass
+        self.local_index = local_index
+        # Server-side cap on elements returned for cacheable (unfiltered) queries
+        self.result_cap = result_cap
+        # Shared background refresher; when set, stale cache entries are
+        # served immediately and refreshed in the background
+        self.refresher = refresher
+        # Index of ingested service areas; searches inside them skip Overpass
+        self.ingester = ingester
+        # Shared stage timings and upstream counters (see /metrics)
+        self.metrics = metrics
+        # Shared limit on concurrent Overpass queries (one slot per query,
+        # including its fallback and hedged requests)
+        self.upstream_budget = upstream_budget
+        # Searches wider than the threshold are fetched as concurrent grid
+        # tiles (None disables tiling)
+        self.tile_radius_threshold = tile_radius_threshold
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tile_concurrency = tile_concurrency
+        # When set, searches start small and widen ring by ring until they
+        # have enough results (None always fetches the full radius)
+        self.expansion_policy = expansion_policy
+        # Shared executor (usually a process pool) that parses responses
+        # larger than parse_offload_bytes off the event loop
+        self.parse_executor = parse_executor
+        self.parse_offload_bytes = parse_offload_bytes
     
     async def search_nearby_restaurants(
         self,
         latitude: float,
         longitude: float,
         radius: int = 1500,
-        preferences: Optional[list[str]] = None
+        preferences: Optional[list[str]] = None,
+        limit: int = MAX_RESULTS,
+        offset: int = 0
     ) -> dict:
         """
-        Search for nearby restaurants using Overpass API.
+        Search for nearby restaurants using Overpass API (or a local OSM extract).
+
+        Results are ordered nearest-first and paged with limit/offset.
+        Searches wider than the tile threshold are fetched as concurrent
+        tiles (see _fetch_tiled); with an expansion policy, other searches
+        widen step by step until the page is filled (see _expand_search).
 
         Args:
             latitude: Latitude coordinate
             longitude: Longitude coordinate
             radius: Search radius in meters (default: 1500)
             preferences: List of cuisine preferences to filter by
+            limit: Maximum number of restaurants to return (default: 10)
+            offset: Number of nearest restaurants to skip (for paging)
 
         Returns:
-            Dictionary with 'results' and 'status' keys
-        """
-        # Build Overpass QL query
-        # Search for nodes and ways tagged as restaurants/cafes/fast_food
-        query = f"""
-        [out:json][timeout:60];
-        (
-          node["amenity"~"restaurant|cafe|fast_food"](around:{radius},{latitude},{longitude});
-          way["amenity"~"restaurant|cafe|fast_food"](around:{radius},{latitude},{longitude});
-        );
-        out body;
-        >;
-        out skel qt;
-        """
-
-        # Try primary server first, then fallback servers
-        servers_to_try = [self.overpass_url] + [
-            s for s in self.OVERPASS_SERVERS if s != self.overpass_url
+            Dictionary with 'results', 'status' and 'next_offset' keys
+            ('next_offset' is None on the last page), plus 'stale' when the
+            results came from an expired cache entry and 'partial' when some
+            restaurants may be missing (tiles of a wide search failed, or an
+            upstream response was cut off at result_cap)
+
+        Raises:
+            UpstreamBusyError: If the search needed Overpass and the upstream
+                request budget is exhausted
+            DeadlineExceededError: If the request deadline (see
+                services.deadline) passed before Overpass answered
+        """
+        stale = partial = False
+        started = time.perf_counter()
+        try:
+            indexed = self._indexed_elements(latitude, longitude, radius)
+            if indexed is not None:
+                elements, _ = indexed
+            elif self._is_tiled(radius):
+                elements, partial = await self._fetch_tiled(latitude, longitude, radius)
+            elif self.expansion_policy is not None:
+                elements, partial = await self._expand_search(
+                    latitude, longitude, radius, preferences, offset + limit
+                )
+            elif self.cache is not None:
+                elements, stale = await self._get_cached_elements(latitude, longitude, radius)
+                partial = self._is_truncated(elements)
+                if partial and preferences:
+                    # The cell was cut off at result_cap in arbitrary order, so
+                    # it may hold none of the preferred restaurants
+                    elements, partial = await self._fetch_filtered(
+                        latitude, longitude, radius, preferences
+                    )
+                    stale = False
+            else:
+                elements, partial = await self._fetch_filtered(
+                    latitude, longitude, radius, preferences
+                )
+        except OverpassError as e:
+            return {
+                "results": [],
+                "status": "ERROR",
+                "error": str(e)
+            }
+
+        fetched = time.perf_counter()
+        result = self._build_result(
+            candidate_table(elements), latitude, longitude, radius, preferences, limit, offset
+        )
+        if self.metrics is not None:
+            self.metrics.stage_seconds.observe(fetched - started, "fetch")
+            self.metrics.stage_seconds.observe(time.perf_counter() - fetched, "rank")
+        if stale:
+            result["stale"] = True
+        if partial:
+            result["partial"] = True
+        return result
+
+    async def stream_nearby_restaurants(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int = 1500,
+        preferences: Optional[list[str]] = None,
+        limit: int = MAX_RESULTS
+    ) -> AsyncIterator[dict]:
+        """
+        Search for nearby restaurants, yielding each one as soon as it is known.
+
+        Cached and indexed results are yielded nearest-first straight away.
+        Otherwise restaurants are yielded in the order Overpass sends them,
+        while the response is still downloading (and, with a cache, the full
+        response is still stored for later searches).
+
+        Yields:
+            {"event": "restaurant", "restaurant": {...}} for each restaurant,
+            then one {"event": "summary", "status", "total_results", "source"}
+            (plus "error" when status is ERROR, "stale" for stale cache hits
+            and "partial" when some restaurants may be missing, as for
+            search_nearby_restaurants)
+        """
+        elements, stale, partial = None, False, False
+        # Whether an upstream fetch is for the whole cache cell (and stored)
+        store = self.cache is not None
+        indexed = self._indexed_elements(latitude, longitude, radius)
+        if indexed is not None:
+            elements, source = indexed
+        elif self._is_tiled(radius):
+            # Tiles arrive whole, so wide searches are ranked before streaming
+            source = "tiles"
+            try:
+                elements, partial = await self._fetch_tiled(latitude, longitude, radius)
+            except (OverpassError, UpstreamBusyError, DeadlineExceededError) as e:
+                yield {
+                    "event": "summary",
+                    "status": "ERROR",
+                    "total_results": 0,
+                    "source": source,
+                    "error": str(e)
+                }
+                return
+        elif self.cache is not None:
+            elements, stale = await self._lookup_cached(latitude, longitude, radius)
+            partial = elements is not None and self._is_truncated(elements)
+            source = "cache"
+            if partial and preferences:
+                # A cell cut off at result_cap may hold none of the preferred
+                # restaurants, so stream a filtered query instead
+                elements, stale, partial, store = None, False, False, False
+
+        if elements is not None:
+            result = self._build_result(
+                candidate_table(elements), latitude, longitude, radius, preferences, limit
+            )
+            for restaurant in result["results"]:
+                yield {"event": "restaurant", "restaurant": restaurant}
+            summary = {
+                "event": "summary",
+                "status": result["status"],
+                "total_results": len(result["results"]),
+                "source": source
+            }
+            if stale:
+                summary["stale"] = True
+            if partial:
+                summary["partial"] = True
+            yield summary
+            return
+
+        if store:
+            area = self._cell_area(latitude, longitude, radius)
+            query = self._build_cell_query(latitude, longitude, radius)
+        else:
+            query = self._build_query(
+                latitude, longitude, radius, preferences, limit=self.result_cap
+            )
+
+        collected = []
+        received = emitted = 0
+        try:
+            # Close the upstream stream (and its request slot) as soon as we stop reading
+            async with aclosing(self._iter_upstream_elements(query)) as upstream:
+                async for element in upstream:
+                    received += 1
+                    if store and self._is_candidate(element):
+                        collected.append(compact_element(element))
+                    if emitted >= limit:
+                        if not store:
+                            break
+                        continue
+
+                    restaurant = self._to_restaurant(element, preferences)
+                    if restaurant is None:
+                        continue
+                    coordinates = element_coordinates(element)
+                    distance = (
+                        haversine_m(latitude, longitude, *coordinates)
+                        if coordinates is not None else None
+                    )
+                    if distance is not None and distance > radius:
+                        continue
+                    restaurant.distance_m = round(distance, 1) if distance is not None else None
+                    emitted += 1
+                    yield {"event": "restaurant", "restaurant": restaurant}
+        except (OverpassError, UpstreamBusyError, DeadlineExceededError) as e:
+            yield {
+                "event": "summary",
+                "status": "ERROR",
+                "total_results": emitted,
+                "source": "overpass",
+                "error": str(e)
+            }
+            return
+
+        if store:
+            await self._cache_call(
+                self.cache.set,
+                self._cache_key(latitude, longitude, radius),
+                CandidateElements(collected),
+                self._complete_area(area, collected)
+            )
+
+        summary = {
+            "event": "summary",
+            "status": "OK" if emitted else "ZERO_RESULTS",
+            "total_results": emitted,
+            "source": "overpass"
+        }
+        if self.result_cap is not None and received >= self.result_cap:
+            summary["partial"] = True
+        yield summary
+
+    async def search_batch(
+        self,
+        searches: list[dict],
+        cluster_cell_size: float = 0.02,
+        max_concurrency: int = 4
+    ) -> AsyncIterator[tuple[int, dict]]:
+        """
+        Search many locations, yielding each result as soon as it is ready.
+
+        Nearby searches are clustered on a grid and each cluster is answered
+        by one Overpass bounding-box query covering all of its search
+        circles; the results are then ranked and filtered per search. At
+        most max_concurrency cluster queries run at once.
+
+        Args:
+            searches: Dictionaries with the search_nearby_restaurants
+                arguments (latitude, longitude, radius, preferences, limit, offset)
+            cluster_cell_size: Cluster cell size in degrees
+            max_concurrency: Maximum concurrent upstream cluster queries
+
+        Yields:
+            (index into searches, result dictionary) in completion order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_cluster(indices: list[int]) -> list[tuple[int, dict]]:
+            async with semaphore:
+                return await self._search_cluster(searches, indices)
+
+        tasks = [
+            asyncio.create_task(run_cluster(indices))
+            for indices in cluster_searches(searches, cluster_cell_size)
         ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for item in await next_done:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _search_cluster(
+        self,
+        searches: list[dict],
+        indices: list[int]
+    ) -> list[tuple[int, dict]]:
+        """Answer the searches of one cluster from a single shared fetch."""
+        cluster = [searches[i] for i in indices]
+        partial = False
+        indexed = [
+            self._indexed_elements(search["latitude"], search["longitude"], search["radius"])
+            for search in cluster
+        ]
+        try:
+            if all(result is not None for result in indexed):
+                tables = [candidate_table(elements) for elements, _ in indexed]
+            else:
+                # Preferences differ per search, so fetch everything once
+                south, west, north, east = cluster_bbox(cluster)
+                center_lat, center_lon = (south + north) / 2, (west + east) / 2
+                reach = math.ceil(max(
+                    haversine_m(center_lat, center_lon, corner_lat, east)
+                    for corner_lat in (south, north)
+                ))
+                if self._is_tiled(reach):
+                    # As wide as a tiled search, so fetch (and cache) it as tiles
+                    # rather than as one huge query
+                    elements, partial = await self._fetch_tiled(center_lat, center_lon, reach)
+                else:
+                    limit = self.result_cap * len(cluster) if self.result_cap else None
+                    query = build_restaurant_bbox_query(south, west, north, east, limit=limit)
+                    elements = await self._fetch_elements(query)
+                    partial = self._is_truncated(elements, limit)
+                table = CandidateTable(elements)
+                tables = [table] * len(cluster)
+        except (OverpassError, UpstreamBusyError, DeadlineExceededError) as e:
+            error = {"results": [], "status": "ERROR", "error": str(e)}
+            return [(i, dict(error)) for i in indices]
+
+        results = []
+        for i, search, table in zip(indices, cluster, tables):
+            result = self._build_result(
+                table,
+                search["latitude"],
+                search["longitude"],
+                search["radius"],
+                search.get("preferences"),
+                search.get("limit", self.MAX_RESULTS),
+                search.get("offset", 0)
+            )
+            if partial:
+                result["partial"] = True
+            results.append((i, result))
+        return results
+
+    def _build_result(
+        self,
+        table: CandidateTable,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        preferences: Optional[list[str]] = None,
+        limit: int = MAX_RESULTS,
+        offset: int = 0
+    ) -> dict:
+        """
+        Rank candidates for one search and return the requested page.
+
+        Fetched results may cover a larger area than the search (cache cells,
+        batch clusters), so the radius is enforced here. Restaurant
+        records are only built for the rows on the page.
+        """
+        rows, distances = table.rank(latitude, longitude, radius, preferences)
+        page = slice(offset, offset + limit)
+
+        restaurants = []
+        for row, distance in zip(rows[page].tolist(), distances[page].tolist()):
+            restaurant = self._to_restaurant(table.elements[row])
+            restaurant.distance_m = None if math.isnan(distance) else round(distance, 1)
+            restaurants.append(restaurant)
+
+        status = "OK" if restaurants else "ZERO_RESULTS"
+
+        return {
+            "results": restaurants,
+            "status": status,
+            "next_offset": offset + limit if len(rows) > offset + limit else None
+        }
+
+    def _indexed_elements(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> Optional[tuple[list[dict], str]]:
+        """
+        Return elements from the local extract or the ingested areas, if they cover a search.
+
+        Returns:
+            (elements, source) with source "local" or "index", or None when
+            the search has to go to the cache/Overpass
+        """
+        if self.local_index is not None:
+            return self.local_index.query(latitude, longitude, radius), "local"
+        if self.ingester is not None and self.ingester.covers(latitude, longitude, radius):
+            return self.ingester.query(latitude, longitude, radius), "index"
+        return None
+
+    async def fetch_area(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        newer: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Fetch every restaurant in a bounding box from Overpass (used by ingestion).
+
+        Args:
+            south, west, north, east: Bounding box edges in degrees
+            newer: Optional ISO 8601 timestamp; only elements edited after it
+                are returned, including named ones that are no longer
+                restaurants (see build_restaurant_bbox_query)
+
+        Raises:
+            OverpassError: If no server returned a valid response
+        """
+        query = build_restaurant_bbox_query(south, west, north, east, newer=newer)
+        return await self._fetch_elements(query)
+
+    def _is_tiled(self, radius: int) -> bool:
+        """Return True if a search is wide enough to be fetched in tiles."""
+        return self.tile_radius_threshold is not None and radius > self.tile_radius_threshold
+
+    def _tile_grid(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> tuple[float, list[tuple[int, int]]]:
+        """
+        Choose the tiles covering a wide search.
+
+        Tiles are cells of a global grid, so repeated and overlapping
+        searches share (and cache) them. The size doubles from tile_size
+        until at most max_tiles of them overlap the search circle.
+
+        Returns:
+            (tile size in degrees, (row, column) of every overlapping tile)
+        """
+        south, west, north, east = bounding_box(latitude, longitude, radius)
+        size = self.tile_size
+        while True:
+            min_row, min_col = grid_cell(south, west, size)
+            max_row, max_col = grid_cell(north, east, size)
+            tiles = [
+                (row, col)
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if box_intersects_circle(
+                    row * size, col * size, (row + 1) * size, (col + 1) * size,
+                    latitude, longitude, radius
+                )
+            ]
+            if len(tiles) <= self.max_tiles:
+                return size, tiles
+            size *= 2
+
+    async def _fetch_tiled(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> tuple[list[dict], bool]:
+        """
+        Fetch a wide search as concurrent tiles and merge them.
+
+        At most tile_concurrency tiles are fetched at once, and each tile
+        starts at a different mirror so the load is spread across them.
+        Elements are deduplicated by OSM type and id (ways can straddle
+        tile edges). A failed tile leaves a gap rather than failing the
+        search.
+
+        Returns:
+            (elements, True if some tiles failed or were cut off at result_cap)
+
+        Raises:
+            OverpassError: If every tile failed
+            UpstreamBusyError: If every tile was turned away by the upstream budget
+            DeadlineExceededError: If the request deadline passed for every tile
+        """
+        size, tiles = self._tile_grid(latitude, longitude, radius)
+        semaphore = asyncio.Semaphore(self.tile_concurrency)
+
+        async def fetch(index: int, tile: tuple[int, int]) -> list[dict]:
+            async with semaphore:
+                return await self._fetch_tile(size, tile, server_offset=index)
+
+        results = await asyncio.gather(
+            *(fetch(i, tile) for i, tile in enumerate(tiles)), return_exceptions=True
+        )
+
+        merged: dict[tuple[str, int], dict] = {}
+        errors = []
+        truncated = False
+        for result in results:
+            if isinstance(result, (OverpassError, UpstreamBusyError, DeadlineExceededError)):
+                errors.append(result)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            truncated = truncated or self._is_truncated(result)
+            for element in result:
+                merged[(element.get("type"), element.get("id"))] = element
+
+        if errors and len(errors) == len(tiles):
+            for error_type in (UpstreamBusyError, DeadlineExceededError):
+                if all(isinstance(e, error_type) for e in errors):
+                    raise errors[0]
+            raise OverpassError(f"All {len(tiles)} tiles failed. Last error: {errors[-1]}")
+        return list(merged.values()), bool(errors) or truncated
+
+    async def _fetch_tile(
+        self,
+        size: float,
+        tile: tuple[int, int],
+        server_offset: int = 0
+    ) -> list[dict]:
+        """
+        Return the elements of one grid tile, from the cache when possible.
+
+        A tile cut off at result_cap holds an arbitrary part of the tile,
+        so it is used for this search only and not cached.
+        """
+        row, col = tile
+        key = f"tile:{size:g}:{row}:{col}"
+        if self.cache is not None:
+            elements = await self._cache_call(self.cache.get, key)
+            if elements is not None:
+                self._count_tile("cached")
+                return elements
+
+        # Capped like other unfiltered queries, but per tile
+        query = build_restaurant_bbox_query(
+            row * size, col * size, (row + 1) * size, (col + 1) * size,
+            limit=self.result_cap
+        )
+        try:
+            elements = await self._fetch_elements(query, server_offset=server_offset)
+        except (OverpassError, UpstreamBusyError, DeadlineExceededError):
+            self._count_tile("failed")
+            raise
+        if self._is_truncated(elements):
+            self._count_tile("truncated")
+            return elements
+        self._count_tile("fetched")
+        if self.cache is not None:
+            await self._cache_call(self.cache.set, key, elements)
+        return elements
+
+    def _count_tile(self, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.tiles.inc(outcome)
+
+    async def _expand_search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        preferences: Optional[list[str]],
+        needed: int
+    ) -> tuple[list[dict], bool]:
+        """
+        Fetch a search's elements in widening rings until the page can be filled.
+
+        Steps through expansion_policy.radii(radius). Each step covers the
+        disc up to its radius: from a cached area containing it when there
+        is one, otherwise by fetching only the ring beyond the previous
+        step. Once more than `needed` matching restaurants lie within the
+        step's radius, every farther restaurant would rank after them, so
+        the search stops (more than needed, so that next_offset is still
+        set correctly).
+
+        With a cache, rings are fetched unfiltered and the collected disc
+        is stored as a cached area, so repeated and narrower searches
+        around the same spot are answered from it.
+
+        Returns:
+            (elements, True if a ring was cut off at result_cap)
+
+        Raises:
+            OverpassError: If a ring could not be fetched
+            UpstreamBusyError: If no upstream request slot is available
+        """
+        # Cached elements must serve any preferences, so only filter
+        # server-side when nothing is cached
+        query_preferences = preferences if self.cache is None else None
+        collected: dict[tuple, dict] = {}
+        searched = 0
+        fetched = truncated = False
+
+        for step in self.expansion_policy.radii(radius):
+            ring = None
+            if self.cache is not None:
+                ring = await self._contained_elements(latitude, longitude, step)
+            if ring is None:
+                query = build_restaurant_ring_query(
+                    latitude, longitude, searched, step,
+                    preferences=query_preferences, limit=self.result_cap
+                )
+                ring = await self._fetch_elements(
+                    query, preferences=query_preferences, limit=self.result_cap
+                )
+                fetched = True
+                truncated = truncated or self._is_truncated(ring)
+                self._count_expansion("fetched")
+            else:
+                self._count_expansion("cached")
+
+            for element in ring:
+                collected.setdefault((element.get("type"), element.get("id")), element)
+            searched = step
+            elements = CandidateElements(collected.values())
+            rows, _ = candidate_table(elements).rank(latitude, longitude, step, preferences)
+            if len(rows) > needed:
+                break
+
+        if self.cache is not None and fetched and not truncated:
+            key = f"ring:{latitude:.6f}:{longitude:.6f}:{searched}"
+            await self._cache_call(
+                self.cache.set, key, elements, CachedArea(latitude, longitude, searched)
+            )
+        return elements, truncated
+
+    def _count_expansion(self, source: str) -> None:
+        if self.metrics is not None:
+            self.metrics.expansion_steps.inc(source)
+
+    async def _fetch_filtered(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        preferences: Optional[list[str]]
+    ) -> tuple[list[dict], bool]:
+        """
+        Fetch a search's restaurants with its preferences applied by Overpass (not cached).
+
+        Returns:
+            (elements, True if the response was cut off at result_cap)
+        """
+        # Nothing else needs the full result, so stop reading the response
+        # once result_cap matching restaurants have arrived
+        query = self._build_query(latitude, longitude, radius, preferences, limit=self.result_cap)
+        elements = await self._fetch_elements(
+            query, preferences=preferences, limit=self.result_cap
+        )
+        return elements, self._is_truncated(elements)
+
+    async def _get_cached_elements(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> tuple[list[dict], bool]:
+        """
+        Return Overpass elements for a search, using the cache when possible.
+
+        On a miss the query is issued for the whole cache cell: it is centred
+        on the cell and its radius covers the radius bucket from any point in
+        the cell, so every search that maps to this key is served correctly.
+
+        Returns:
+            (elements, True if they came from a stale entry being refreshed)
+        """
+        elements, stale = await self._lookup_cached(latitude, longitude, radius)
+        if elements is not None:
+            return elements, stale
+
+        key = self._cache_key(latitude, longitude, radius)
+        return await self._refresh_cell(key, latitude, longitude, radius), False
+
+    async def _lookup_cached(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> tuple[Optional[list[dict]], bool]:
+        """
+        Look up a search's cache cell, scheduling a refresh for stale entries.
+
+        Stale entries are only served when a background refresher is
+        configured; without one they are treated as misses. When the cell
+        itself is not cached, a fresh entry whose area contains the search
+        circle (e.g. a wider search at the same spot) is used instead.
+
+        Returns:
+            (elements or None on a miss, True if the entry is stale)
+        """
+        key = self._cache_key(latitude, longitude, radius)
+
+        def refresh():
+            return self._refresh_cell(key, latitude, longitude, radius)
+
+        if self.refresher is None:
+            elements = await self._cache_call(self.cache.get, key)
+            if elements is None:
+                elements = await self._contained_elements(latitude, longitude, radius)
+            return elements, False
+
+        cached = await self._cache_call(self.cache.lookup, key)
+        self.refresher.record_access(
+            key, refresh, cached.expires_in if cached is not None else None
+        )
+        if cached is None:
+            return await self._contained_elements(latitude, longitude, radius), False
+        if cached.stale:
+            self.refresher.schedule(key, refresh)
+        return cached.elements, cached.stale
+
+    async def _contained_elements(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> Optional[list[dict]]:
+        """Return the elements near a search from a cached area containing it, if any."""
+        elements = await self._cache_call(
+            self.cache.find_containing, latitude, longitude, radius
+        )
+        if elements is None:
+            return None
+
+        # The containing area can be far wider than the search, so drop what
+        # is clearly outside before ranking (which enforces the exact radius)
+        south, west, north, east = bounding_box(latitude, longitude, radius)
+        nearby = []
+        for element in elements:
+            coordinates = element_coordinates(element)
+            if coordinates is None or (
+                south <= coordinates[0] <= north and west <= coordinates[1] <= east
+            ):
+                nearby.append(element)
+        return nearby
+
+    async def _refresh_cell(
+        self,
+        key: str,
+        latitude: float,
+        longitude: float,
+        radius: int
+    ) -> list[dict]:
+        """Fetch a search's whole cache cell from Overpass and store it under key."""
+        elements = CandidateElements(
+            await self._fetch_elements(self._build_cell_query(latitude, longitude, radius))
+        )
+        area = self._cell_area(latitude, longitude, radius)
+        await self._cache_call(self.cache.set, key, elements, self._complete_area(area, elements))
+        return elements
+
+    async def _cache_call(self, method: Callable[..., T], *args) -> T:
+        """Call a cache method, in a worker thread if the backend blocks on I/O."""
+        if self.cache.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _cache_key(self, latitude: float, longitude: float, radius: int) -> str:
+        """Return the cache key of the cell/radius bucket containing a search."""
+        return make_cache_key(
+            latitude, longitude, radius, self.cache_cell_size, self.cache_radius_bucket
+        )
+
+    def _cell_area(self, latitude: float, longitude: float, radius: int) -> CachedArea:
+        """
+        Return the circle queried for a search's cache cell.
+
+        It is centred on the cell and its radius covers the radius bucket
+        from any point in the cell.
+        """
+        cell = grid_cell(latitude, longitude, self.cache_cell_size)
+        center_lat, center_lon = cell_center(cell, self.cache_cell_size)
+        query_radius = math.ceil(
+            bucket_radius(radius, self.cache_radius_bucket)
+            + cell_half_diagonal(cell, self.cache_cell_size)
+        )
+        return CachedArea(center_lat, center_lon, query_radius)
+
+    def _complete_area(self, area: CachedArea, elements: list[dict]) -> Optional[CachedArea]:
+        """
+        Return area if the elements are every restaurant in it, else None.
+
+        A response cut off at result_cap holds an arbitrary subset of the
+        area, so it must not answer narrower searches inside it.
+        """
+        if self._is_truncated(elements):
+            return None
+        return area
+
+    def _is_truncated(self, elements: list[dict], limit: Optional[int] = None) -> bool:
+        """
+        Return True if a response was cut off at its limit (result_cap by default).
+
+        Overpass sends a capped response in quadtile order, not by
+        distance, so ranking it may miss restaurants nearer than the ones
+        it holds.
+        """
+        limit = self.result_cap if limit is None else limit
+        return limit is not None and len(elements) >= limit
+
+    def _build_cell_query(self, latitude: float, longitude: float, radius: int) -> str:
+        """Build the unfiltered query covering a search's whole cache cell."""
+        area = self._cell_area(latitude, longitude, radius)
+
+        # Preferences are not part of the cache key, so fetch every restaurant
+        # (preference searches whose cell is cut off at result_cap fall back
+        # to a filtered query, see _fetch_filtered)
+        return self._build_query(
+            area.latitude, area.longitude, area.radius, limit=self.result_cap
+        )
+
+    def _build_query(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: int,
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> str:
+        """Build the Overpass QL query for restaurants/cafes/fast_food in a radius."""
+        return build_restaurant_query(
+            latitude, longitude, radius, preferences=preferences, limit=limit
+        )
+
+    async def _fetch_elements(
+        self,
+        query: str,
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None,
+        server_offset: int = 0
+    ) -> list[dict]:
+        """
+        Run a query against Overpass and return the restaurant elements.
+
+        The response is parsed as it streams in and only named nodes/ways are
+        kept. With a limit, only elements matching the preferences are kept
+        and the stream is closed once `limit` of them have arrived.
+
+        Concurrent callers issuing the same request share a single upstream
+        call when a single-flight layer is configured. server_offset rotates
+        the order servers are tried in (to spread concurrent queries).
+
+        Raises:
+            OverpassError: If the query could not be answered
+            UpstreamBusyError: If no upstream request slot is available
+        """
+        async def fetch():
+            async with self._upstream_slot():
+                return await self._fetch_from_servers(query, preferences, limit, server_offset)
+
+        if self.single_flight is not None:
+            key = query if limit is None else f"{limit}|{preferences}|{query}"
+            return await self.single_flight.do(key, fetch)
+        return await fetch()
+
+    async def _fetch_from_servers(
+        self,
+        query: str,
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None,
+        server_offset: int = 0
+    ) -> list[dict]:
+        """
+        Run a query against the Overpass servers and return the raw elements.
+
+        Tries the primary server first, then the fallback servers, either
+        one after another ("sequential") or racing a hedged request to the
+        next server when the current one is slow ("hedged"). With a health
+        tracker, servers are ordered by current health and those with an
+        open circuit breaker are skipped.
+
+        Raises:
+            OverpassError: If the query fails on every server, or a server
+                returns a non-retryable HTTP error
+        """
+        servers_to_try = self._servers_to_try(server_offset)
+
+        if self.fetch_mode == "hedged":
+            return await self._fetch_hedged(query, servers_to_try, preferences, limit)
 
         last_error = None
 
         for server_url in servers_to_try:
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        server_url,
-                        data={"data": query}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                return await self._fetch_from_server(server_url, query, preferences, limit)
+            except Exception as e:
+                # Raises for non-retryable errors, otherwise try next server
+                last_error = self._describe_retryable_error(server_url, e)
 
-                # Parse Overpass response
-                elements = data.get("elements", [])
-                restaurants = self._parse_restaurants(elements, preferences)
+        # All servers failed
+        raise OverpassError(f"All Overpass servers failed. Last error: {last_error}")
 
-                status = "OK" if restaurants else "ZERO_RESULTS"
+    def _upstream_slot(self):
+        """
+        Return a context manager holding an upstream request slot (no-op without a budget).
 
-                return {
-                    "results": restaurants,
-                    "status": status
-                }
+        Within a request deadline, waiting for a slot is limited to the time left.
+        """
+        if self.upstream_budget is None:
+            return nullcontext()
+        deadline = current_deadline()
+        return self.upstream_budget.slot(
+            timeout=deadline.remaining() if deadline is not None else None
+        )
 
-            except httpx.TimeoutException as e:
-                last_error = f"Timeout from {server_url}: {str(e)}"
-                # Try next server
-                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code in [429, 504, 503]:
-                    # Rate limit or server overload - try next server
-                    last_error = f"Server {server_url} unavailable: {e.response.status_code}"
+    def _servers_to_try(self, offset: int = 0) -> list[str]:
+        """
+        Return the primary server then the fallbacks, ordered by health if tracked.
+
+        A non-zero offset rotates the list so that it starts at a later server.
+        """
+        servers_to_try = [self.overpass_url] + [
+            s for s in self.OVERPASS_SERVERS if s != self.overpass_url
+        ]
+        if self.health_tracker is not None:
+            servers_to_try = self.health_tracker.order(servers_to_try)
+        offset %= len(servers_to_try)
+        return servers_to_try[offset:] + servers_to_try[:offset]
+
+    async def _iter_upstream_elements(self, query: str) -> AsyncIterator[dict]:
+        """
+        Yield a query's elements from the first server that answers, as they arrive.
+
+        Servers are tried in order until one starts responding. A failure
+        after elements were already yielded cannot be retried elsewhere
+        without duplicates, so it is raised. The query holds one upstream
+        request slot until the stream is closed.
+
+        Raises:
+            OverpassError: If no server answers, or a response breaks off
+            UpstreamBusyError: If no upstream request slot is available
+            DeadlineExceededError: If the request deadline passes first
+        """
+        async with self._upstream_slot():
+            last_error = None
+
+            for server_url in self._servers_to_try():
+                if self.health_tracker is not None:
+                    self.health_tracker.record_attempt(server_url)
+                started = time.monotonic()
+                emitted = 0
+                try:
+                    async with aclosing(self._stream_elements(server_url, query)) as stream:
+                        async for element in stream:
+                            emitted += 1
+                            yield element
+                except GeneratorExit:
+                    # The consumer had enough and stopped reading: the server
+                    # did answer, so this still counts as a success
+                    self._record_stream_success(server_url, started, emitted)
+                    raise
+                except Exception as e:
+                    if self.metrics is not None:
+                        self.metrics.record_upstream(server_url, time.monotonic() - started, e)
+                    if self.health_tracker is not None and self._is_server_failure(e):
+                        self.health_tracker.record_failure(server_url, e)
+                    deadline = current_deadline()
+                    if isinstance(e, DeadlineExceededError):
+                        raise
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExceededError("Request deadline exceeded") from e
+                    if emitted:
+                        raise OverpassError(
+                            f"Response from {server_url} broke off: {str(e)}"
+                        ) from e
+                    # Raises for non-retryable errors, otherwise try next server
+                    last_error = self._describe_retryable_error(server_url, e)
                     continue
+
+                self._record_stream_success(server_url, started, emitted)
+                return
+
+            # All servers failed
+            raise OverpassError(f"All Overpass servers failed. Last error: {last_error}")
+
+    def _record_stream_success(self, server_url: str, started: float, emitted: int) -> None:
+        """Record a streamed response from server_url in the metrics and health tracker."""
+        if self.metrics is not None:
+            self.metrics.record_upstream(
+                server_url, time.monotonic() - started, element_count=emitted
+            )
+        if self.health_tracker is not None:
+            self.health_tracker.record_success(server_url, time.monotonic() - started)
+
+    async def _fetch_hedged(
+        self,
+        query: str,
+        servers_to_try: list[str],
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Race Overpass servers with hedged requests.
+
+        Sends the query to the first server; if no answer arrives within the
+        hedge delay (or the request fails), the next server is queried too.
+        The first successful response wins and the other requests are
+        cancelled.
+        """
+        remaining = list(servers_to_try)
+        pending: dict[asyncio.Task, str] = {}
+        last_error = None
+
+        def launch_next() -> None:
+            server_url = remaining.pop(0)
+            task = asyncio.create_task(
+                self._fetch_from_server(server_url, query, preferences, limit)
+            )
+            pending[task] = server_url
+
+        launch_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self._hedge_delay() if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Current requests are slow - hedge with the next server
+                    launch_next()
+                    continue
+
+                for task in done:
+                    server_url = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    last_error = self._describe_retryable_error(server_url, error)
+
+                if remaining and len(pending) == 0:
+                    launch_next()
+        finally:
+            # Cancel the losers
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        # All servers failed
+        raise OverpassError(f"All Overpass servers failed. Last error: {last_error}")
+
+    def _hedge_delay(self) -> float:
+        """
+        Return how long to wait for a server before hedging to the next one.
+
+        Uses the configured percentile of recent upstream latencies once
+        enough samples exist, otherwise the fixed hedge delay.
+        """
+        if (
+            self.hedge_percentile is not None
+            and self.latency_window is not None
+            and len(self.latency_window) >= self.MIN_HEDGE_SAMPLES
+        ):
+            return self.latency_window.percentile(self.hedge_percentile)
+        return self.hedge_delay
+
+    async def _fetch_from_server(
+        self,
+        server_url: str,
+        query: str,
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Fetch the elements for a query from one server, recording its health.
+
+        Within a request deadline the attempt only gets the time left.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before the server answers
+        """
+        budget = remaining_timeout(self.timeout)
+        deadline = current_deadline()
+        if self.health_tracker is not None:
+            self.health_tracker.record_attempt(server_url)
+
+        in_flight = (
+            self.metrics.upstream_in_flight.track_inprogress()
+            if self.metrics is not None else nullcontext()
+        )
+        started = time.monotonic()
+        try:
+            with in_flight:
+                try:
+                    async with asyncio.timeout(budget if deadline is not None else None):
+                        elements = await self._collect_elements(
+                            server_url, query, preferences, limit
+                        )
+                except TimeoutError as e:
+                    raise DeadlineExceededError(
+                        f"Request deadline exceeded waiting for {server_url}"
+                    ) from e
+        except asyncio.CancelledError as e:
+            # Typically a hedged request that lost the race
+            if self.metrics is not None:
+                self.metrics.record_upstream(server_url, time.monotonic() - started, e)
+            raise
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.record_upstream(server_url, time.monotonic() - started, e)
+            if self.health_tracker is not None and self._is_server_failure(e):
+                self.health_tracker.record_failure(server_url, e)
+            raise
+        latency = time.monotonic() - started
+        if self.metrics is not None:
+            self.metrics.record_upstream(server_url, latency, element_count=len(elements))
+
+        if self.latency_window is not None:
+            self.latency_window.record(latency)
+        if self.health_tracker is not None:
+            self.health_tracker.record_success(server_url, latency)
+        return elements
+
+    async def _collect_elements(
+        self,
+        server_url: str,
+        query: str,
+        preferences: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Stream a query's response and keep the elements worth parsing.
+
+        Elements that can never become a restaurant (unnamed, relations,
+        way nodes) are dropped as they arrive, and the rest are trimmed to
+        the fields searches use. With a limit, elements not matching the
+        preferences are dropped too, and reading stops once `limit`
+        elements have been kept.
+
+        With a parse executor, once a response is known to be larger than
+        parse_offload_bytes (by Content-Length, or once that much has
+        arrived), the rest of it is handed to the executor in batches of
+        about parse_offload_bytes, so a huge payload neither blocks the
+        event loop nor has to be held in memory whole, and a limited fetch
+        still stops reading once enough elements have been kept. Smaller
+        responses are parsed inline as they arrive, as is everything when
+        the executor is broken or shut down.
+        """
+        selected = []
+        async with self._post_query(server_url, query) as response:
+            expected = int(response.headers.get("content-length") or 0)
+            parser = ElementStreamParser()
+            decode_seconds = 0.0
+            batch: list[str] = []
+            batch_size = 0
+            full = False
+            async for chunk in response.aiter_text():
+                decode_started = time.perf_counter()
+                if self._should_offload(max(expected, response.num_bytes_downloaded)):
+                    batch.append(chunk)
+                    batch_size += len(chunk)
+                    if batch_size < self.parse_offload_bytes:
+                        continue
+                    parser, full = await self._parse_offloaded(
+                        parser, "".join(batch), preferences, limit, selected
+                    )
+                    batch, batch_size = [], 0
                 else:
-                    # Other HTTP error - return immediately
-                    return {
-                        "results": [],
-                        "status": "ERROR",
-                        "error": str(e)
-                    }
-            except Exception as e:
-                last_error = str(e)
+                    full = self._select_elements(parser.feed(chunk), preferences, limit, selected)
+                decode_seconds += time.perf_counter() - decode_started
+                if full:
+                    break
+
+            if batch and not full:
+                decode_started = time.perf_counter()
+                parser, full = await self._parse_offloaded(
+                    parser, "".join(batch), preferences, limit, selected
+                )
+                decode_seconds += time.perf_counter() - decode_started
+            if not full:
+                parser.close()
+            self._observe_decode(decode_seconds)
+        return selected
+
+    async def _parse_offloaded(
+        self,
+        parser: ElementStreamParser,
+        text: str,
+        preferences: Optional[list[str]],
+        limit: Optional[int],
+        selected: list[dict]
+    ) -> tuple[ElementStreamParser, bool]:
+        """
+        Parse a batch of a response in the parse executor (see _collect_elements).
+
+        With a process pool the parser travels to the worker and back
+        pickled, so the parser to continue with is the one returned.
+
+        Returns:
+            The parser holding the unparsed tail, and True once selected
+            holds `limit` elements
+        """
+        remaining = None if limit is None else limit - len(selected)
+        try:
+            batch, parser = await asyncio.get_running_loop().run_in_executor(
+                self.parse_executor, _parse_batch, parser, text, preferences, remaining
+            )
+        except (BrokenExecutor, RuntimeError):
+            # The pool is broken or shut down, which is no fault of the
+            # server: parse here rather than fail the attempt
+            batch, parser = _parse_batch(parser, text, preferences, remaining)
+        selected += batch
+        return parser, limit is not None and len(selected) >= limit
+
+    def _should_offload(self, size: int) -> bool:
+        """Return True if a response of size bytes is parsed in the executor."""
+        return (
+            self.parse_executor is not None
+            and self.parse_offload_bytes is not None
+            and size > self.parse_offload_bytes
+        )
+
+    def _select_elements(
+        self,
+        elements: Iterable[dict],
+        preferences: Optional[list[str]],
+        limit: Optional[int],
+        selected: list[dict]
+    ) -> bool:
+        """
+        Append the compacted elements worth keeping to selected (see _collect_elements).
+
+        Returns:
+            True once selected holds `limit` elements
+        """
+        for element in elements:
+            if limit is None:
+                if self._is_candidate(element):
+                    selected.append(compact_element(element))
                 continue
 
-        # All servers failed
-        return {
-            "results": [],
-            "status": "ERROR",
-            "error": f"All Overpass servers failed. Last error: {last_error}"
-        }
-    
+            if self._to_restaurant(element, preferences) is not None:
+                selected.append(compact_element(element))
+                if len(selected) >= limit:
+                    return True
+        return False
+
+    def _observe_decode(self, seconds: float) -> None:
+        if self.metrics is not None:
+            self.metrics.stage_seconds.observe(seconds, "decode")
+
+    async def _stream_elements(self, server_url: str, query: str) -> AsyncIterator[dict]:
+        """
+        POST an Overpass QL query to a server and yield elements as they arrive.
+
+        Closing the generator early closes the response without reading
+        the rest of the body.
+
+        Raises:
+            DeadlineExceededError: If the request deadline passes mid-stream
+        """
+        deadline = current_deadline()
+        async with self._post_query(server_url, query) as response:
+            parser = ElementStreamParser()
+            decode_seconds = 0.0
+            async for chunk in response.aiter_text():
+                # The HTTP timeout only bounds each read, so a response that
+                # keeps trickling in is cut off here instead
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceededError("Request deadline exceeded")
+                # Decode the whole chunk before yielding so the time spent in
+                # the parser is not mixed up with the consumer's
+                decode_started = time.perf_counter()
+                elements = list(parser.feed(chunk))
+                decode_seconds += time.perf_counter() - decode_started
+                for element in elements:
+                    yield element
+            parser.close()
+            self._observe_decode(decode_seconds)
+
+    @asynccontextmanager
+    async def _post_query(self, server_url: str, query: str) -> AsyncIterator[httpx.Response]:
+        """
+        POST an Overpass QL query to a server and yield the unread, streamed response.
+
+        Reuses the shared connection pool when a client was injected, so
+        repeated searches skip the TCP/TLS handshake. The query's
+        server-side [timeout:] is set to the HTTP timeout, and within a
+        request deadline both are cut down to the time left.
+
+        Raises:
+            httpx.HTTPStatusError: If the server answered with an error status
+            DeadlineExceededError: If the request deadline has already passed
+        """
+        timeout = remaining_timeout(self.timeout)
+        query = with_timeout(query, max(1, math.floor(timeout)))
+        async with AsyncExitStack() as stack:
+            client = self.client
+            if client is None:
+                client = await stack.enter_async_context(
+                    httpx.AsyncClient(timeout=timeout)
+                )
+            response = await stack.enter_async_context(client.stream(
+                "POST",
+                server_url,
+                data={"data": query},
+                timeout=timeout
+            ))
+            response.raise_for_status()
+            yield response
+
+    @staticmethod
+    def _is_server_failure(error: Exception) -> bool:
+        """Return True if an error reflects on the server rather than the query."""
+        if isinstance(error, DeadlineExceededError):
+            return False
+        if isinstance(error, httpx.TimeoutException):
+            # A timeout cut short by the request deadline says nothing about the server
+            deadline = current_deadline()
+            return deadline is None or not deadline.expired
+        if isinstance(error, httpx.HTTPStatusError):
+            code = error.response.status_code
+            return code == 429 or code >= 500
+        return True
+
+    def _describe_retryable_error(self, server_url: str, error: BaseException) -> str:
+        """
+        Describe a failed server attempt that may be retried on another server.
+
+        Raises:
+            OverpassError: If the error is not worth retrying elsewhere
+            DeadlineExceededError: If the request deadline has passed
+        """
+        if isinstance(error, DeadlineExceededError):
+            raise error
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired:
+            # No time left for another server
+            raise DeadlineExceededError("Request deadline exceeded") from error
+        if isinstance(error, httpx.TimeoutException):
+            return f"Timeout from {server_url}: {str(error)}"
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code in [429, 504, 503]:
+                # Rate limit or server overload - try next server
+                return f"Server {server_url} unavailable: {error.response.status_code}"
+            # Other HTTP error - give up immediately
+            raise OverpassError(str(error)) from error
+        return str(error)
+
     def _parse_restaurants(
         self,
-        elements: list[dict],
+        elements: Iterable[dict],
         preferences: Optional[list[str]] = None,
-        max_results: int = 10
-    ) -> list[dict]:
+        max_results: int = MAX_RESULTS
+    ) -> list[RestaurantRecord]:
         """
-        Parse Overpass API elements into restaurant objects.
+        Parse Overpass API elements into restaurant records.
 
         Args:
-            elements: List of OSM elements from Overpass API
+            elements: OSM elements from Overpass API (any iterable; consumed lazily)
             preferences: Optional list of cuisine preferences to filter by
             max_results: Maximum number of restaurants to return (default: 10)
 
         Returns:
-            List of restaurant dictionaries (limited to max_results)
+            List of restaurant records (limited to max_results)
         """
-        restaurants = []
+        return list(islice(self._iter_restaurants(elements, preferences), max_results))
 
+    def _iter_restaurants(
+        self,
+        elements: Iterable[dict],
+        preferences: Optional[list[str]] = None
+    ) -> Iterator[RestaurantRecord]:
+        """Lazily yield restaurant records for elements matching preferences."""
         for element in elements:
-            # Stop if we've reached the maximum number of results
-            if len(restaurants) >= max_results:
-                break
+            restaurant = self._to_restaurant(element, preferences)
+            if restaurant is not None:
+                yield restaurant
 
-            # Only process nodes and ways (not relations)
-            if element.get("type") not in ["node", "way"]:
-                continue
-
-            tags = element.get("tags", {})
+    @staticmethod
+    def _is_candidate(element: dict) -> bool:
+        """Return True if an element can be turned into a restaurant."""
+        # Only process named nodes and ways (not relations)
+        return element.get("type") in ["node", "way"] and "name" in element.get("tags", {})
 
-            # Skip if no name
-            if "name" not in tags:
-                continue
+    def _to_restaurant(
+        self,
+        element: dict,
+        preferences: Optional[list[str]] = None
+    ) -> Optional[RestaurantRecord]:
+        """
+        Convert one OSM element into a restaurant record.
 
-            # Extract restaurant data (only fields that match the Restaurant model)
-            restaurant = {
-                "name": tags.get("name", "Unknown"),
-                "place_id": f"osm_{element.get('type')}_{element.get('id')}",
-                "vicinity": self._build_address(tags),
-                "rating": None,  # OSM doesn't have ratings
-                "types": self._extract_types(tags),
-                "user_ratings_total": None,
-                "price_level": None,
-                "opening_hours": tags.get("opening_hours"),
-            }
+        Returns:
+            Restaurant record, or None if the element is not a named
+            restaurant or does not match the preferences
+        """
+        if not self._is_candidate(element):
+            return None
 
-            # Store cuisine for preference matching (not in the model, just for filtering)
-            cuisine = tags.get("cuisine", "").split(";") if tags.get("cuisine") else []
-            restaurant["_cuisine"] = cuisine  # Temporary field for filtering
+        tags = element["tags"]
 
-            # Filter by preferences if provided
-            if preferences and not self._matches_preferences(restaurant, preferences):
-                continue
+        restaurant = RestaurantRecord(
+            name=tags.get("name", "Unknown"),
+            place_id=f"osm_{element.get('type')}_{element.get('id')}",
+            vicinity=self._build_address(tags),
+            types=self._extract_types(tags),
+            opening_hours=tags.get("opening_hours"),
+            cuisine=tags["cuisine"].split(";") if tags.get("cuisine") else []
+        )
 
-            # Remove temporary fields before adding to results
-            if "_cuisine" in restaurant:
-                del restaurant["_cuisine"]
+        # Filter by preferences if provided
+        if preferences and not self._matches_preferences(restaurant, preferences):
+            return None
 
-            restaurants.append(restaurant)
+        return restaurant
 
-        return restaurants
-    
     def _build_address(self, tags: dict) -> str:
         """Build address string from OSM tags."""
         parts = []
@@ -198,40 +1549,37 @@ class RestaurantService:
 
         return types
 
-    def _matches_preferences(self, restaurant: dict, preferences: list[str]) -> bool:
+    def _matches_preferences(self, restaurant: RestaurantRecord, preferences: list[str]) -> bool:
         """
         Check if restaurant matches user preferences.
 
         Args:
-            restaurant: Restaurant dictionary
+            restaurant: Restaurant record
             preferences: List of preference keywords (e.g., ['italian', 'pizza', 'vegetarian'])
 
         Returns:
-            True if restaurant matches any preference, False otherwise
+            True if restaurant matches any preference (or a synonym), False otherwise
         """
         if not preferences:
             return True
 
-        # Normalize preferences to lowercase
-        normalized_prefs = [p.lower() for p in preferences]
-
-        # Check cuisine (using temporary _cuisine field)
-        cuisines = [c.lower() for c in restaurant.get("_cuisine", [])]
-        for pref in normalized_prefs:
-            if any(pref in cuisine for cuisine in cuisines):
-                return True
+        matcher = PreferenceMatcher.for_preferences(tuple(preferences))
+        return matcher.matches(restaurant.cuisine, restaurant.types, restaurant.name)
 
-        # Check types
-        types = [t.lower() for t in restaurant.get("types", [])]
-        for pref in normalized_prefs:
-            if any(pref in type_ for type_ in types):
-                return True
 
-        # Check name
-        name = restaurant.get("name", "").lower()
-        for pref in normalized_prefs:
-            if pref in name:
-                return True
-
-        return False
+def _parse_batch(
+    parser: ElementStreamParser,
+    text: str,
+    preferences: Optional[list[str]],
+    limit: Optional[int]
+) -> tuple[list[dict], ElementStreamParser]:
+    """
+    Parse a batch of a response in a parse executor worker.
 
+    Runs in another process with a process pool, so the parser arrives
+    pickled and only the selected (compacted) elements and the parser's
+    unparsed tail are sent back.
+    """
+    selected = []
+    RestaurantService()._select_elements(parser.feed(text), preferences, limit, selected)
+    return selected, parser
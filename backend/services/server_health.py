@@ -0,0 +1,171 @@
+"""
+Health tracking and circuit breaking for Overpass mirrors.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import httpx
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class ServerHealth:
+    """Health state of a single Overpass server."""
+
+    url: str
+    latency_ewma: Optional[float] = None
+    error_rate: float = 0.0  # EWMA of failures (0 = healthy, 1 = always failing)
+    requests: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    rate_limited: int = 0
+    consecutive_failures: int = 0
+    state: str = CLOSED
+    opened_at: Optional[float] = None
+    probe_started_at: Optional[float] = None
+    last_error: Optional[str] = None
+    last_success_at: Optional[float] = None
+
+
+@dataclass
+class ServerHealthTracker:
+    """
+    Shared per-server health record with a circuit breaker.
+
+    A server's circuit opens after `failure_threshold` consecutive failures
+    and stays open for `open_seconds`. After that a single probe request is
+    let through (half-open); success closes the circuit, failure re-opens it.
+    """
+
+    servers: list[str] = field(default_factory=list)
+    failure_threshold: int = 3
+    open_seconds: float = 30.0
+    alpha: float = 0.2
+    # Seconds of latency a 100% error rate is worth when ranking servers
+    error_penalty_seconds: float = 30.0
+    clock: Callable[[], float] = time.monotonic
+
+    def __post_init__(self):
+        self._health: dict[str, ServerHealth] = {}
+        for url in self.servers:
+            self._get(url)
+
+    def order(self, servers: list[str]) -> list[str]:
+        """
+        Order servers by current health, skipping those with an open circuit.
+
+        Servers with no history keep their configured order. If every circuit
+        is open, all servers are returned so requests still have a chance.
+        """
+        available = [url for url in servers if self.is_available(url)]
+        if not available:
+            return list(servers)
+        return sorted(available, key=self._score)
+
+    def is_available(self, url: str) -> bool:
+        """Return True if requests may currently be sent to the server."""
+        health = self._get(url)
+        state = self._refresh_state(health)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            # Allow one probe at a time; a stuck probe is retried after the cooldown
+            return (
+                health.probe_started_at is None
+                or self.clock() - health.probe_started_at >= self.open_seconds
+            )
+        return False
+
+    def record_attempt(self, url: str) -> None:
+        """Record that a request to the server is starting."""
+        health = self._get(url)
+        health.requests += 1
+        if self._refresh_state(health) == HALF_OPEN:
+            health.probe_started_at = self.clock()
+
+    def record_success(self, url: str, latency: float) -> None:
+        """Record a successful response and its latency in seconds."""
+        health = self._get(url)
+        health.latency_ewma = (
+            latency if health.latency_ewma is None
+            else self.alpha * latency + (1 - self.alpha) * health.latency_ewma
+        )
+        health.error_rate *= 1 - self.alpha
+        health.consecutive_failures = 0
+        health.last_success_at = self.clock()
+        health.state = CLOSED
+        health.opened_at = None
+        health.probe_started_at = None
+
+    def record_failure(self, url: str, error: BaseException) -> None:
+        """Record a failed request and open the circuit if needed."""
+        health = self._get(url)
+        health.failures += 1
+        if isinstance(error, httpx.TimeoutException):
+            health.timeouts += 1
+        elif (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code == 429
+        ):
+            health.rate_limited += 1
+        health.error_rate = self.alpha + (1 - self.alpha) * health.error_rate
+        health.consecutive_failures += 1
+        health.last_error = str(error) or type(error).__name__
+
+        if (
+            self._refresh_state(health) == HALF_OPEN
+            or health.consecutive_failures >= self.failure_threshold
+        ):
+            health.state = OPEN
+            health.opened_at = self.clock()
+            health.probe_started_at = None
+
+    def snapshot(self) -> list[dict]:
+        """Return the health of every known server, best first."""
+        result = []
+        for url in sorted(self._health, key=self._score):
+            health = self._health[url]
+            state = self._refresh_state(health)
+            result.append({
+                "url": url,
+                "state": state,
+                "available": self.is_available(url),
+                "latency_ewma_ms": (
+                    round(health.latency_ewma * 1000, 1)
+                    if health.latency_ewma is not None else None
+                ),
+                "error_rate": round(health.error_rate, 3),
+                "requests": health.requests,
+                "failures": health.failures,
+                "timeouts": health.timeouts,
+                "rate_limited": health.rate_limited,
+                "consecutive_failures": health.consecutive_failures,
+                "last_error": health.last_error,
+            })
+        return result
+
+    def _get(self, url: str) -> ServerHealth:
+        health = self._health.get(url)
+        if health is None:
+            health = self._health[url] = ServerHealth(url=url)
+        return health
+
+    def _refresh_state(self, health: ServerHealth) -> str:
+        """Move an open circuit to half-open once its cooldown has passed."""
+        if (
+            health.state == OPEN
+            and self.clock() - health.opened_at >= self.open_seconds
+        ):
+            health.state = HALF_OPEN
+            health.probe_started_at = None
+        return health.state
+
+    def _score(self, url: str) -> float:
+        health = self._get(url)
+        latency = health.latency_ewma or 0.0
+        return latency + health.error_rate * self.error_penalty_seconds
@@ -0,0 +1,116 @@
+"""
+Request coalescing ("single-flight") for concurrent identical calls.
+"""
+import asyncio
+import contextvars
+import copy
+from typing import Any, Awaitable, Callable, Optional
+
+from services.deadline import Deadline, DeadlineExceededError, current_deadline, deadline_scope
+
+
+class SingleFlight:
+    """
+    Share one in-flight call among concurrent callers with the same key.
+
+    The first caller for a key starts the work as a task; callers that
+    arrive while it is running await the same task instead of starting
+    their own. Once the task finishes the key is released, so later calls
+    run fresh. If every caller waiting on a task is cancelled (e.g. their
+    clients disconnected or their deadlines passed), the task is cancelled
+    too rather than finishing work nobody will read.
+
+    The shared task runs outside any caller's request context, under a
+    deadline of its own: the latest deadline among the callers waiting on
+    it (none if any of them has none). Each caller still stops waiting
+    when its own deadline passes. If a caller joining later moves the
+    shared deadline out while an attempt is cut short by the earlier one,
+    the work is retried with the time now left.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Number of callers currently awaiting each task
+        self._waiters: dict[asyncio.Task, int] = {}
+        # Shared deadline of each task (absent if it runs without one)
+        self._deadlines: dict[asyncio.Task, Deadline] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn for key, or join the call already in flight for key.
+
+        Args:
+            key: Identity of the call (e.g. the Overpass query string)
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            The result of the shared call (exceptions propagate to all callers)
+
+        Raises:
+            DeadlineExceededError: If the caller's deadline passes first
+        """
+        deadline = current_deadline()
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            shared = copy.copy(deadline)
+            task = asyncio.get_running_loop().create_task(
+                self._run(fn, shared), context=contextvars.Context()
+            )
+            self._inflight[key] = task
+            if shared is not None:
+                self._deadlines[task] = shared
+            task.add_done_callback(lambda t: self._release(key, t))
+        else:
+            self.coalesced += 1
+            if task in self._deadlines:
+                self._deadlines[task].extend(deadline)
+
+        # Shield the shared task so one cancelled caller does not cancel
+        # the work for everybody else waiting on it.
+        timeout = asyncio.timeout(deadline.remaining() if deadline is not None else None)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            async with timeout:
+                return await asyncio.shield(task)
+        except TimeoutError as e:
+            if timeout.expired():
+                raise DeadlineExceededError("Request deadline exceeded") from e
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Forget the key now rather than once the task has
+                    # finished cancelling, so new callers start afresh
+                    # instead of joining a task that is about to be cancelled
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+                    task.cancel()
+
+    @staticmethod
+    async def _run(fn: Callable[[], Awaitable[Any]], deadline: Optional[Deadline]) -> Any:
+        """Run fn under the shared deadline, retrying if a later caller extended it."""
+        with deadline_scope(deadline):
+            while True:
+                expires_at = deadline.expires_at if deadline is not None else None
+                try:
+                    return await fn()
+                except DeadlineExceededError:
+                    if deadline is None or deadline.expires_at == expires_at:
+                        raise
+
+    def in_flight(self) -> int:
+        """Return the number of distinct calls currently running."""
+        return len(self._inflight)
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        self._deadlines.pop(task, None)
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
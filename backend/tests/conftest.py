@@ -5,7 +5,9 @@ import pytest
 from fastapi.testclient import TestClient
 from main import app
 
+
 @pytest.fixture
 def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
\ No newline at end of file
+    """Create a test client for the FastAPI app (runs the app lifespan)."""
+    with TestClient(app) as test_client:
+        yield test_client
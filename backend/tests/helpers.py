@@ -0,0 +1,13 @@
+"""
+Shared test helpers.
+"""
+
+
+class FakeClock:
+    """Manually advanced clock for tests of timeouts, expiry and scheduling."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
@@ -0,0 +1,144 @@
+"""
+Unit tests for per-client rate limiting and the upstream request budget.
+
+Run all admission tests:
+    pytest tests/test_admission.py -v
+"""
+import asyncio
+
+import pytest
+from services.admission import (
+    ClientRateLimiter,
+    UpstreamBudget,
+    UpstreamBusyError,
+    search_cost,
+)
+from services.deadline import DeadlineExceededError
+from tests.helpers import FakeClock
+
+
+def test_search_cost_grows_with_area():
+    """Test that searches cost one token up to the unit radius, then by area."""
+    assert search_cost(1500, 2500) == 1.0
+    assert search_cost(2500, 2500) == 1.0
+    assert search_cost(5000, 2500) == 4.0
+    assert search_cost(25000, 2500) == 100.0
+
+
+class TestClientRateLimiter:
+    """Tests for ClientRateLimiter."""
+
+    def test_rejects_once_bucket_is_empty_and_refills_over_time(self):
+        """Test that a client is limited to its capacity, then its refill rate."""
+        clock = FakeClock()
+        limiter = ClientRateLimiter(capacity=3, refill_per_second=1.0, clock=clock)
+
+        assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("a") == pytest.approx(1.0)
+
+        clock.now = 1.0
+        assert limiter.acquire("a") == 0.0
+        assert limiter.stats()["rejected"] == 1
+
+    def test_clients_have_separate_buckets(self):
+        """Test that one client running out does not limit another."""
+        limiter = ClientRateLimiter(capacity=1, refill_per_second=0.1, clock=FakeClock())
+
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0.0
+
+    def test_expensive_requests_use_more_tokens(self):
+        """Test that cost is charged and capped at the bucket capacity."""
+        limiter = ClientRateLimiter(capacity=10, refill_per_second=1.0, clock=FakeClock())
+
+        assert limiter.acquire("a", cost=100) == 0.0
+        assert limiter.acquire("a", cost=4) == pytest.approx(4.0)
+
+    def test_least_recently_seen_clients_are_forgotten(self):
+        """Test that the client table is bounded."""
+        limiter = ClientRateLimiter(
+            capacity=1, refill_per_second=0.1, max_clients=2, clock=FakeClock()
+        )
+
+        limiter.acquire("a")
+        limiter.acquire("b")
+        limiter.acquire("c")
+
+        assert limiter.stats()["clients"] == 2
+        # "a" was evicted, so it starts over with a full bucket
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("c") > 0
+
+
+class TestUpstreamBudget:
+    """Tests for UpstreamBudget."""
+
+    @pytest.mark.asyncio
+    async def test_queued_callers_run_when_a_slot_frees(self):
+        """Test that callers beyond the limit wait for a slot."""
+        budget = UpstreamBudget(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+        order = []
+
+        async def hold():
+            async with budget.slot():
+                order.append("first")
+                await release.wait()
+
+        async def wait_for_slot():
+            async with budget.slot():
+                order.append("second")
+
+        first = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0)
+        assert budget.stats()["waiting"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert order == ["first", "second"]
+        assert budget.stats()["active"] == 0
+        assert budget.stats()["queued"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_immediately_when_queue_is_full(self):
+        """Test the fast failure once every slot and queue place is taken."""
+        budget = UpstreamBudget(max_concurrent=1, max_queued=0)
+
+        async with budget.slot():
+            with pytest.raises(UpstreamBusyError):
+                async with budget.slot():
+                    pass
+
+        assert budget.stats()["rejected"] == 1
+        # The slot is free again afterwards
+        async with budget.slot():
+            pass
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_queue_timeout(self):
+        """Test that queued callers fail once they have waited too long."""
+        budget = UpstreamBudget(max_concurrent=1, max_queued=5, queue_timeout=0.01)
+
+        async with budget.slot():
+            with pytest.raises(UpstreamBusyError):
+                async with budget.slot():
+                    pass
+
+        assert budget.stats()["timed_out"] == 1
+        assert budget.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_caller_timeout_shortens_the_queue_wait(self):
+        """Test that a caller with little time left gives up before the queue timeout."""
+        budget = UpstreamBudget(max_concurrent=1, max_queued=5, queue_timeout=10.0)
+
+        async with budget.slot():
+            with pytest.raises(DeadlineExceededError):
+                await asyncio.wait_for(budget.slot(timeout=0.01).__aenter__(), 1.0)
+
+        assert budget.stats()["timed_out"] == 0
+        assert budget.stats()["waiting"] == 0
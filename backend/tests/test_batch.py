@@ -0,0 +1,115 @@
+"""
+Unit tests for batched restaurant searches.
+
+Run all batch tests:
+    pytest tests/test_batch.py -v
+"""
+import httpx
+import pytest
+from services.batch import cluster_bbox, cluster_searches
+from services.cache import InMemoryCache
+from services.restaurant_service import RestaurantService
+
+
+def search(latitude, longitude, radius=500, **kwargs):
+    """Build a batch search dictionary."""
+    return {"latitude": latitude, "longitude": longitude, "radius": radius, **kwargs}
+
+
+class TestClustering:
+    """Tests for cluster_searches and cluster_bbox."""
+
+    def test_nearby_searches_share_a_cluster(self):
+        """Test that points in the same cell are grouped."""
+        searches = [search(40.751, -73.981), search(40.752, -73.982), search(41.5, -73.0)]
+
+        clusters = cluster_searches(searches, cell_size=0.02)
+
+        assert sorted(clusters) == [[0, 1], [2]]
+
+    def test_bbox_covers_every_circle(self):
+        """Test that the cluster box contains each search circle."""
+        south, west, north, east = cluster_bbox(
+            [search(40.0, -74.0, radius=1000), search(40.01, -73.99, radius=100)]
+        )
+
+        assert south < 40.0 - 0.008 and north > 40.01
+        assert west < -74.0 - 0.01 and east > -73.99
+
+
+class TestSearchBatch:
+    """Tests for RestaurantService.search_batch."""
+
+    @pytest.mark.asyncio
+    async def test_one_query_per_cluster_and_results_per_search(self):
+        """Test that clustered searches share a query but are ranked individually."""
+        queries = []
+        elements = [
+            {"type": "node", "id": 1, "lat": 40.7510, "lon": -73.9810,
+             "tags": {"name": "Pizza Place", "amenity": "restaurant", "cuisine": "pizza"}},
+            {"type": "node", "id": 2, "lat": 40.7520, "lon": -73.9820,
+             "tags": {"name": "Noodle Bar", "amenity": "restaurant", "cuisine": "chinese"}},
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            queries.append(request.content)
+            return httpx.Response(200, json={"elements": elements})
+
+        searches = [
+            search(40.7510, -73.9810, radius=50),
+            search(40.7520, -73.9820, radius=2000, preferences=["chinese"]),
+            search(41.5000, -73.0000, radius=50),
+        ]
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            results = dict([item async for item in service.search_batch(searches)])
+
+        assert len(queries) == 2
+        assert [r["name"] for r in results[0]["results"]] == ["Pizza Place"]
+        assert [r["name"] for r in results[1]["results"]] == ["Noodle Bar"]
+        assert results[2]["status"] == "ZERO_RESULTS"
+
+    @pytest.mark.asyncio
+    async def test_cluster_failure_is_reported_per_search(self):
+        """Test that an upstream failure marks every search of the cluster."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(400)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            results = [
+                item async for item in service.search_batch(
+                    [search(40.0, -74.0), search(40.001, -74.001)]
+                )
+            ]
+
+        assert sorted(index for index, _ in results) == [0, 1]
+        assert all(result["status"] == "ERROR" for _, result in results)
+
+    @pytest.mark.asyncio
+    async def test_wide_cluster_is_fetched_as_cached_tiles(self):
+        """Test that a cluster as wide as a tiled search is not one huge query."""
+        queries = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            queries.append(request.content)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": "Diner", "amenity": "restaurant"}},
+            ]})
+
+        searches = [search(40.0, -74.0, radius=6000), search(40.001, -74.001, radius=6000)]
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, cache=InMemoryCache(), tile_radius_threshold=5000, tile_size=0.05
+            )
+            first = dict([item async for item in service.search_batch(searches)])
+            tile_queries = len(queries)
+            second = dict([item async for item in service.search_batch(searches)])
+
+        assert tile_queries > 1
+        # The second batch is served from the cached tiles
+        assert len(queries) == tile_queries
+        for results in (first, second):
+            assert [r["name"] for r in results[0]["results"]] == ["Diner"]
+            assert [r["name"] for r in results[1]["results"]] == ["Diner"]
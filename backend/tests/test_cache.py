@@ -0,0 +1,268 @@
+"""
+Unit tests for the Overpass result cache.
+
+Run all cache tests:
+    pytest tests/test_cache.py -v
+"""
+import sqlite3
+
+from services.cache import CachedArea, InMemoryCache, SQLiteCache, make_cache_key
+from tests.helpers import FakeClock
+
+
+class TestMakeCacheKey:
+    """Tests for cache key quantization."""
+
+    def test_nearby_points_share_key(self):
+        """Test that points in the same grid cell and radius bucket share a key."""
+        key_a = make_cache_key(40.71281, -74.00601, 1400, 0.005, 500)
+        key_b = make_cache_key(40.71299, -74.00620, 1500, 0.005, 500)
+
+        assert key_a == key_b
+
+    def test_distant_points_have_different_keys(self):
+        """Test that points in different cells get different keys."""
+        key_a = make_cache_key(40.7128, -74.0060, 1500, 0.005, 500)
+        key_b = make_cache_key(40.7580, -73.9855, 1500, 0.005, 500)
+
+        assert key_a != key_b
+
+    def test_radius_buckets_differ(self):
+        """Test that radii in different buckets get different keys."""
+        key_a = make_cache_key(40.7128, -74.0060, 500, 0.005, 500)
+        key_b = make_cache_key(40.7128, -74.0060, 501, 0.005, 500)
+
+        assert key_a != key_b
+
+
+class TestInMemoryCache:
+    """Tests for the TTL/LRU in-memory cache."""
+
+    def test_get_returns_stored_elements(self):
+        """Test that stored elements are returned and counted as a hit."""
+        cache = InMemoryCache()
+        cache.set("k", [{"id": 1}])
+
+        assert cache.get("k") == [{"id": 1}]
+        assert cache.stats()["hits"] == 1
+
+    def test_missing_key_counts_miss(self):
+        """Test that a missing key returns None and counts a miss."""
+        cache = InMemoryCache()
+
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries are not returned after their TTL."""
+        clock = FakeClock()
+        cache = InMemoryCache(ttl_seconds=10, clock=clock)
+        cache.set("k", [{"id": 1}])
+
+        clock.now = 9.9
+        assert cache.get("k") is not None
+
+        clock.now = 10.0
+        assert cache.get("k") is None
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the LRU entry is evicted when the cache is full."""
+        cache = InMemoryCache(max_entries=2)
+        cache.set("a", [])
+        cache.set("b", [])
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", [])
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_lookup_returns_expired_entries_as_stale(self):
+        """Test that lookup serves expired entries during the stale window."""
+        clock = FakeClock()
+        cache = InMemoryCache(ttl_seconds=10, stale_seconds=5, clock=clock)
+        cache.set("k", [{"id": 1}])
+
+        clock.now = 12.0
+        result = cache.lookup("k")
+
+        assert result.elements == [{"id": 1}]
+        assert result.stale is True
+        assert result.expires_in == -2.0
+        # Plain get() only returns fresh entries
+        assert cache.get("k") is None
+        assert cache.stats()["stale_hits"] == 1
+
+        clock.now = 15.0
+        assert cache.lookup("k") is None
+        assert cache.stats()["size"] == 0
+
+    def test_find_containing_returns_smallest_fresh_containing_entry(self):
+        """Test that a search inside cached areas is served from the narrowest one."""
+        clock = FakeClock()
+        cache = InMemoryCache(ttl_seconds=10, clock=clock)
+        cache.set("wide", [{"id": 1}], CachedArea(40.0, -74.0, 5000))
+        cache.set("narrow", [{"id": 2}], CachedArea(40.0, -74.0, 2000))
+        cache.set("unknown", [{"id": 3}])
+
+        assert cache.find_containing(40.001, -74.0, 1000) == [{"id": 2}]
+        assert cache.find_containing(40.001, -74.0, 3000) == [{"id": 1}]
+        # Sticks out of every cached circle
+        assert cache.find_containing(40.04, -74.0, 1000) is None
+
+        clock.now = 10.0
+        assert cache.find_containing(40.001, -74.0, 1000) is None
+        stats = cache.stats()
+        assert stats["containment_hits"] == 2
+        assert stats["containment_misses"] == 2
+        assert stats["containment_hit_ratio"] == 0.5
+        # Exact-key counters are separate
+        assert stats["hits"] == 0
+
+
+class TestSQLiteCache:
+    """Tests for the persistent SQLite cache."""
+
+    def test_entries_are_shared_between_instances(self, tmp_path):
+        """Test that another process/restart sees stored entries."""
+        path = str(tmp_path / "cache.sqlite3")
+        writer = SQLiteCache(path)
+        writer.set("k", [{"id": 1, "tags": {"name": "Café"}}])
+
+        reader = SQLiteCache(path)
+
+        assert reader.get("k") == [{"id": 1, "tags": {"name": "Café"}}]
+        assert reader.stats()["hits"] == 1
+        writer.close()
+        reader.close()
+
+    def test_entries_expire_after_ttl(self, tmp_path):
+        """Test that expired entries are misses."""
+        clock = FakeClock()
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10, clock=clock)
+        cache.set("k", [])
+
+        clock.now = 10.0
+
+        assert cache.get("k") is None
+        assert cache.stats()["misses"] == 1
+        cache.close()
+
+    def test_least_recently_used_entries_evicted_over_byte_budget(self, tmp_path):
+        """Test size-based LRU eviction."""
+        clock = FakeClock()
+        cache = SQLiteCache(
+            str(tmp_path / "cache.sqlite3"), touch_interval_seconds=0, clock=clock
+        )
+        payload = [{"id": i, "name": f"restaurant-{i}" * 20} for i in range(50)]
+        cache.set("a", payload)
+        entry_bytes = cache.stats()["bytes"]
+        cache.max_bytes = entry_bytes * 2
+
+        clock.now = 1.0
+        cache.set("b", payload)
+        clock.now = 2.0
+        cache.get("a")  # "b" is now least recently used
+        clock.now = 3.0
+        cache.set("c", payload)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+        cache.close()
+
+    def test_hits_record_their_access_time_at_most_once_per_interval(self, tmp_path):
+        """Test that hot entries are not rewritten on every read."""
+        clock = FakeClock()
+        path = str(tmp_path / "cache.sqlite3")
+        cache = SQLiteCache(path, touch_interval_seconds=60, clock=clock)
+        cache.set("k", [{"id": 1}])
+
+        def last_access():
+            with sqlite3.connect(path) as conn:
+                return conn.execute("SELECT last_access FROM overpass_cache").fetchone()[0]
+
+        clock.now = 30.0
+        cache.get("k")
+        assert last_access() == 0.0
+        clock.now = 90.0
+        cache.get("k")
+        assert last_access() == 90.0
+        cache.close()
+
+    def test_locked_database_skips_writes(self, tmp_path):
+        """Test that another process holding the write lock does not stall or fail calls."""
+        clock = FakeClock()
+        path = str(tmp_path / "cache.sqlite3")
+        cache = SQLiteCache(
+            path, busy_timeout_seconds=0.01, touch_interval_seconds=0, clock=clock
+        )
+        cache.set("k", [{"id": 1}])
+
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN EXCLUSIVE")
+        try:
+            clock.now = 1.0
+            # Still a hit, only the access time update is skipped
+            assert cache.get("k") == [{"id": 1}]
+            cache.set("j", [{"id": 2}])
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+
+        assert cache.stats()["lock_errors"] == 2
+        assert cache.get("k") == [{"id": 1}]
+        assert cache.get("j") is None
+        cache.close()
+
+    def test_lookup_returns_expired_entries_as_stale(self, tmp_path):
+        """Test that expired entries stay available as stale until the window ends."""
+        clock = FakeClock()
+        cache = SQLiteCache(
+            str(tmp_path / "cache.sqlite3"), ttl_seconds=10, stale_seconds=5, clock=clock
+        )
+        cache.set("k", [{"id": 1}])
+
+        clock.now = 11.0
+        result = cache.lookup("k")
+
+        assert result.elements == [{"id": 1}]
+        assert result.stale is True
+        assert cache.get("k") is None
+
+        clock.now = 15.0
+        assert cache.lookup("k") is None
+        cache.close()
+
+    def test_find_containing_returns_smallest_fresh_containing_entry(self, tmp_path):
+        """Test containment lookups against the persisted areas."""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        cache.set("wide", [{"id": 1}], CachedArea(40.0, -74.0, 5000))
+        cache.set("narrow", [{"id": 2}], CachedArea(40.0, -74.0, 2000))
+        cache.set("unknown", [{"id": 3}])
+
+        assert cache.find_containing(40.001, -74.0, 1000) == [{"id": 2}]
+        assert cache.find_containing(40.001, -74.0, 3000) == [{"id": 1}]
+        assert cache.find_containing(40.04, -74.0, 1000) is None
+        assert cache.stats()["containment_hits"] == 2
+        cache.close()
+
+    def test_databases_without_area_columns_are_upgraded(self, tmp_path):
+        """Test that a cache file from before areas were stored still opens."""
+        path = str(tmp_path / "cache.sqlite3")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE overpass_cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, "
+            "last_access REAL NOT NULL, size INTEGER NOT NULL, payload BLOB NOT NULL)"
+        )
+        conn.close()
+
+        cache = SQLiteCache(path)
+        cache.set("k", [{"id": 1}], CachedArea(40.0, -74.0, 5000))
+
+        assert cache.get("k") == [{"id": 1}]
+        assert cache.find_containing(40.0, -74.0, 1000) == [{"id": 1}]
+        cache.close()
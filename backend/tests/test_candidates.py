@@ -0,0 +1,94 @@
+"""
+Unit tests for the columnar candidate pipeline.
+
+Run all candidate pipeline tests:
+    pytest tests/test_candidates.py -v
+"""
+import math
+
+import pytest
+from services.candidates import CandidateElements, CandidateTable, candidate_table
+from services.restaurant_service import RestaurantService
+
+ELEMENTS = [
+    {"type": "node", "id": 1, "lat": 40.001, "lon": -74.0,
+     "tags": {"name": "Luigi's Trattoria", "amenity": "restaurant", "cuisine": "italian;pizza"}},
+    {"type": "way", "id": 2, "center": {"lat": 40.0005, "lon": -74.0},
+     "tags": {"name": "Bean There", "amenity": "cafe"}},
+    {"type": "node", "id": 3, "lat": 40.1, "lon": -74.0,
+     "tags": {"name": "Far Away Pizza", "amenity": "fast_food"}},
+    {"type": "node", "id": 4, "tags": {"name": "Nowhere Noodles", "cuisine": "Chinese"}},
+    {"type": "node", "id": 5, "lat": 40.0, "lon": -74.0, "tags": {"amenity": "restaurant"}},
+    {"type": "relation", "id": 6, "tags": {"name": "Food Court", "amenity": "restaurant"}},
+]
+
+
+class TestCandidateTable:
+    """Tests for CandidateTable."""
+
+    def test_only_named_nodes_and_ways_are_candidates(self):
+        """Test that unnamed elements and relations are dropped."""
+        table = CandidateTable(ELEMENTS)
+
+        assert [e["id"] for e in table.elements] == [1, 2, 3, 4]
+        assert math.isnan(table.lat[3])
+
+    @pytest.mark.parametrize("preferences", [
+        None, [], ["italian"], ["PIZZA"], ["cafe"], ["food"], ["chinese"],
+        ["bean"], ["sushi"], ["sushi", "noodles"], [""], ["dumpling"],
+    ])
+    def test_preference_mask_matches_python_implementation(self, preferences):
+        """Test that the vectorized mask agrees with _matches_preferences."""
+        service = RestaurantService()
+        table = CandidateTable(ELEMENTS)
+
+        expected = [
+            service._to_restaurant(element, preferences) is not None
+            for element in table.elements
+        ]
+
+        assert table.preference_mask(preferences).tolist() == expected
+
+    def test_rank_orders_by_distance_and_applies_radius(self):
+        """Test nearest-first ordering, radius filtering and unlocated rows last."""
+        table = CandidateTable(ELEMENTS)
+
+        rows, distances = table.rank(40.0, -74.0, radius=1000)
+
+        assert [table.elements[r]["id"] for r in rows] == [2, 1, 4]
+        assert distances[0] == pytest.approx(55.6, abs=0.5)
+        assert math.isnan(distances[2])
+
+    def test_rank_applies_preferences(self):
+        """Test that ranking only keeps preference matches."""
+        table = CandidateTable(ELEMENTS)
+
+        rows, _ = table.rank(40.0, -74.0, radius=20000, preferences=["pizza"])
+
+        assert [table.elements[r]["id"] for r in rows] == [1, 3]
+
+    def test_empty_table(self):
+        """Test that an empty result ranks to nothing."""
+        table = CandidateTable([])
+
+        rows, distances = table.rank(40.0, -74.0, radius=1000, preferences=["thai"])
+
+        assert rows.size == 0
+        assert distances.size == 0
+
+
+class TestCandidateTableReuse:
+    """Tests for candidate_table()."""
+
+    def test_table_is_built_once_per_candidate_list(self):
+        """Test that a CandidateElements list keeps the table built from it."""
+        elements = CandidateElements(ELEMENTS)
+
+        table = candidate_table(elements)
+
+        assert candidate_table(elements) is table
+        assert [e["id"] for e in table.elements] == [1, 2, 3, 4]
+
+    def test_plain_lists_get_a_new_table(self):
+        """Test that a plain list has nowhere to keep its table."""
+        assert candidate_table(ELEMENTS) is not candidate_table(ELEMENTS)
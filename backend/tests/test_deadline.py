@@ -0,0 +1,61 @@
+"""
+Unit tests for per-request deadlines.
+
+Run all deadline tests:
+    pytest tests/test_deadline.py -v
+"""
+import asyncio
+import contextvars
+
+import pytest
+from services.deadline import (
+    Deadline,
+    DeadlineExceededError,
+    current_deadline,
+    deadline_scope,
+    remaining_timeout,
+)
+from tests.helpers import FakeClock
+
+
+def test_timeout_is_cut_down_to_the_time_left():
+    """Test that operations never get more time than the deadline leaves."""
+    clock = FakeClock()
+    deadline = Deadline(10, clock=clock)
+
+    assert deadline.timeout(60) == 10
+    clock.now = 8
+    assert deadline.timeout(60) == 2
+    assert deadline.timeout(1) == 1
+
+    clock.now = 12
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout(60)
+
+
+@pytest.mark.asyncio
+async def test_scope_sets_the_deadline_for_tasks_started_inside():
+    """Test that work started in a scope sees its deadline and nothing leaks out."""
+    deadline = Deadline(5)
+
+    with deadline_scope(deadline):
+        seen = await asyncio.create_task(_read())
+        assert remaining_timeout(60) <= 5
+
+    assert seen is deadline
+    assert current_deadline() is None
+    assert remaining_timeout(60) == 60
+
+
+async def _read():
+    return current_deadline()
+
+
+def test_scope_can_be_exited_from_another_context():
+    """Test that closing a scope elsewhere (an abandoned generator) does not raise."""
+    scope = deadline_scope(Deadline(5))
+    contextvars.copy_context().run(scope.__enter__)
+
+    contextvars.Context().run(scope.__exit__, None, None, None)
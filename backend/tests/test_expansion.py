@@ -0,0 +1,26 @@
+"""
+Unit tests for the adaptive search expansion policy.
+
+Run all expansion tests:
+    pytest tests/test_expansion.py -v
+"""
+import pytest
+from services.expansion import ExpansionPolicy
+
+
+def test_radii_grow_geometrically_up_to_the_requested_radius():
+    """Test that the last step is always the requested radius."""
+    assert ExpansionPolicy(400, 2.0).radii(1500) == [400, 800, 1500]
+    assert ExpansionPolicy(400, 2.0).radii(1600) == [400, 800, 1600]
+    assert ExpansionPolicy(500, 1.5).radii(2000) == [500, 750, 1125, 1688, 2000]
+
+
+def test_small_radius_is_a_single_step():
+    """Test that searches within the initial radius are not split."""
+    assert ExpansionPolicy(400, 2.0).radii(300) == [300]
+
+
+def test_growth_factor_must_grow():
+    """Test that a policy that would never reach the radius is rejected."""
+    with pytest.raises(ValueError):
+        ExpansionPolicy(400, 1.0)
@@ -0,0 +1,163 @@
+"""
+Unit tests for background service-area ingestion.
+
+Run all ingestion tests:
+    pytest tests/test_ingest.py -v
+"""
+import httpx
+import pytest
+from services.geo import split_bbox
+from services.ingest import AreaIngester, ServiceArea, format_osm_timestamp
+from services.restaurant_service import OverpassError, RestaurantService
+from tests.helpers import FakeClock
+
+AREA = ServiceArea(40.70, -74.02, 40.80, -73.93)
+# A recent Unix time, so sync timestamps look like real OSM dates
+START = 1_700_000_000.0
+
+
+def restaurant(element_id: int, name: str, lat: float = 40.75, lon: float = -73.98) -> dict:
+    return {"type": "node", "id": element_id, "lat": lat, "lon": lon,
+            "tags": {"name": name, "amenity": "restaurant"}}
+
+
+class FakeOverpass:
+    """Records fetch_area calls and answers them from a queue of responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def __call__(self, south, west, north, east, newer=None):
+        self.calls.append(((south, west, north, east), newer))
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestSplitBbox:
+    """Tests for geo.split_bbox."""
+
+    def test_tiles_cover_box_and_are_clipped(self):
+        """Test that tiles cover the box without exceeding it."""
+        tiles = split_bbox(40.0, -74.0, 40.25, -73.9, 0.1)
+
+        assert len(tiles) == 3
+        assert tiles[0] == pytest.approx((40.0, -74.0, 40.1, -73.9))
+        assert tiles[-1][2] == 40.25
+
+
+class TestServiceArea:
+    """Tests for ServiceArea."""
+
+    def test_contains_whole_circle_only(self):
+        """Test that a circle crossing the area edge is not contained."""
+        assert AREA.contains(40.75, -73.98, 1000)
+        assert not AREA.contains(40.799, -73.98, 1000)
+
+
+class TestAreaIngester:
+    """Tests for AreaIngester."""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_fetches_every_tile(self):
+        """Test that the initial sync is a full, tiled fetch."""
+        fetch = FakeOverpass([restaurant(1, "Luigi's")])
+        ingester = AreaIngester([AREA], fetch, tile_size=0.05)
+
+        assert not ingester.covers(40.75, -73.98, 1000)
+        await ingester.sync(AREA)
+
+        assert len(fetch.calls) == 4
+        assert all(newer is None for _, newer in fetch.calls)
+        assert ingester.covers(40.75, -73.98, 1000)
+        assert [e["id"] for e in ingester.query(40.75, -73.98, 1000)] == [1]
+
+    @pytest.mark.asyncio
+    async def test_later_syncs_only_fetch_newer_elements(self):
+        """Test incremental updates with the newer filter and overlap."""
+        clock = FakeClock(START)
+        fetch = FakeOverpass([restaurant(1, "Luigi's")], [restaurant(1, "Luigi's Trattoria")])
+        ingester = AreaIngester(
+            [AREA], fetch, tile_size=1.0, update_overlap_seconds=60, clock=clock
+        )
+
+        await ingester.sync(AREA)
+        first_sync = clock.now
+        clock.now += 600
+        await ingester.sync(AREA)
+
+        assert fetch.calls[-1][1] == format_osm_timestamp(first_sync - 60)
+        assert ingester.index.size == 1
+        assert ingester.query(40.75, -73.98, 100)[0]["tags"]["name"] == "Luigi's Trattoria"
+        assert ingester.stats()["incremental_syncs"] == 1
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync_drops_elements_that_stopped_being_restaurants(self):
+        """Test that a re-tagged element returned by a newer query leaves the index."""
+        clock = FakeClock(START)
+        closed = restaurant(1, "Luigi's")
+        closed["tags"]["amenity"] = "vacant"
+        fetch = FakeOverpass([restaurant(1, "Luigi's"), restaurant(2, "Kept")], [closed])
+        ingester = AreaIngester([AREA], fetch, tile_size=1.0, clock=clock)
+
+        await ingester.sync(AREA)
+        clock.now += 600
+        await ingester.sync(AREA)
+
+        assert fetch.calls[-1][1] is not None
+        assert [e["id"] for e in ingester.query(40.75, -73.98, 100)] == [2]
+
+    @pytest.mark.asyncio
+    async def test_full_refresh_drops_deleted_elements(self):
+        """Test that the periodic full sync replaces the area's contents."""
+        clock = FakeClock(START)
+        fetch = FakeOverpass([restaurant(1, "Old"), restaurant(2, "Kept")], [restaurant(2, "Kept")])
+        ingester = AreaIngester(
+            [AREA], fetch, tile_size=1.0, full_refresh_seconds=3600, clock=clock
+        )
+
+        await ingester.sync(AREA)
+        clock.now += 3600
+        await ingester.sync(AREA)
+
+        assert fetch.calls[-1][1] is None
+        assert [e["id"] for e in ingester.query(40.75, -73.98, 100)] == [2]
+
+    @pytest.mark.asyncio
+    async def test_failed_tile_leaves_index_unchanged(self):
+        """Test that a failing tile aborts the sync without partial updates."""
+        fetch = FakeOverpass([restaurant(1, "Luigi's")], OverpassError("down"))
+        ingester = AreaIngester([AREA], fetch, tile_size=0.05)
+
+        await ingester.sync_all()
+
+        assert ingester.index.size == 0
+        assert not ingester.covers(40.75, -73.98, 1000)
+        assert ingester.stats()["failures"] == 1
+
+
+class TestIngestedSearch:
+    """Tests for searches answered from ingested areas."""
+
+    @pytest.mark.asyncio
+    async def test_covered_search_skips_overpass_and_others_fall_back(self):
+        """Test that only searches outside the synced areas go upstream."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": [restaurant(9, "Remote", 41.0, -74.0)]})
+
+        ingester = AreaIngester([AREA], FakeOverpass([restaurant(1, "Luigi's")]), tile_size=1.0)
+        await ingester.sync(AREA)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, ingester=ingester)
+            inside = await service.search_nearby_restaurants(40.75, -73.98, 1000)
+            outside = await service.search_nearby_restaurants(41.0, -74.0, 1000)
+
+        assert [r["name"] for r in inside["results"]] == ["Luigi's"]
+        assert [r["name"] for r in outside["results"]] == ["Remote"]
+        assert len(calls) == 1
@@ -0,0 +1,34 @@
+"""
+Unit tests for rolling latency statistics.
+
+Run all latency tests:
+    pytest tests/test_latency.py -v
+"""
+from services.latency import LatencyWindow
+
+
+class TestLatencyWindow:
+    """Tests for LatencyWindow."""
+
+    def test_percentile_empty_window(self):
+        """Test that an empty window has no percentile."""
+        assert LatencyWindow().percentile(95) is None
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles over recorded samples."""
+        window = LatencyWindow()
+        for i in range(1, 101):
+            window.record(i / 100)
+
+        assert window.percentile(50) == 0.5
+        assert window.percentile(95) == 0.95
+        assert window.percentile(100) == 1.0
+
+    def test_window_keeps_most_recent_samples(self):
+        """Test that old samples are dropped when the window is full."""
+        window = LatencyWindow(max_samples=3)
+        for value in [10.0, 1.0, 2.0, 3.0]:
+            window.record(value)
+
+        assert len(window) == 3
+        assert window.percentile(100) == 3.0
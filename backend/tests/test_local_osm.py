@@ -0,0 +1,103 @@
+"""
+Unit tests for the local OSM extract backend.
+
+Run all local OSM tests:
+    pytest tests/test_local_osm.py -v
+"""
+import json
+
+import pytest
+from services.local_osm import LocalOSMIndex
+from services.restaurant_service import RestaurantService
+
+# Times Square, NYC
+CENTER = (40.7580, -73.9855)
+
+ELEMENTS = [
+    # ~100 m north of the center
+    {"type": "node", "id": 1, "lat": 40.7589, "lon": -73.9855,
+     "tags": {"name": "Near Pizza", "amenity": "restaurant", "cuisine": "pizza"}},
+    # Way with a center, ~300 m east
+    {"type": "way", "id": 2, "center": {"lat": 40.7580, "lon": -73.9820},
+     "tags": {"name": "Corner Cafe", "amenity": "cafe"}},
+    # ~5 km away
+    {"type": "node", "id": 3, "lat": 40.8030, "lon": -73.9855,
+     "tags": {"name": "Far Diner", "amenity": "restaurant"}},
+    # Not a restaurant
+    {"type": "node", "id": 4, "lat": 40.7581, "lon": -73.9855,
+     "tags": {"name": "Bank", "amenity": "bank"}},
+]
+
+
+class TestLocalOSMIndex:
+    """Tests for LocalOSMIndex."""
+
+    def test_only_restaurant_amenities_are_indexed(self):
+        """Test that non-restaurant elements are dropped on load."""
+        index = LocalOSMIndex(ELEMENTS)
+
+        assert index.size == 3
+
+    def test_query_returns_elements_within_radius(self):
+        """Test that only elements inside the radius are returned."""
+        index = LocalOSMIndex(ELEMENTS, cell_size=0.005)
+
+        ids = {e["id"] for e in index.query(*CENTER, radius=1000)}
+
+        assert ids == {1, 2}
+
+    def test_query_spans_multiple_cells(self):
+        """Test that a wide radius collects elements from neighbouring cells."""
+        index = LocalOSMIndex(ELEMENTS, cell_size=0.005)
+
+        ids = {e["id"] for e in index.query(*CENTER, radius=6000)}
+
+        assert ids == {1, 2, 3}
+
+    def test_upsert_moves_an_edited_element(self):
+        """Test that an updated element replaces the old version, even in another cell."""
+        index = LocalOSMIndex(ELEMENTS, cell_size=0.005)
+
+        moved = dict(ELEMENTS[0], lat=40.8030, lon=-73.9850)
+        index.upsert(moved)
+
+        assert index.size == 3
+        assert {e["id"] for e in index.query(*CENTER, radius=1000)} == {2}
+
+    def test_upsert_removes_element_that_is_no_longer_a_restaurant(self):
+        """Test that an element whose amenity changed drops out of the index."""
+        index = LocalOSMIndex(ELEMENTS)
+
+        index.upsert(dict(ELEMENTS[1], tags={"name": "Corner Shop", "amenity": "shop"}))
+
+        assert index.size == 2
+
+    def test_remove_within_bounding_box(self):
+        """Test that remove_within only drops elements inside the box."""
+        index = LocalOSMIndex(ELEMENTS, cell_size=0.005)
+
+        removed = index.remove_within(40.75, -74.0, 40.76, -73.98)
+
+        assert removed == 2
+        assert {e["id"] for e in index.query(*CENTER, radius=6000)} == {3}
+
+    def test_from_file_accepts_overpass_json(self, tmp_path):
+        """Test loading an extract saved as an Overpass response."""
+        path = tmp_path / "extract.json"
+        path.write_text(json.dumps({"elements": ELEMENTS}))
+
+        index = LocalOSMIndex.from_file(str(path))
+
+        assert index.size == 3
+
+    @pytest.mark.asyncio
+    async def test_service_answers_from_local_index(self):
+        """Test that the service uses the local index instead of Overpass."""
+        service = RestaurantService(local_index=LocalOSMIndex(ELEMENTS))
+
+        result = await service.search_nearby_restaurants(
+            *CENTER, radius=1000, preferences=["pizza"]
+        )
+
+        assert result["status"] == "OK"
+        assert [r["place_id"] for r in result["results"]] == ["osm_node_1"]
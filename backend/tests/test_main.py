@@ -1,7 +1,13 @@
 """
 Tests for the main FastAPI application endpoints.
 """
+import asyncio
+import json
+
+from config import get_settings
 from fastapi import status
+from services.cache import SQLiteCache
+from services.records import RestaurantRecord
 
 
 def test_read_root(client):
@@ -41,6 +47,60 @@ def test_nonexistent_endpoint_returns_404(client):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+def test_lifespan_creates_shared_http_client(client):
+    """Test that the app lifespan provides a pooled HTTP client."""
+    http_client = client.app.state.http_client
+
+    assert http_client is not None
+    assert not http_client.is_closed
+
+
+def test_cache_stats_endpoint(client):
+    """Test that cache statistics are exposed."""
+    response = client.get("/api/restaurants/cache/stats")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["enabled"] is True
+    assert "hits" in data
+    assert "misses" in data
+
+
+def test_sqlite_cache_stats_are_read_off_the_event_loop(client, tmp_path):
+    """Test that the stats endpoints query an SQLite cache in a worker thread."""
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    on_event_loop = []
+    original_stats = cache.stats
+
+    def recording_stats():
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return original_stats()
+
+    cache.stats = recording_stats
+    client.app.state.cache = cache
+
+    stats = client.get("/api/restaurants/cache/stats")
+    metrics = client.get("/metrics")
+
+    assert stats.json()["backend"] == "sqlite"
+    assert "overpass_cache_entries 0" in metrics.text
+    assert on_event_loop == [False, False]
+
+
+def test_overpass_health_endpoint(client):
+    """Test that Overpass server health is exposed."""
+    response = client.get("/api/overpass/health")
+
+    assert response.status_code == status.HTTP_200_OK
+    servers = response.json()["servers"]
+    assert len(servers) >= 1
+    assert {"url", "state", "latency_ewma_ms", "error_rate"} <= servers[0].keys()
+
+
 # Overpass API (OpenStreetMap) - Restaurant Search Tests
 
 
@@ -189,6 +249,174 @@ def test_search_restaurants_validates_radius_maximum(client):
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+def test_search_restaurants_validates_cursor(client):
+    """Test that the cursor must be one returned by a previous response."""
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060, "cursor": "page-two"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_search_restaurants_passes_paging_to_service(client, mocker):
+    """Test that limit/cursor reach the service and next_cursor is returned."""
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {
+        "results": [
+            {"name": "Nearest", "place_id": "osm_node_1", "vicinity": "", "distance_m": 42.0}
+        ],
+        "status": "OK",
+        "next_offset": 6,
+    }
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060, "limit": 3, "cursor": "3"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    kwargs = mock_service.search_nearby_restaurants.call_args.kwargs
+    assert kwargs["limit"] == 3
+    assert kwargs["offset"] == 3
+    data = response.json()
+    assert data["next_cursor"] == "6"
+    assert data["restaurants"][0]["distance_m"] == 42.0
+
+
+def test_search_restaurants_serializes_restaurant_records(client, mocker):
+    """Test that records from the service are returned with every Restaurant field."""
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {
+        "results": [
+            RestaurantRecord(
+                name="Diner", place_id="osm_node_1", vicinity="1 Main St",
+                types=["restaurant"], cuisine=["american"], distance_m=12.5
+            )
+        ],
+        "status": "OK",
+        "next_offset": None,
+    }
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "restaurants": [{
+            "name": "Diner", "place_id": "osm_node_1", "vicinity": "1 Main St",
+            "rating": None, "types": ["restaurant"], "user_ratings_total": None,
+            "price_level": None, "opening_hours": None, "distance_m": 12.5,
+        }],
+        "status": "OK",
+        "total_results": 1,
+        "next_cursor": None,
+        "stale": False,
+        "partial": False,
+    }
+
+
+def test_metrics_endpoint_reports_search_metrics(client, mocker):
+    """Test that /metrics exposes request counters and stage histograms."""
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {"results": [], "status": "ZERO_RESULTS"}
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+    client.post("/api/restaurants/search", json={"latitude": 40.7128, "longitude": -74.0060})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'restaurant_search_requests_total{endpoint="search",status="ZERO_RESULTS"} 1' in response.text
+    assert 'restaurant_search_stage_seconds_count{stage="serialize"} 1' in response.text
+    assert 'restaurant_search_in_flight{endpoint="search"} 0' in response.text
+    assert "overpass_cache_hit_ratio" in response.text
+
+
+def test_search_restaurants_batch_streams_ndjson(client, mocker):
+    """Test that batch results are streamed as one JSON line per search."""
+    async def fake_search_batch(searches, **kwargs):
+        yield 1, {"results": [], "status": "ZERO_RESULTS"}
+        yield 0, {
+            "results": [{"name": "Diner", "place_id": "osm_node_1", "vicinity": ""}],
+            "status": "OK",
+        }
+
+    mock_service = mocker.Mock()
+    mock_service.search_batch = fake_search_batch
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    response = client.post(
+        "/api/restaurants/search/batch",
+        json={"searches": [
+            {"latitude": 40.7128, "longitude": -74.0060},
+            {"latitude": 40.7580, "longitude": -73.9855},
+        ]},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
+    assert lines[1]["restaurants"][0]["name"] == "Diner"
+    assert lines[1]["total_results"] == 1
+
+
+def test_search_restaurants_batch_requires_searches(client):
+    """Test that an empty batch is rejected."""
+    response = client.post("/api/restaurants/search/batch", json={"searches": []})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def mock_stream_service(mocker):
+    """Patch RestaurantService with a fake streaming search."""
+    async def fake_stream(**kwargs):
+        yield {"event": "restaurant",
+               "restaurant": {"name": "Diner", "place_id": "osm_node_1", "vicinity": ""}}
+        yield {"event": "summary", "status": "OK", "total_results": 1, "source": "cache"}
+
+    mock_service = mocker.Mock()
+    mock_service.stream_nearby_restaurants = fake_stream
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+
+def test_search_restaurants_stream_ndjson(client, mocker):
+    """Test that streamed search emits restaurant events then a summary."""
+    mock_stream_service(mocker)
+
+    response = client.post(
+        "/api/restaurants/search/stream",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["event"] for line in lines] == ["restaurant", "summary"]
+    assert lines[0]["data"]["name"] == "Diner"
+    assert lines[1]["data"]["total_results"] == 1
+
+
+def test_search_restaurants_stream_sse(client, mocker):
+    """Test the Server-Sent Events encoding of a streamed search."""
+    mock_stream_service(mocker)
+
+    response = client.post(
+        "/api/restaurants/search/stream?format=sse",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.strip().split("\n\n")
+    assert events[0].startswith("event: restaurant\ndata: ")
+    assert events[1].startswith("event: summary\ndata: ")
+
+
 # Response Structure Tests
 
 
@@ -347,3 +575,167 @@ def test_search_restaurants_handles_zero_results(client, mocker):
     data = response.json()
     assert data["restaurants"] == []
     assert data["status"] == "ZERO_RESULTS"
+
+
+def test_search_restaurants_rate_limits_expensive_clients(client, mocker, monkeypatch):
+    """Test that a client's wide searches use up its allowance and get a 429."""
+    monkeypatch.setattr(get_settings(), "rate_limit_api_keys", ["a", "b"])
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {"results": [], "status": "ZERO_RESULTS"}
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+    wide = {"latitude": 40.7128, "longitude": -74.0060, "radius": 50000}
+
+    first = client.post("/api/restaurants/search", json=wide, headers={"X-API-Key": "a"})
+    second = client.post("/api/restaurants/search", json=wide, headers={"X-API-Key": "a"})
+    other = client.post("/api/restaurants/search", json=wide, headers={"X-API-Key": "b"})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(second.headers["Retry-After"]) > 0
+    assert other.status_code == status.HTTP_200_OK
+
+
+def test_search_restaurants_ignores_unknown_api_keys(client, mocker):
+    """Test that rotating an unknown API key does not get a fresh allowance."""
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {"results": [], "status": "ZERO_RESULTS"}
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+    wide = {"latitude": 40.7128, "longitude": -74.0060, "radius": 50000}
+
+    first = client.post("/api/restaurants/search", json=wide, headers={"X-API-Key": "a"})
+    second = client.post("/api/restaurants/search", json=wide, headers={"X-API-Key": "b"})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_search_uses_the_configured_http_timeout(client, mocker):
+    """Test that http_timeout_seconds reaches the service's upstream attempts."""
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.return_value = {"results": [], "status": "ZERO_RESULTS"}
+    service_class = mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    client.post("/api/restaurants/search", json={"latitude": 40.7128, "longitude": -74.0060})
+
+    assert service_class.call_args.kwargs["timeout"] == get_settings().http_timeout_seconds
+
+
+def test_search_restaurants_batch_is_charged_per_cluster(client, mocker):
+    """Test that a batch pays per upstream query, not per search."""
+    async def fake_search_batch(searches, **kwargs):
+        for index in range(len(searches)):
+            yield index, {"results": [], "status": "ZERO_RESULTS"}
+
+    mock_service = mocker.Mock()
+    mock_service.search_batch = fake_search_batch
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+    # 200 delivery points across a city, 1 km searches: well over a full
+    # bucket of searches, but only a few clusters
+    points = [
+        {"latitude": 40.70 + row * 0.005, "longitude": -74.02 + col * 0.005, "radius": 1000}
+        for row in range(10)
+        for col in range(20)
+    ]
+
+    first = client.post("/api/restaurants/search/batch", json={"searches": points})
+    second = client.post("/api/restaurants/search/batch", json={"searches": points})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert len(first.text.splitlines()) == 200
+    assert second.status_code == status.HTTP_200_OK
+
+
+def test_search_restaurants_batch_of_wide_searches_drains_the_bucket(client, mocker):
+    """Test that an expensive batch is admitted once and then rate limited."""
+    async def fake_search_batch(searches, **kwargs):
+        for index in range(len(searches)):
+            yield index, {"results": [], "status": "ZERO_RESULTS"}
+
+    mock_service = mocker.Mock()
+    mock_service.search_batch = fake_search_batch
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+    wide = [
+        {"latitude": 40.7128 + offset, "longitude": -74.0060, "radius": 50000}
+        for offset in (0.0, 0.5)
+    ]
+
+    first = client.post("/api/restaurants/search/batch", json={"searches": wide})
+    second = client.post("/api/restaurants/search/batch", json={"searches": wide[:1]})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_search_restaurants_returns_503_when_upstream_is_busy(client, mocker):
+    """Test that an exhausted upstream budget fails fast with a 503."""
+    from services.admission import UpstreamBusyError
+
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.side_effect = UpstreamBusyError("busy")
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_search_restaurants_returns_504_at_the_client_deadline(client, mocker):
+    """Test that a client-shortened deadline abandons a slow search."""
+    cancelled = []
+
+    async def slow_search(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    mock_service = mocker.AsyncMock()
+    mock_service.search_nearby_restaurants.side_effect = slow_search
+    mocker.patch("main.RestaurantService", return_value=mock_service)
+
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+        headers={"X-Request-Timeout": "0.05"},
+    )
+
+    assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert cancelled == [True]
+
+
+def test_search_restaurants_rejects_invalid_deadline_header(client):
+    """Test that the deadline header must be a positive number of seconds."""
+    response = client.post(
+        "/api/restaurants/search",
+        json={"latitude": 40.7128, "longitude": -74.0060},
+        headers={"X-Request-Timeout": "soon"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_search_restaurants_is_cancelled_when_the_client_disconnects():
+    """Test that a search is abandoned once its client has gone away."""
+    from main import ClientDisconnectedError, run_for_request
+    from services.deadline import Deadline
+
+    class DisconnectedRequest:
+        async def receive(self):
+            return {"type": "http.disconnect"}
+
+    async def scenario():
+        search = asyncio.ensure_future(asyncio.sleep(5))
+        try:
+            await run_for_request(DisconnectedRequest(), Deadline(10), search)
+        except ClientDisconnectedError:
+            pass
+        else:
+            raise AssertionError("ClientDisconnectedError not raised")
+        return search.cancelled()
+
+    assert asyncio.run(scenario()) is True
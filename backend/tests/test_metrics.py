@@ -0,0 +1,109 @@
+"""
+Unit tests for the Prometheus-style metrics.
+
+Run all metrics tests:
+    pytest tests/test_metrics.py -v
+"""
+import asyncio
+
+import httpx
+import pytest
+from services.metrics import MetricsRegistry, SearchMetrics, upstream_outcome
+from services.restaurant_service import RestaurantService
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry rendering."""
+
+    def test_counter_renders_labelled_series(self):
+        """Test the text format of a labelled counter."""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ("status",))
+        counter.inc("OK")
+        counter.inc("OK")
+        counter.inc("ERROR")
+
+        text = registry.render()
+
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{status="OK"} 2' in text
+        assert 'requests_total{status="ERROR"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts, sum and count of a histogram."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stages", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "fetch")
+        histogram.observe(0.5, "fetch")
+        histogram.observe(5.0, "fetch")
+
+        text = registry.render()
+
+        assert 'stage_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+        assert 'stage_seconds_bucket{stage="fetch",le="1"} 2' in text
+        assert 'stage_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+        assert 'stage_seconds_sum{stage="fetch"} 5.55' in text
+        assert 'stage_seconds_count{stage="fetch"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.gauge("g", "Gauge", ("name",)).set(1, 'a"b\\c')
+
+        assert 'g{name="a\\"b\\\\c"} 1' in registry.render()
+
+    def test_collectors_are_read_at_scrape_time(self):
+        """Test that collector families are rendered with their labels."""
+        registry = MetricsRegistry()
+        size = {"value": 1}
+        registry.add_collector(lambda: [("cache_entries", "gauge", "Entries", [({}, size["value"])])])
+        size["value"] = 7
+
+        assert "cache_entries 7" in registry.render()
+
+
+class TestUpstreamOutcome:
+    """Tests for upstream_outcome."""
+
+    def test_outcomes(self):
+        """Test the classification of Overpass request results."""
+        request = httpx.Request("POST", "https://overpass.example/api")
+
+        def status_error(code):
+            response = httpx.Response(code, request=request)
+            return httpx.HTTPStatusError("error", request=request, response=response)
+
+        assert upstream_outcome(None, element_count=3) == "ok"
+        assert upstream_outcome(None) == "zero_results"
+        assert upstream_outcome(status_error(429)) == "rate_limited"
+        assert upstream_outcome(status_error(504)) == "http_error"
+        assert upstream_outcome(httpx.ReadTimeout("slow", request=request)) == "timeout"
+        assert upstream_outcome(asyncio.CancelledError()) == "cancelled"
+
+
+class TestSearchInstrumentation:
+    """Tests for metrics recorded by RestaurantService."""
+
+    @pytest.mark.asyncio
+    async def test_search_records_stages_and_upstream_outcomes(self):
+        """Test per-server outcome counters and stage histograms of one search."""
+        primary, fallback = RestaurantService.OVERPASS_SERVERS
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == primary:
+                return httpx.Response(429)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": "Diner", "amenity": "restaurant"}},
+            ]})
+
+        metrics = SearchMetrics()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, metrics=metrics)
+            await service.search_nearby_restaurants(40.0, -74.0, 500)
+
+        assert metrics.upstream_requests.value(primary, "rate_limited") == 1
+        assert metrics.upstream_requests.value(fallback, "ok") == 1
+        assert metrics.upstream_in_flight.value() == 0
+        for stage in ("fetch", "decode", "rank"):
+            assert metrics.stage_seconds.count(stage) >= 1
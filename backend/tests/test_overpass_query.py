@@ -0,0 +1,121 @@
+"""
+Unit tests for the Overpass QL query builder.
+
+Run all query builder tests:
+    pytest tests/test_overpass_query.py -v
+"""
+from services.overpass_query import (
+    build_restaurant_bbox_query,
+    build_restaurant_query,
+    build_restaurant_ring_query,
+    escape_regex,
+    with_timeout,
+)
+
+
+class TestBuildRestaurantQuery:
+    """Tests for build_restaurant_query."""
+
+    def test_query_without_preferences(self):
+        """Test the unfiltered query shape."""
+        query = build_restaurant_query(40.7128, -74.006, 1500)
+
+        assert "(around:1500,40.7128,-74.006)" in query
+        assert 'node["amenity"~"^(restaurant|cafe|fast_food)$"]["name"]' in query
+        assert 'way["amenity"~"^(restaurant|cafe|fast_food)$"]["name"]' in query
+        assert "cuisine" not in query
+
+    def test_query_uses_center_output_without_recursion(self):
+        """Test that ways are output with a center and child nodes are not fetched."""
+        query = build_restaurant_query(40.7128, -74.006, 1500)
+
+        assert "out tags center qt;" in query
+        assert ">;" not in query
+        assert "skel" not in query
+
+    def test_preferences_become_case_insensitive_tag_filters(self):
+        """Test that preferences filter on cuisine and name server-side."""
+        query = build_restaurant_query(40.7128, -74.006, 1500, preferences=["Italian", "sushi"])
+
+        # "sushi" also brings in its synonym "japanese"
+        assert '["cuisine"~"italian|sushi|japanese",i]' in query
+        assert '["name"~"italian|sushi|japanese",i]' in query
+
+    def test_preference_matching_amenity_type(self):
+        """Test that a preference contained in an amenity type selects that amenity."""
+        query = build_restaurant_query(40.7128, -74.006, 1500, preferences=["cafe"])
+
+        assert '["amenity"~"^(cafe)$"](around' in query
+
+    def test_limit_caps_server_output(self):
+        """Test that the result limit is applied to the output statement."""
+        query = build_restaurant_query(40.7128, -74.006, 1500, limit=10)
+
+        assert "out tags center qt 10;" in query
+
+    def test_timeout_is_configurable(self):
+        """Test the server-side timeout setting."""
+        query = build_restaurant_query(40.7128, -74.006, 1500, timeout=25)
+
+        assert query.startswith("[out:json][timeout:25];")
+
+
+    def test_bbox_query_with_newer_filter(self):
+        """Test that incremental bbox queries only ask for recently edited elements."""
+        query = build_restaurant_bbox_query(
+            40.7, -74.0, 40.8, -73.9, newer="2024-05-01T12:00:00Z"
+        )
+
+        assert '(40.7,-74.0,40.8,-73.9)(newer:"2024-05-01T12:00:00Z");' in query
+        # Elements that stopped being restaurants must come back too
+        assert '["name"](40.7' in query
+        assert "amenity" not in query
+
+def test_with_timeout_replaces_the_server_timeout():
+    """Test that a built query's timeout can be cut down before it is sent."""
+    query = with_timeout(build_restaurant_query(40.7128, -74.006, 1500), 7)
+
+    assert query.startswith("[out:json][timeout:7];")
+    assert "timeout:60" not in query
+
+
+class TestBuildRestaurantRingQuery:
+    """Tests for build_restaurant_ring_query."""
+
+    def test_ring_subtracts_the_inner_disc(self):
+        """Test that the inner radius is removed with an Overpass difference."""
+        query = build_restaurant_ring_query(40.7128, -74.006, 400, 800, limit=100)
+
+        outer = query.index("(around:800,40.7128,-74.006)")
+        difference = query.index("-\n")
+        inner = query.index("(around:400,40.7128,-74.006)")
+        assert outer < difference < inner
+        assert "out tags center qt 100;" in query
+
+    def test_preferences_filter_both_discs(self):
+        """Test that both sides of the difference use the preference filters."""
+        query = build_restaurant_ring_query(40.7128, -74.006, 400, 800, preferences=["thai"])
+
+        assert query.count('["cuisine"~"thai",i]') == 4
+
+    def test_without_inner_radius_is_the_radius_query(self):
+        """Test that the first step of an expansion is a plain radius query."""
+        assert build_restaurant_ring_query(40.7128, -74.006, 0, 400, limit=50) == (
+            build_restaurant_query(40.7128, -74.006, 400, limit=50)
+        )
+
+
+class TestEscapeRegex:
+    """Tests for escape_regex."""
+
+    def test_plain_text_is_unchanged(self):
+        """Test that ordinary words pass through."""
+        assert escape_regex("thai") == "thai"
+
+    def test_metacharacters_are_escaped(self):
+        """Test that regex metacharacters match literally."""
+        assert escape_regex("a.b") == "a\\\\.b"
+
+    def test_quotes_are_escaped(self):
+        """Test that quotes cannot terminate the QL string."""
+        assert escape_regex('"') == '\\"'
@@ -0,0 +1,84 @@
+"""
+Unit tests for the incremental Overpass response parser.
+
+Run all streaming parser tests:
+    pytest tests/test_overpass_stream.py -v
+"""
+import json
+import pickle
+
+import pytest
+from services.overpass_stream import ElementStreamParser
+
+RESPONSE = {
+    "version": 0.6,
+    "generator": "Overpass API",
+    "osm3s": {"timestamp_osm_base": "2026-01-01T00:00:00Z", "copyright": "ODbL \"elements\": ["},
+    "elements": [
+        {"type": "node", "id": 1, "tags": {"name": "A]}", "amenity": "cafe"}},
+        {"type": "way", "id": 2, "nodes": [10, 11], "tags": {"name": "B"}},
+        {"type": "node", "id": 10, "lat": 1.5, "lon": -2.25},
+    ],
+    "remark": "done",
+}
+
+
+def parse_in_chunks(text: str, size: int) -> list[dict]:
+    """Feed text to a parser in fixed-size chunks and collect the elements."""
+    parser = ElementStreamParser()
+    elements = []
+    for i in range(0, len(text), size):
+        elements.extend(parser.feed(text[i:i + size]))
+    parser.close()
+    return elements
+
+
+class TestElementStreamParser:
+    """Tests for ElementStreamParser."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+    def test_yields_all_elements_for_any_chunking(self, chunk_size):
+        """Test that elements are parsed regardless of chunk boundaries."""
+        text = json.dumps(RESPONSE, indent=1)
+
+        assert parse_in_chunks(text, chunk_size) == RESPONSE["elements"]
+
+    def test_elements_are_yielded_before_response_completes(self):
+        """Test that a complete element is available before the body ends."""
+        text = json.dumps(RESPONSE)
+        cut = text.index('{"type": "way"')
+        parser = ElementStreamParser()
+
+        first = list(parser.feed(text[:cut]))
+
+        assert [e["id"] for e in first] == [1]
+
+    def test_empty_elements(self):
+        """Test a response without any elements."""
+        assert parse_in_chunks('{"version": 0.6, "elements": []}', 3) == []
+
+    def test_truncated_response_raises(self):
+        """Test that a response cut off mid-document is reported."""
+        parser = ElementStreamParser()
+        list(parser.feed('{"elements": [{"type": "node", "id": 1}'))
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_non_object_response_raises(self):
+        """Test that a non-JSON-object body is rejected."""
+        parser = ElementStreamParser()
+
+        with pytest.raises(ValueError):
+            list(parser.feed("<html>Too many requests</html>"))
+
+    def test_partly_fed_parser_survives_pickling(self):
+        """Test that a parser can be handed to another process mid-response."""
+        parser = ElementStreamParser()
+        first = list(parser.feed('{"elements": [{"type": "node", "id": 1}, {"type": "no'))
+
+        restored = pickle.loads(pickle.dumps(parser))
+        rest = list(restored.feed('de", "id": 2}]}'))
+        restored.close()
+
+        assert [e["id"] for e in first + rest] == [1, 2]
@@ -0,0 +1,69 @@
+"""
+Unit tests for the precompiled preference matcher.
+
+Run all preference matcher tests:
+    pytest tests/test_preference_matcher.py -v
+"""
+from services.preference_matcher import PreferenceMatcher, expand_preferences
+
+
+class TestExpandPreferences:
+    """Tests for expand_preferences."""
+
+    def test_normalizes_and_deduplicates(self):
+        """Test lowercasing and de-duplication in first-seen order."""
+        assert expand_preferences(["Thai", "thai", "Indian"], synonyms={}) == ("thai", "indian")
+
+    def test_adds_synonyms(self):
+        """Test that synonyms are appended after their preference."""
+        assert expand_preferences(["Pizza"]) == ("pizza", "italian")
+
+    def test_empty_preferences(self):
+        """Test that missing preferences expand to nothing."""
+        assert expand_preferences(None) == ()
+
+
+class TestPreferenceMatcher:
+    """Tests for PreferenceMatcher."""
+
+    def test_matches_cuisine_type_or_name_substring(self):
+        """Test that any field can produce a match."""
+        matcher = PreferenceMatcher(["veg"], synonyms={})
+
+        assert matcher.matches(["vegetarian"], [], "Green Leaf")
+        assert matcher.matches([], ["restaurant", "vegan"], "Green Leaf")
+        assert matcher.matches([], [], "The Veggie Bar")
+        assert not matcher.matches(["steak_house"], ["restaurant"], "Meat Co")
+
+    def test_synonym_matches(self):
+        """Test that a synonym of a preference matches."""
+        matcher = PreferenceMatcher(["pizza"])
+
+        assert matcher.matches(["italian"], ["restaurant", "italian"], "Trattoria")
+
+    def test_match_cannot_span_fields(self):
+        """Test that terms are not matched across field boundaries."""
+        matcher = PreferenceMatcher(["cafeitalian"], synonyms={})
+
+        assert not matcher.matches(["italian"], ["cafe"], "X")
+
+    def test_special_characters_match_literally(self):
+        """Test that regex metacharacters in preferences are literal."""
+        matcher = PreferenceMatcher(["a.b"], synonyms={})
+
+        assert matcher.matches([], [], "a.b bistro")
+        assert not matcher.matches([], [], "axb bistro")
+
+    def test_no_preferences_matches_everything(self):
+        """Test that an empty matcher accepts any restaurant."""
+        matcher = PreferenceMatcher([])
+
+        assert not matcher
+        assert matcher.matches([], [], "Anything")
+
+    def test_for_preferences_reuses_compiled_matcher(self):
+        """Test that the same preferences share one compiled matcher."""
+        first = PreferenceMatcher.for_preferences(("italian", "thai"))
+        second = PreferenceMatcher.for_preferences(("italian", "thai"))
+
+        assert first is second
@@ -0,0 +1,69 @@
+"""
+Unit tests for compact restaurant records.
+
+Run all record tests:
+    pytest tests/test_records.py -v
+"""
+import pytest
+from models import Restaurant
+from services.records import RestaurantRecord, compact_element
+
+
+class TestRestaurantRecord:
+    """Tests for RestaurantRecord."""
+
+    def test_record_has_no_instance_dict(self):
+        """Test that records are slotted."""
+        record = RestaurantRecord(name="Diner", place_id="osm_node_1", vicinity="")
+
+        assert not hasattr(record, "__dict__")
+
+    def test_mapping_access_to_fields(self):
+        """Test record["field"] and record.get() for dict-style callers."""
+        record = RestaurantRecord(
+            name="Diner", place_id="osm_node_1", vicinity="", cuisine=["american"]
+        )
+
+        assert record["name"] == "Diner"
+        assert record["cuisine"] == ["american"]
+        assert record.get("rating", "n/a") == "n/a"
+        with pytest.raises(KeyError):
+            record["as_response"]
+
+    def test_as_response_matches_restaurant_model(self):
+        """Test that the unvalidated response fields equal the model's output."""
+        record = RestaurantRecord(
+            name="Diner",
+            place_id="osm_node_1",
+            vicinity="1 Main St",
+            types=["restaurant", "american"],
+            opening_hours="Mo-Su 08:00-22:00",
+            cuisine=["american"],
+            distance_m=12.5
+        )
+
+        assert record.as_response() == Restaurant(**record.as_response()).model_dump()
+        assert "cuisine" not in record.as_response()
+
+
+class TestCompactElement:
+    """Tests for compact_element."""
+
+    def test_unused_tags_are_dropped(self):
+        """Test that only the tags searches read are kept."""
+        element = {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                   "tags": {"name": "Diner", "amenity": "restaurant", "website": "x",
+                            "cuisine": "american", "addr:city": "NYC"}}
+
+        assert compact_element(element) == {
+            "type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+            "tags": {"name": "Diner", "amenity": "restaurant", "cuisine": "american",
+                     "addr:city": "NYC"},
+        }
+
+    def test_way_keeps_center(self):
+        """Test that ways keep the center used for their coordinates."""
+        element = {"type": "way", "id": 2, "center": {"lat": 40.0, "lon": -74.0},
+                   "tags": {"name": "Cafe", "amenity": "cafe"}}
+
+        assert compact_element(element)["center"] == {"lat": 40.0, "lon": -74.0}
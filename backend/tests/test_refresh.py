@@ -0,0 +1,135 @@
+"""
+Unit tests for background cache refreshes.
+
+Run all refresh tests:
+    pytest tests/test_refresh.py -v
+"""
+import asyncio
+
+import pytest
+from services.deadline import Deadline, current_deadline, deadline_scope
+from services.refresh import BackgroundRefresher
+
+
+class TestBackgroundRefresher:
+    """Tests for BackgroundRefresher."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_of_same_key_are_deduplicated(self):
+        """Test that a key being refreshed is not refreshed again."""
+        release = asyncio.Event()
+        calls = []
+
+        async def refresh():
+            calls.append(1)
+            await release.wait()
+
+        refresher = BackgroundRefresher()
+
+        assert refresher.schedule("k", refresh) is True
+        assert refresher.schedule("k", refresh) is False
+        await asyncio.sleep(0)
+        release.set()
+        while refresher.in_flight():
+            await asyncio.sleep(0)
+
+        assert len(calls) == 1
+        assert refresher.stats()["deduplicated"] == 1
+        assert refresher.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_refresh_is_not_bound_by_the_scheduling_request_deadline(self):
+        """Test that background refreshes outlive the request that scheduled them."""
+        seen = []
+
+        async def refresh():
+            seen.append(current_deadline())
+
+        refresher = BackgroundRefresher()
+        with deadline_scope(Deadline(0.01)):
+            refresher.schedule("k", refresh)
+        while refresher.in_flight():
+            await asyncio.sleep(0)
+
+        assert seen == [None]
+
+    @pytest.mark.asyncio
+    async def test_refreshes_over_concurrency_cap_are_dropped(self):
+        """Test that at most max_concurrency refreshes run at once."""
+        release = asyncio.Event()
+
+        async def refresh():
+            await release.wait()
+
+        refresher = BackgroundRefresher(max_concurrency=2)
+
+        started = [refresher.schedule(key, refresh) for key in ("a", "b", "c")]
+
+        assert started == [True, True, False]
+        assert refresher.stats()["dropped"] == 1
+        release.set()
+        await refresher.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_is_counted(self):
+        """Test that refresh errors are recorded instead of being lost."""
+        async def refresh():
+            raise RuntimeError("upstream down")
+
+        refresher = BackgroundRefresher()
+        refresher.schedule("k", refresh)
+        while refresher.in_flight():
+            await asyncio.sleep(0)
+
+        assert refresher.stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_prefetch_refreshes_hot_keys_only(self):
+        """Test that only frequently accessed keys are prefetched."""
+        refreshed = []
+
+        def make_refresh(key):
+            async def refresh():
+                refreshed.append(key)
+            return refresh
+
+        refresher = BackgroundRefresher(hot_min_hits=3)
+        for _ in range(3):
+            refresher.record_access("hot", make_refresh("hot"))
+        refresher.record_access("cold", make_refresh("cold"))
+
+        assert refresher.prefetch() == 1
+        await asyncio.sleep(0)
+
+        assert refreshed == ["hot"]
+        # Counting starts over after each prefetch
+        assert refresher.hot_keys() == []
+
+    @pytest.mark.asyncio
+    async def test_prefetch_skips_hot_keys_far_from_expiry(self):
+        """Test that prefetching within a window only renews entries about to expire."""
+        refreshed = []
+
+        def make_refresh(key):
+            async def refresh():
+                refreshed.append(key)
+            return refresh
+
+        refresher = BackgroundRefresher(hot_min_hits=1, clock=lambda: 100.0)
+        refresher.record_access("expiring", make_refresh("expiring"), expires_in=30)
+        refresher.record_access("fresh", make_refresh("fresh"), expires_in=500)
+        refresher.record_access("missed", make_refresh("missed"))
+
+        assert refresher.prefetch(within=60) == 1
+        await asyncio.sleep(0)
+
+        assert refreshed == ["expiring"]
+
+    def test_access_tracking_disabled_by_default(self):
+        """Test that accesses are not counted unless hot_min_hits is set."""
+        refresher = BackgroundRefresher()
+
+        refresher.record_access("k", lambda: None)
+
+        assert refresher.hot_keys() == []
+        assert refresher.prefetch() == 0
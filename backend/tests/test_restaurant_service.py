@@ -8,8 +8,27 @@ Run all unit tests:
 Run a specific unit test:
     pytest tests/test_restaurant_service.py::test_parse_restaurants_max_results -v
 """
+import asyncio
+import json
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import httpx
 import pytest
+from services.admission import UpstreamBudget, UpstreamBusyError
+from services.cache import InMemoryCache, SQLiteCache
+from services.candidates import CandidateTable
+from services.deadline import Deadline, DeadlineExceededError, deadline_scope
+from services.expansion import ExpansionPolicy
+from services.geo import METERS_PER_DEGREE
+from services.metrics import SearchMetrics
+from services.refresh import BackgroundRefresher
 from services.restaurant_service import RestaurantService
+from services.server_health import ServerHealthTracker
+from services.single_flight import SingleFlight
+from tests.helpers import FakeClock
 
 
 class TestRestaurantService:
@@ -141,3 +160,931 @@ class TestRestaurantService:
             assert "Italian" in restaurant["name"]
             assert "italian" in restaurant["cuisine"]
 
+    @pytest.mark.asyncio
+    async def test_search_uses_injected_client(self):
+        """Test that an injected shared client is reused for Overpass calls."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={
+                "elements": [{
+                    "type": "node",
+                    "id": 1,
+                    "tags": {"name": "Shared Client Cafe", "amenity": "cafe"}
+                }]
+            })
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            result = await service.search_nearby_restaurants(40.7128, -74.0060)
+
+            # The shared client must still be open for the next request
+            assert not client.is_closed
+
+        assert len(calls) == 1
+        assert result["status"] == "OK"
+        assert result["results"][0]["name"] == "Shared Client Cafe"
+
+    @pytest.mark.asyncio
+    async def test_search_serves_nearby_repeat_from_cache(self):
+        """Test that a near-identical search is answered from the cache."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={
+                "elements": [
+                    {"type": "node", "id": 1,
+                     "tags": {"name": "Luigi's", "amenity": "restaurant", "cuisine": "italian"}},
+                    {"type": "node", "id": 2,
+                     "tags": {"name": "Taco Stand", "amenity": "fast_food", "cuisine": "mexican"}},
+                ]
+            })
+
+        cache = InMemoryCache()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=cache)
+            first = await service.search_nearby_restaurants(40.71281, -74.00601, 1500)
+            second = await service.search_nearby_restaurants(
+                40.71290, -74.00610, 1450, preferences=["mexican"]
+            )
+
+        assert len(calls) == 1
+        assert len(first["results"]) == 2
+        # Preference filtering runs against the cached elements
+        assert [r["name"] for r in second["results"]] == ["Taco Stand"]
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_reuse_the_candidate_table(self, monkeypatch):
+        """Test that the candidate table is built once per cached entry, not per search."""
+        built = []
+        original_init = CandidateTable.__init__
+
+        def counting_init(table, elements):
+            built.append(table)
+            original_init(table, elements)
+
+        monkeypatch.setattr(CandidateTable, "__init__", counting_init)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={
+                "elements": [
+                    {"type": "node", "id": 1, "lat": 40.7128, "lon": -74.006,
+                     "tags": {"name": "Luigi's", "amenity": "restaurant", "cuisine": "italian"}},
+                ]
+            })
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=InMemoryCache())
+            for preferences in (None, ["italian"], ["sushi"]):
+                await service.search_nearby_restaurants(
+                    40.7128, -74.006, 1500, preferences=preferences
+                )
+
+        assert len(built) == 1
+
+    @pytest.mark.asyncio
+    async def test_narrower_search_is_served_from_containing_cache_entry(self):
+        """Test that a search inside a cached wider search does not go upstream."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0001, "lon": -74.0,
+                 "tags": {"name": "Near", "amenity": "restaurant"}},
+                {"type": "node", "id": 2, "lat": 40.03, "lon": -74.0,
+                 "tags": {"name": "Far", "amenity": "restaurant"}},
+            ]})
+
+        cache = InMemoryCache()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=cache)
+            wide = await service.search_nearby_restaurants(40.0, -74.0, 5000)
+            narrow = await service.search_nearby_restaurants(40.0, -74.0, 1000)
+
+        assert len(calls) == 1
+        assert [r["name"] for r in wide["results"]] == ["Near", "Far"]
+        assert [r["name"] for r in narrow["results"]] == ["Near"]
+        assert cache.stats()["containment_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_capped_response_does_not_answer_narrower_searches(self):
+        """Test that a result cut off at result_cap is only used for its own key."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": "Only", "amenity": "restaurant"}},
+            ]})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=InMemoryCache(), result_cap=1)
+            await service.search_nearby_restaurants(40.0, -74.0, 5000)
+            await service.search_nearby_restaurants(40.0, -74.0, 1000)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_cache_entry_served_and_refreshed_in_background(self):
+        """Test stale-while-revalidate: expired data is returned, then refreshed."""
+        names = iter(["Old Diner", "New Diner"])
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": next(names), "amenity": "restaurant"}},
+            ]})
+
+        clock = FakeClock()
+        cache = InMemoryCache(ttl_seconds=10, stale_seconds=60, clock=clock)
+        refresher = BackgroundRefresher()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=cache, refresher=refresher)
+            await service.search_nearby_restaurants(40.0, -74.0, 500)
+
+            clock.now = 20.0
+            stale = await service.search_nearby_restaurants(40.0, -74.0, 500)
+            while refresher.in_flight():
+                await asyncio.sleep(0)
+            fresh = await service.search_nearby_restaurants(40.0, -74.0, 500)
+
+        assert stale["stale"] is True
+        assert [r["name"] for r in stale["results"]] == ["Old Diner"]
+        assert "stale" not in fresh
+        assert [r["name"] for r in fresh["results"]] == ["New Diner"]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_search_fails_fast_when_upstream_budget_is_exhausted(self):
+        """Test that searches needing Overpass are turned away while the budget is full."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": []})
+
+        budget = UpstreamBudget(max_concurrent=1, max_queued=0)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, upstream_budget=budget)
+            async with budget.slot():
+                with pytest.raises(UpstreamBusyError):
+                    await service.search_nearby_restaurants(40.0, -74.0)
+                events = [e async for e in service.stream_nearby_restaurants(40.0, -74.0)]
+            result = await service.search_nearby_restaurants(40.0, -74.0)
+
+        assert events[-1]["status"] == "ERROR"
+        assert result["status"] == "ZERO_RESULTS"
+        assert len(calls) == 1
+        assert budget.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hedged_fetch_uses_faster_fallback(self):
+        """Test that a slow primary is raced against the fallback server."""
+        primary, fallback = RestaurantService.OVERPASS_SERVERS
+        primary_cancelled = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == primary:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+            return httpx.Response(200, json={
+                "elements": [{
+                    "type": "node",
+                    "id": 1,
+                    "tags": {"name": "Fallback Diner", "amenity": "restaurant"}
+                }]
+            })
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, fetch_mode="hedged", hedge_delay=0.01
+            )
+            result = await service.search_nearby_restaurants(40.7128, -74.0060)
+
+        assert result["status"] == "OK"
+        assert result["results"][0]["name"] == "Fallback Diner"
+        assert primary_cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_hedged_fetch_moves_on_after_rate_limit(self):
+        """Test that a rate-limited primary falls through to the next server."""
+        primary, _ = RestaurantService.OVERPASS_SERVERS
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(str(request.url))
+            if str(request.url) == primary:
+                return httpx.Response(429)
+            return httpx.Response(200, json={"elements": []})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, fetch_mode="hedged", hedge_delay=10
+            )
+            result = await service.search_nearby_restaurants(40.7128, -74.0060)
+
+        assert result["status"] == "ZERO_RESULTS"
+        assert len(requested) == 2
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_failing_server(self):
+        """Test that a server with an open circuit is not retried on every search."""
+        primary, fallback = RestaurantService.OVERPASS_SERVERS
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(str(request.url))
+            if str(request.url) == primary:
+                return httpx.Response(503)
+            return httpx.Response(200, json={"elements": []})
+
+        tracker = ServerHealthTracker(servers=[primary, fallback], failure_threshold=1)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, health_tracker=tracker)
+            await service.search_nearby_restaurants(40.7128, -74.0060)
+            await service.search_nearby_restaurants(40.7128, -74.0060)
+
+        assert requested == [primary, fallback, fallback]
+
+    @pytest.mark.asyncio
+    async def test_search_stops_reading_once_enough_results(self):
+        """Test that the response stream is closed once result_cap matches arrive."""
+        chunks_sent = 0
+
+        async def body():
+            nonlocal chunks_sent
+            yield b'{"version": 0.6, "elements": ['
+            for i in range(1000):
+                chunks_sent += 1
+                element = {
+                    "type": "node",
+                    "id": i,
+                    "tags": {"name": f"Restaurant {i}", "amenity": "restaurant"}
+                }
+                yield (json.dumps(element) + ",").encode()
+            yield b'{}]}'
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body())
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, result_cap=20)
+            result = await service.search_nearby_restaurants(40.7128, -74.0060)
+
+        assert len(result["results"]) == 10
+        assert chunks_sent < 1000
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cached", [False, True])
+    async def test_search_cut_off_at_result_cap_is_partial(self, cached):
+        """Test that a response cut off at result_cap is not presented as complete."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": i, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": f"Restaurant {i}", "amenity": "restaurant"}}
+                for i in range(1, 6)
+            ]})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            cache = InMemoryCache() if cached else None
+            capped = RestaurantService(client=client, cache=cache, result_cap=5)
+            uncapped = RestaurantService(client=client, cache=cache, result_cap=6)
+            first = await capped.search_nearby_restaurants(40.0, -74.0)
+            second = await capped.search_nearby_restaurants(40.0, -74.0)
+            complete = await uncapped.search_nearby_restaurants(40.0, -74.0)
+
+        assert first["partial"] and second["partial"]
+        assert len(first["results"]) == 5
+        assert "partial" not in complete
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("streamed", [False, True])
+    async def test_preference_search_of_truncated_cell_uses_filtered_query(self, streamed):
+        """Test that a cell cut off at result_cap does not hide preferred restaurants."""
+        queries = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            queries.append(query)
+            if "sushi" in query:
+                return httpx.Response(200, json={"elements": [
+                    {"type": "node", "id": 99, "lat": 40.0, "lon": -74.0,
+                     "tags": {"name": "Sushi Bar", "amenity": "restaurant", "cuisine": "sushi"}},
+                ]})
+            # The dense cell's first result_cap restaurants are all pizza places
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": i, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": f"Pizza {i}", "amenity": "restaurant", "cuisine": "pizza"}}
+                for i in range(1, 6)
+            ]})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=InMemoryCache(), result_cap=5)
+            await service.search_nearby_restaurants(40.0, -74.0)
+            if streamed:
+                events = [
+                    event async for event in service.stream_nearby_restaurants(
+                        40.0, -74.0, preferences=["sushi"]
+                    )
+                ]
+                names = [e["restaurant"]["name"] for e in events if e["event"] == "restaurant"]
+            else:
+                result = await service.search_nearby_restaurants(
+                    40.0, -74.0, preferences=["sushi"]
+                )
+                names = [r["name"] for r in result["results"]]
+
+        assert names == ["Sushi Bar"]
+        assert len(queries) == 2 and "sushi" in queries[1]
+
+    @pytest.mark.asyncio
+    async def test_search_ranks_nearest_first_and_pages(self):
+        """Test nearest-first ordering, radius filtering and offset paging."""
+        # Elements at increasing distance north of the origin, in shuffled order
+        offsets_m = [900, 100, 2500, 500, 300, 700]
+        elements = [
+            {"type": "node", "id": d, "lat": 40.0 + d / 111195, "lon": -74.0,
+             "tags": {"name": f"{d} m away", "amenity": "restaurant"}}
+            for d in offsets_m
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"elements": elements})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=InMemoryCache())
+            first = await service.search_nearby_restaurants(40.0, -74.0, 1000, limit=3)
+            second = await service.search_nearby_restaurants(
+                40.0, -74.0, 1000, limit=3, offset=first["next_offset"]
+            )
+
+        assert [r["name"] for r in first["results"]] == ["100 m away", "300 m away", "500 m away"]
+        assert first["results"][0]["distance_m"] == pytest.approx(100, abs=1)
+        assert first["next_offset"] == 3
+        # The 2500 m element is outside the radius
+        assert [r["name"] for r in second["results"]] == ["700 m away", "900 m away"]
+        assert second["next_offset"] is None
+
+    @pytest.mark.asyncio
+    async def test_sqlite_cache_is_used_off_the_event_loop(self, tmp_path):
+        """Test that a blocking cache backend is called from a worker thread."""
+        threads = []
+
+        class RecordingCache(SQLiteCache):
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return super().get(key)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": 1, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": "Diner", "amenity": "restaurant"}}
+            ]})
+
+        cache = RecordingCache(str(tmp_path / "cache.sqlite3"))
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=cache)
+            await service.search_nearby_restaurants(40.0, -74.0)
+            result = await service.search_nearby_restaurants(40.0, -74.0)
+        hits = cache.stats()["hits"]
+        cache.close()
+
+        assert result["results"][0]["name"] == "Diner"
+        assert hits == 1
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_restaurants_then_summary(self):
+        """Test streaming from upstream, then from the cache on a repeat search."""
+        calls = []
+        elements = [
+            {"type": "node", "id": 1, "lat": 40.0009, "lon": -74.0,
+             "tags": {"name": "Far", "amenity": "restaurant"}},
+            {"type": "node", "id": 2, "lat": 40.0001, "lon": -74.0,
+             "tags": {"name": "Near", "amenity": "cafe"}},
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url)
+            return httpx.Response(200, json={"elements": elements})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, cache=InMemoryCache())
+            first = [e async for e in service.stream_nearby_restaurants(40.0, -74.0, 500)]
+            second = [e async for e in service.stream_nearby_restaurants(40.0, -74.0, 500)]
+
+        # Upstream results arrive in response order
+        assert [e["restaurant"]["name"] for e in first[:-1]] == ["Far", "Near"]
+        assert first[-1] == {
+            "event": "summary", "status": "OK", "total_results": 2, "source": "overpass"
+        }
+        # Cached results arrive nearest-first
+        assert [e["restaurant"]["name"] for e in second[:-1]] == ["Near", "Far"]
+        assert second[-1]["source"] == "cache"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_reports_upstream_error_in_summary(self):
+        """Test that an upstream failure ends the stream with an ERROR summary."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(503)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            events = [e async for e in service.stream_nearby_restaurants(40.0, -74.0)]
+
+        assert len(events) == 1
+        assert events[0]["status"] == "ERROR"
+
+
+    @pytest.mark.asyncio
+    async def test_stream_stopped_early_counts_as_upstream_success(self):
+        """Test that a stream closed once the page is full still records the server's success."""
+        primary = RestaurantService.OVERPASS_SERVERS[0]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": i, "lat": 40.0, "lon": -74.0,
+                 "tags": {"name": f"Diner {i}", "amenity": "restaurant"}}
+                for i in range(1, 4)
+            ]})
+
+        metrics = SearchMetrics()
+        tracker = ServerHealthTracker(servers=RestaurantService.OVERPASS_SERVERS)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, metrics=metrics, health_tracker=tracker)
+            events = [
+                e async for e in service.stream_nearby_restaurants(40.0, -74.0, limit=1)
+            ]
+
+        assert events[-1]["total_results"] == 1
+        assert metrics.upstream_requests.value(primary, "ok") == 1
+        health = next(s for s in tracker.snapshot() if s["url"] == primary)
+        assert health["latency_ewma_ms"] is not None
+        assert health["failures"] == 0
+
+class TestTiledSearch:
+    """Tests for wide searches fetched as concurrent tiles."""
+
+    @staticmethod
+    def tile_handler(calls: list, failing_south: float = None):
+        """Answer bbox queries with one restaurant per tile plus a shared way."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            south, west, north, east = map(float, re.search(
+                r"\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)", query
+            ).groups())
+            calls.append((str(request.url), south))
+            if failing_south is not None and south == pytest.approx(failing_south):
+                return httpx.Response(504)
+            # The point of the tile nearest the search center, so it is in range
+            lat, lon = min(max(40.0, south), north), min(max(-74.0, west), east)
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": hash((south, west)) & 0xFFFFFF, "lat": lat, "lon": lon,
+                 "tags": {"name": f"Tile {south:.2f} {west:.2f}", "amenity": "restaurant"}},
+                # A way straddling every tile edge is returned by every tile
+                {"type": "way", "id": 7, "center": {"lat": 40.0, "lon": -74.0},
+                 "tags": {"name": "Straddler", "amenity": "restaurant"}},
+            ]})
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_wide_search_is_fetched_as_deduplicated_tiles(self):
+        """Test that tiles are fetched across mirrors, merged and cached per tile."""
+        calls = []
+        cache = InMemoryCache()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(self.tile_handler(calls))
+        ) as client:
+            service = RestaurantService(
+                client=client, cache=cache, tile_radius_threshold=5000, tile_size=0.05
+            )
+            first = await service.search_nearby_restaurants(40.0, -74.0, 6000, limit=50)
+            tile_calls = len(calls)
+            second = await service.search_nearby_restaurants(40.0, -74.0, 6000, limit=50)
+
+        names = [r["name"] for r in first["results"]]
+        assert tile_calls > 1
+        assert names.count("Straddler") == 1
+        assert len(names) == tile_calls + 1
+        # Consecutive tiles start at different mirrors
+        assert len({url for url, _ in calls}) == len(RestaurantService.OVERPASS_SERVERS)
+        # Every tile was cached
+        assert len(calls) == tile_calls
+        assert [r["name"] for r in second["results"]] == names
+        assert "partial" not in first
+
+    @pytest.mark.asyncio
+    async def test_truncated_tiles_are_partial_and_not_cached(self):
+        """Test that tiles cut off at result_cap are neither complete nor reused."""
+        calls = []
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(self.tile_handler(calls))
+        ) as client:
+            service = RestaurantService(
+                client=client, cache=InMemoryCache(), result_cap=2,
+                tile_radius_threshold=5000, tile_size=0.05
+            )
+            first = await service.search_nearby_restaurants(40.0, -74.0, 6000, limit=50)
+            tile_calls = len(calls)
+            await service.search_nearby_restaurants(40.0, -74.0, 6000, limit=50)
+
+        assert first["partial"] is True
+        assert len(calls) == 2 * tile_calls
+
+    @pytest.mark.asyncio
+    async def test_failed_tile_leaves_a_gap_instead_of_failing(self):
+        """Test that a wide search survives one tile failing on every mirror."""
+        calls = []
+        metrics = SearchMetrics()
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(self.tile_handler(calls, failing_south=40.0))
+        ) as client:
+            service = RestaurantService(
+                client=client, tile_radius_threshold=5000, tile_size=0.05, metrics=metrics
+            )
+            result = await service.search_nearby_restaurants(40.0, -74.0, 6000, limit=50)
+
+        assert result["status"] == "OK"
+        assert result["partial"] is True
+        assert metrics.tiles.value("failed") > 0
+        assert metrics.tiles.value("fetched") > 0
+
+    def test_tiles_grow_to_respect_max_tiles(self):
+        """Test that very wide searches use fewer, larger tiles."""
+        service = RestaurantService(tile_radius_threshold=5000, tile_size=0.05, max_tiles=8)
+
+        size, tiles = service._tile_grid(40.0, -74.0, 50000)
+
+        assert len(tiles) <= 8
+        assert size > 0.05
+
+    @pytest.mark.asyncio
+    async def test_every_tile_failing_is_an_error(self):
+        """Test that a wide search with no tile answered reports an error."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(504)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, tile_radius_threshold=5000)
+            result = await service.search_nearby_restaurants(40.0, -74.0, 6000)
+
+        assert result["status"] == "ERROR"
+        assert "tiles failed" in result["error"]
+
+
+class TestAdaptiveSearch:
+    """Tests for searches that widen ring by ring."""
+
+    @staticmethod
+    def ring_handler(calls: list, distances: list[float]):
+        """Answer radius and ring queries with restaurants due north of (40.0, -74.0)."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            calls.append(query)
+            # Ring queries name the outer radius first, then the inner one
+            radii = sorted({float(r) for r in re.findall(r"\(around:([\d.]+),", query)})
+            outer = radii[-1]
+            inner = radii[0] if len(radii) > 1 else 0.0
+            return httpx.Response(200, json={"elements": [
+                {"type": "node", "id": index + 1, "lat": 40.0 + distance / METERS_PER_DEGREE,
+                 "lon": -74.0, "tags": {"name": f"Place {index}", "amenity": "restaurant"}}
+                for index, distance in enumerate(distances)
+                if inner < distance <= outer
+            ]})
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_dense_area_stops_after_the_first_step(self):
+        """Test that a filled first step is the only upstream query."""
+        calls = []
+        handler = self.ring_handler(calls, [20.0 * i for i in range(1, 16)] + [1200.0])
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, expansion_policy=ExpansionPolicy(400, 2.0)
+            )
+            result = await service.search_nearby_restaurants(40.0, -74.0, 1500)
+
+        assert len(calls) == 1
+        assert "(around:400," in calls[0]
+        assert [r["name"] for r in result["results"]] == [f"Place {i}" for i in range(10)]
+        assert result["next_offset"] == 10
+
+    @pytest.mark.asyncio
+    async def test_sparse_area_expands_to_the_full_radius_in_rings(self):
+        """Test that each later step only fetches the new ring."""
+        calls = []
+        metrics = SearchMetrics()
+        handler = self.ring_handler(calls, [300.0, 1000.0, 1400.0, 1600.0])
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, expansion_policy=ExpansionPolicy(400, 2.0), metrics=metrics
+            )
+            result = await service.search_nearby_restaurants(40.0, -74.0, 1500)
+
+        assert [r["name"] for r in result["results"]] == ["Place 0", "Place 1", "Place 2"]
+        assert result["next_offset"] is None
+        assert [re.findall(r"around:(\d+)", q)[::2] for q in calls] == [
+            ["400"], ["800", "400"], ["1500", "800"]
+        ]
+        assert metrics.expansion_steps.value("fetched") == 3
+
+    @pytest.mark.asyncio
+    async def test_collected_disc_is_reused_from_the_cache(self):
+        """Test that a repeated adaptive search is answered without Overpass."""
+        calls = []
+        handler = self.ring_handler(calls, [300.0, 1000.0, 1400.0])
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, cache=InMemoryCache(), expansion_policy=ExpansionPolicy(400, 2.0)
+            )
+            first = await service.search_nearby_restaurants(40.0, -74.0, 1500)
+            upstream_calls = len(calls)
+            second = await service.search_nearby_restaurants(40.0, -74.0, 1500)
+
+        assert upstream_calls == 3
+        assert len(calls) == upstream_calls
+        assert second["results"] == first["results"]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool recording how many jobs it ran."""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.jobs = 0
+
+    def submit(self, *args, **kwargs):
+        self.jobs += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestParseOffload:
+    """Tests for parsing large responses in an executor."""
+
+    @staticmethod
+    def payload(count: int) -> bytes:
+        return json.dumps({"version": 0.6, "elements": [
+            {"type": "node", "id": i + 1, "lat": 40.0, "lon": -74.0, "tags": {
+                "name": f"Place {i}", "amenity": "restaurant",
+                "cuisine": "thai" if i % 3 == 0 else "pizza", "website": "x" * 50,
+            }}
+            for i in range(count)
+        ] + [{"type": "node", "id": 0, "lat": 40.0, "lon": -74.0}]}).encode()
+
+    async def collect(self, body: bytes, executor, chunked: bool = False, **kwargs):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if chunked:
+                # No Content-Length, so the size is only known as it arrives
+                async def chunks():
+                    for start in range(0, len(body), 1024):
+                        yield body[start:start + 1024]
+                return httpx.Response(200, content=chunks())
+            return httpx.Response(200, content=body)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, parse_executor=executor, parse_offload_bytes=4096
+            )
+            return await service._collect_elements(
+                RestaurantService.OVERPASS_SERVERS[0], "query", **kwargs
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunked", [False, True])
+    async def test_large_response_is_parsed_in_the_executor(self, chunked):
+        """Test that offloaded parsing keeps the same elements as inline parsing."""
+        body = self.payload(200)
+        executor = CountingExecutor()
+        with executor:
+            offloaded = await self.collect(body, executor, chunked=chunked)
+        inline = await self.collect(body, None, chunked=chunked)
+
+        # A streamed body is handed over in batches of about parse_offload_bytes
+        assert executor.jobs > 1 if chunked else executor.jobs == 1
+        assert offloaded == inline
+        assert len(offloaded) == 200
+        assert "website" not in offloaded[0]["tags"]
+
+    @pytest.mark.asyncio
+    async def test_small_response_is_parsed_inline(self):
+        """Test the fast path for responses below the threshold."""
+        executor = CountingExecutor()
+        with executor:
+            elements = await self.collect(self.payload(5), executor)
+
+        assert executor.jobs == 0
+        assert len(elements) == 5
+
+    @pytest.mark.asyncio
+    async def test_process_pool_applies_preferences_and_limit(self):
+        """Test that a worker process filters the rest of a response to the limit."""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            elements = await self.collect(
+                self.payload(200), executor, chunked=True, preferences=["thai"], limit=20
+            )
+
+        assert len(elements) == 20
+        assert all(e["tags"]["cuisine"] == "thai" for e in elements)
+
+
+    @pytest.mark.asyncio
+    async def test_offloaded_limited_fetch_stops_reading_early(self):
+        """Test that offloading does not download the rest of a response past the limit."""
+        body = self.payload(2000)
+        chunks_sent = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            async def chunks():
+                nonlocal chunks_sent
+                for start in range(0, len(body), 1024):
+                    chunks_sent += 1
+                    yield body[start:start + 1024]
+            return httpx.Response(200, content=chunks())
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, parse_executor=CountingExecutor(), parse_offload_bytes=4096
+            )
+            elements = await service._collect_elements(
+                RestaurantService.OVERPASS_SERVERS[0], "query", limit=20
+            )
+            service.parse_executor.shutdown()
+
+        assert len(elements) == 20
+        assert chunks_sent < len(body) // 1024 // 2
+
+    @pytest.mark.asyncio
+    async def test_unusable_executor_falls_back_to_inline_parsing(self):
+        """Test that a shut-down pool is not mistaken for a failing server."""
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.shutdown()
+        tracker = ServerHealthTracker(
+            servers=RestaurantService.OVERPASS_SERVERS, failure_threshold=1
+        )
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=self.payload(200))
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(
+                client=client, health_tracker=tracker,
+                parse_executor=executor, parse_offload_bytes=4096
+            )
+            elements = await service._fetch_elements("query")
+
+        assert len(elements) == 200
+        assert all(s["failures"] == 0 for s in tracker.snapshot())
+
+
+class TestDeadline:
+    """Tests for upstream attempts within a request deadline."""
+
+    @pytest.mark.asyncio
+    async def test_attempt_gets_only_the_time_left(self):
+        """Test that the HTTP timeout and the query [timeout:] follow the deadline."""
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            sent.append((query, request.extensions["timeout"]["read"]))
+            return httpx.Response(200, json={"elements": []})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            with deadline_scope(Deadline(5)):
+                await service.search_nearby_restaurants(40.0, -74.0)
+            await service.search_nearby_restaurants(40.0, -74.0)
+
+        (limited_query, limited_timeout), (query, timeout) = sent
+        assert limited_query.startswith("[out:json][timeout:4];")
+        assert limited_timeout <= 5
+        assert query.startswith("[out:json][timeout:60];")
+        assert timeout == 60
+
+    @pytest.mark.asyncio
+    async def test_coalesced_attempt_gets_only_the_time_left(self):
+        """Test that a single-flight fetch still runs under the caller's deadline."""
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            sent.append((query, request.extensions["timeout"]["read"]))
+            return httpx.Response(200, json={"elements": []})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, single_flight=SingleFlight())
+            with deadline_scope(Deadline(5)):
+                await service.search_nearby_restaurants(40.0, -74.0)
+
+        (query, timeout), = sent
+        assert query.startswith("[out:json][timeout:4];")
+        assert timeout <= 5
+
+    @pytest.mark.asyncio
+    async def test_configured_timeout_bounds_every_attempt(self):
+        """Test that the service timeout sets both the HTTP and the query timeout."""
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            query = parse_qs(request.content.decode())["data"][0]
+            sent.append((query, request.extensions["timeout"]["read"]))
+            return httpx.Response(200, json={"elements": []})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, timeout=20)
+            await service.search_nearby_restaurants(40.0, -74.0)
+
+        (query, timeout), = sent
+        assert query.startswith("[out:json][timeout:20];")
+        assert timeout == 20
+
+    @pytest.mark.asyncio
+    async def test_slow_first_server_leaves_no_time_for_the_fallback(self):
+        """Test that fallbacks share the budget instead of getting a fresh timeout."""
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(str(request.url))
+            await asyncio.sleep(1)
+            return httpx.Response(200, json={"elements": []})
+
+        primary, fallback = RestaurantService.OVERPASS_SERVERS[:2]
+        tracker = ServerHealthTracker(servers=[primary, fallback], failure_threshold=1)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client, health_tracker=tracker)
+            with deadline_scope(Deadline(0.05)), pytest.raises(DeadlineExceededError):
+                await service.search_nearby_restaurants(40.0, -74.0)
+
+        assert calls == [primary]
+        # Running out of budget is not the server's fault
+        assert all(s["failures"] == 0 for s in tracker.snapshot())
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_sends_nothing(self):
+        """Test that no upstream request starts once the deadline has passed."""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(200, json={"elements": []})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            with deadline_scope(Deadline(0)), pytest.raises(DeadlineExceededError):
+                await service.search_nearby_restaurants(40.0, -74.0)
+
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_stream_stops_at_the_deadline(self):
+        """Test that a response trickling in slower than the deadline ends the stream."""
+        chunks_sent = 0
+
+        async def body():
+            nonlocal chunks_sent
+            yield b'{"elements": ['
+            for i in range(1, 21):
+                await asyncio.sleep(0.1)
+                chunks_sent += 1
+                element = {
+                    "type": "node", "id": i, "lat": 40.0, "lon": -74.0,
+                    "tags": {"name": f"Restaurant {i}", "amenity": "restaurant"}
+                }
+                yield (json.dumps(element) + ",").encode()
+            yield b'{}]}'
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body())
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            service = RestaurantService(client=client)
+            with deadline_scope(Deadline(0.35)):
+                events = [e async for e in service.stream_nearby_restaurants(40.0, -74.0)]
+
+        assert events[-1]["status"] == "ERROR"
+        assert events[-1]["error"] == "Request deadline exceeded"
+        assert 0 < events[-1]["total_results"] < 10
+        assert chunks_sent < 20
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_cut_short_by_the_deadline(self):
+        """Test that running out of time in the budget queue is a deadline error."""
+        budget = UpstreamBudget(max_concurrent=1, max_queued=1, queue_timeout=10.0)
+        service = RestaurantService(upstream_budget=budget)
+
+        async with budget.slot():
+            with deadline_scope(Deadline(0.05)), pytest.raises(DeadlineExceededError):
+                await service.search_nearby_restaurants(40.0, -74.0)
+
+        assert budget.stats()["timed_out"] == 0
@@ -0,0 +1,94 @@
+"""
+Unit tests for Overpass server health tracking and circuit breaking.
+
+Run all server health tests:
+    pytest tests/test_server_health.py -v
+"""
+import httpx
+from services.server_health import ServerHealthTracker
+from tests.helpers import FakeClock
+
+PRIMARY = "https://primary.example/api/interpreter"
+FALLBACK = "https://fallback.example/api/interpreter"
+
+
+def rate_limited_error() -> httpx.HTTPStatusError:
+    """Build a 429 error as raised by httpx.Response.raise_for_status()."""
+    request = httpx.Request("POST", PRIMARY)
+    response = httpx.Response(429, request=request)
+    return httpx.HTTPStatusError("429 Too Many Requests", request=request, response=response)
+
+
+class TestServerHealthTracker:
+    """Tests for ServerHealthTracker."""
+
+    def test_unknown_servers_keep_configured_order(self):
+        """Test that servers without history keep their configured order."""
+        tracker = ServerHealthTracker(servers=[PRIMARY, FALLBACK])
+
+        assert tracker.order([PRIMARY, FALLBACK]) == [PRIMARY, FALLBACK]
+
+    def test_faster_server_is_preferred(self):
+        """Test that servers are ordered by latency EWMA."""
+        tracker = ServerHealthTracker(servers=[PRIMARY, FALLBACK])
+        tracker.record_success(PRIMARY, 3.0)
+        tracker.record_success(FALLBACK, 0.5)
+
+        assert tracker.order([PRIMARY, FALLBACK]) == [FALLBACK, PRIMARY]
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        """Test that a failing server is skipped once its circuit opens."""
+        tracker = ServerHealthTracker(servers=[PRIMARY, FALLBACK], failure_threshold=2)
+        tracker.record_failure(PRIMARY, httpx.ReadTimeout("timed out"))
+        assert tracker.is_available(PRIMARY)
+
+        tracker.record_failure(PRIMARY, rate_limited_error())
+
+        assert not tracker.is_available(PRIMARY)
+        assert tracker.order([PRIMARY, FALLBACK]) == [FALLBACK]
+        snapshot = {s["url"]: s for s in tracker.snapshot()}
+        assert snapshot[PRIMARY]["state"] == "open"
+        assert snapshot[PRIMARY]["timeouts"] == 1
+        assert snapshot[PRIMARY]["rate_limited"] == 1
+
+    def test_half_open_probe_closes_circuit_on_success(self):
+        """Test that one probe is allowed after the cooldown and closes the circuit."""
+        clock = FakeClock()
+        tracker = ServerHealthTracker(
+            servers=[PRIMARY], failure_threshold=1, open_seconds=30, clock=clock
+        )
+        tracker.record_failure(PRIMARY, httpx.ConnectError("refused"))
+        assert not tracker.is_available(PRIMARY)
+
+        clock.now = 30
+        assert tracker.is_available(PRIMARY)
+        tracker.record_attempt(PRIMARY)
+        # Only one probe at a time
+        assert not tracker.is_available(PRIMARY)
+
+        tracker.record_success(PRIMARY, 0.2)
+        assert tracker.snapshot()[0]["state"] == "closed"
+
+    def test_half_open_probe_failure_reopens_circuit(self):
+        """Test that a failed probe re-opens the circuit."""
+        clock = FakeClock()
+        tracker = ServerHealthTracker(
+            servers=[PRIMARY], failure_threshold=3, open_seconds=30, clock=clock
+        )
+        for _ in range(3):
+            tracker.record_failure(PRIMARY, httpx.ConnectError("refused"))
+
+        clock.now = 30
+        tracker.record_attempt(PRIMARY)
+        tracker.record_failure(PRIMARY, httpx.ConnectError("refused"))
+
+        assert not tracker.is_available(PRIMARY)
+        assert tracker.snapshot()[0]["state"] == "open"
+
+    def test_all_open_falls_back_to_every_server(self):
+        """Test that requests still go out when every circuit is open."""
+        tracker = ServerHealthTracker(servers=[PRIMARY, FALLBACK], failure_threshold=1)
+        tracker.record_failure(PRIMARY, httpx.ConnectError("refused"))
+        tracker.record_failure(FALLBACK, httpx.ConnectError("refused"))
+
+        assert tracker.order([PRIMARY, FALLBACK]) == [PRIMARY, FALLBACK]
@@ -0,0 +1,203 @@
+"""
+Unit tests for request coalescing.
+
+Run all single-flight tests:
+    pytest tests/test_single_flight.py -v
+"""
+import asyncio
+
+import pytest
+from services.deadline import Deadline, DeadlineExceededError, current_deadline, deadline_scope
+from services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that concurrent callers with the same key run fn once."""
+        single_flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return ["result"]
+
+        waiters = [
+            asyncio.create_task(single_flight.do("query", fetch)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert results == [["result"]] * 5
+        assert single_flight.coalesced == 4
+        assert single_flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Test that different keys are not coalesced."""
+        single_flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            single_flight.do("a", lambda: fetch("a")),
+            single_flight.do("b", lambda: fetch("b")),
+        )
+
+        assert results == ["a", "b"]
+        assert single_flight.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_all_callers(self):
+        """Test that a failed call raises in every waiting caller."""
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            single_flight.do("q", fail),
+            single_flight.do("q", fail),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        """Test that cancelling one waiter leaves the call running for others."""
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("q", fetch))
+        second = asyncio.create_task(single_flight.do("q", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_once_every_caller_is(self):
+        """Test that abandoned work does not keep running."""
+        single_flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(single_flight.do("q", fetch)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert cancelled.is_set()
+        assert single_flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_new_caller_does_not_join_a_cancelled_call(self):
+        """Test that a caller arriving while abandoned work winds down starts afresh."""
+        single_flight = SingleFlight()
+        started = asyncio.Event()
+        wound_down = asyncio.Event()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                started.set()
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    # Slow cleanup keeps the cancelled task alive for a while
+                    await asyncio.sleep(0.05)
+                    wound_down.set()
+                    raise
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("q", fetch))
+        await started.wait()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+
+        assert await single_flight.do("q", fetch) == "done"
+        assert single_flight.calls == 2
+        await wound_down.wait()
+
+    @pytest.mark.asyncio
+    async def test_callers_wait_up_to_their_own_deadline(self):
+        """Test that a short deadline does not cut short a caller with a longer one."""
+        single_flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.2)
+            return "done"
+
+        async def call(seconds):
+            with deadline_scope(Deadline(seconds)):
+                return await single_flight.do("q", fetch)
+
+        # The short-deadline caller starts the shared call
+        short = asyncio.create_task(call(0.05))
+        await asyncio.sleep(0)
+        long = asyncio.create_task(call(5))
+
+        with pytest.raises(DeadlineExceededError):
+            await short
+        assert await long == "done"
+        assert single_flight.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_call_runs_under_the_latest_deadline(self):
+        """Test that a later caller's longer deadline extends the shared call's."""
+        single_flight = SingleFlight()
+        attempts = []
+
+        async def fetch():
+            deadline = current_deadline()
+            attempts.append(deadline.remaining())
+            try:
+                async with asyncio.timeout(deadline.remaining()):
+                    await asyncio.sleep(0.2)
+            except TimeoutError as e:
+                raise DeadlineExceededError("Request deadline exceeded") from e
+            return "done"
+
+        async def call(seconds):
+            with deadline_scope(Deadline(seconds)):
+                return await single_flight.do("q", fetch)
+
+        short = asyncio.create_task(call(0.05))
+        await asyncio.sleep(0)
+        long = asyncio.create_task(call(5))
+
+        with pytest.raises(DeadlineExceededError):
+            await short
+        assert await long == "done"
+        # The first attempt was bounded by the starter's deadline, the retry
+        # by the joiner's
+        assert len(attempts) == 2
+        assert attempts[0] <= 0.05 < attempts[1]
@@ -15,6 +15,7 @@ export interface Restaurant {
   user_ratings_total?: number | null;
   price_level?: number | null;
   opening_hours?: string | null;
+  distance_m?: number | null;
 }
 
 /**
@@ -24,6 +25,9 @@ export interface RestaurantSearchResponse {
   restaurants: Restaurant[];
   status: string;
   total_results: number;
+  next_cursor?: string | null;
+  stale?: boolean;
+  partial?: boolean;
 }
 
 /**